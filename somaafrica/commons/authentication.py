@@ -0,0 +1,266 @@
+import logging
+
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from somaafrica.commons import metrics
+from somaafrica.commons.cache import LRUCache
+from somaafrica.persons import permission_bits, permission_cache
+from somaafrica.persons.models import User
+from somaafrica.persons.tokens import (
+    PERMISSIONS_CLAIM,
+    PERMISSION_VERSION_CLAIM,
+    SUPERUSER_CLAIM,
+    permission_claims_enabled
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "persons:user:{guid}:{version}:{user_version}"
+
+
+class LazyUser(object):
+    """
+    Request user built from token claims or a cached snapshot, the User
+    row is only loaded when an attribute they do not carry is read
+    """
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(
+            self,
+            guid,
+            is_superuser,
+            permission_mask,
+            is_active=True,
+            is_staff=None,
+            index=None):
+        self.guid = guid
+        self.pk = guid
+        self.is_superuser = is_superuser
+        self.permission_mask = permission_mask
+        self.is_active = is_active
+        self._user = None
+        self._index = index
+
+        # Left unset when unknown so reading it loads the row
+        if is_staff is not None:
+            self.is_staff = is_staff
+
+    def __str__(self):
+        return f"LazyUser {self.guid}"
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        if self._user is None:
+            self._user = User.objects.get(guid=self.guid)
+
+        return getattr(self._user, name)
+
+    def has_perm(self, perm, obj=None):
+        if self.is_active and self.is_superuser:
+            return True
+
+        return self._permission_index().has_perm(
+            self.permission_mask,
+            perm
+        )
+
+    def has_perms(self, perm_list, obj=None):
+        if not isinstance(perm_list, Iterable) or isinstance(perm_list, str):
+            LOGGER.error("perm_list must be an iterable of permissions.")
+            raise ValueError("perm_list must be an iterable of permissions.")
+
+        if self.is_active and self.is_superuser:
+            return True
+
+        return self._permission_index().has_perms(
+            self.permission_mask,
+            perm_list
+        )
+
+    def _permission_index(self):
+        # Read once per request, it is not cached without a shared cache
+        if self._index is None:
+            self._index = permission_bits.get_index()
+
+        return self._index
+
+
+class UserSnapshotCache(object):
+    """
+    Per-process LRU+TTL cache of what authentication needs from a user,
+    with an optional second tier in a shared Django cache.
+
+    Snapshots are only valid for the permission versions they were read
+    under. Saving or deleting a user bumps their version, so a stale
+    snapshot is never served once the version is visible to the worker.
+    Versions are only visible to every worker through a shared cache,
+    without one snapshots are loaded on every request.
+    """
+    def __init__(self):
+        options = getattr(settings, "AUTH_USER_CACHE", {})
+        self.local = LRUCache(
+            options.get("MAX_SIZE", 10000),
+            options.get("TTL", 300)
+        )
+        self.ttl = options.get("TTL", 300)
+        self.shared_alias = options.get("SHARED_CACHE")
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def get(self, guid):
+        guid = str(guid)
+
+        if not permission_cache.enabled():
+            # A deactivation on another worker would go unnoticed
+            metrics.incr("user_cache.miss")
+            return self.load(guid)
+
+        versions = permission_cache.get_versions(guid)
+
+        entry = self.local.get(guid)
+        if entry is not None and entry[0] == versions:
+            metrics.incr("user_cache.hit.local")
+            metrics.incr("auth.db_round_trips_saved")
+            return entry[1]
+
+        key = SNAPSHOT_KEY.format(
+            guid=guid,
+            version=versions[0],
+            user_version=versions[1]
+        )
+        snapshot = self.shared.get(key) if self.shared else None
+
+        if snapshot is not None:
+            metrics.incr("user_cache.hit.shared")
+            metrics.incr("auth.db_round_trips_saved")
+        else:
+            metrics.incr("user_cache.miss")
+            snapshot = self.load(guid)
+
+            if self.shared:
+                self.shared.set(key, snapshot, self.ttl)
+
+        self.local.set(guid, (versions, snapshot))
+        return snapshot
+
+    def load(self, guid):
+        # One row per group, a user without groups gives a single None
+        rows = list(
+            User.objects.filter(guid=guid).values_list(
+                "is_active",
+                "is_superuser",
+                "is_staff",
+                "groups"
+            )
+        )
+
+        if not rows:
+            raise User.DoesNotExist(f"User {guid} does not exist")
+
+        is_active, is_superuser, is_staff, _ = rows[0]
+        return {
+            "is_active": is_active,
+            "is_superuser": is_superuser,
+            "is_staff": is_staff,
+            "group_ids": tuple(row[3] for row in rows if row[3] is not None)
+        }
+
+    def invalidate(self, guid):
+        self.local.pop(str(guid))
+
+    def clear(self):
+        self.local.clear()
+
+
+user_snapshots = UserSnapshotCache()
+
+
+class SomaAfricaJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        metrics.incr("auth.requests")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which snapshots do not carry
+            return super().get_user(validated_token)
+
+        try:
+            guid = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = None
+        if permission_claims_enabled():
+            user = self.get_claims_user(guid, validated_token)
+
+        if user is None:
+            user = self.get_snapshot_user(guid)
+
+        return user
+
+    def get_claims_user(self, guid, validated_token):
+        """
+        Build the user from permission claims without touching the
+        database, or return None when the claims are missing or stale so
+        the user is re-derived
+        """
+        claimed_version = validated_token.get(PERMISSION_VERSION_CLAIM)
+
+        if PERMISSIONS_CLAIM not in validated_token:
+            return None
+
+        # Versions bumped by other workers are not visible without a
+        # shared cache, claims could not be told stale
+        if not permission_cache.enabled():
+            return None
+
+        versions = permission_cache.get_versions(guid)
+        if claimed_version != ".".join(versions):
+            return None
+
+        metrics.incr("auth.db_round_trips_saved")
+        return LazyUser(
+            guid,
+            validated_token.get(SUPERUSER_CLAIM, False),
+            permission_bits.decode_mask(validated_token[PERMISSIONS_CLAIM])
+        )
+
+    def get_snapshot_user(self, guid):
+        try:
+            snapshot = user_snapshots.get(guid)
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot["is_active"]:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        index = permission_bits.get_index(snapshot["group_ids"])
+        return LazyUser(
+            guid,
+            snapshot["is_superuser"],
+            index.user_mask(snapshot["group_ids"]),
+            is_active=snapshot["is_active"],
+            is_staff=snapshot["is_staff"],
+            index=index
+        )
@@ -1,6 +1,8 @@
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+
+from somaafrica.commons.validator import validate_email_return_filters
+from somaafrica.persons.identifiers import known_identifiers
 
 
 User = get_user_model()
@@ -22,8 +24,15 @@ def raw_authenticate(username, password):
     if not username or not password:
         return None
 
+    if not known_identifiers.might_exist(username):
+        raise User.DoesNotExist("User matching query does not exist.")
+
     try:
-        user = User.objects.get(Q(username=username) | Q(email=username))
+        # One lookup on the unique email or username index, with the
+        # groups the response and tokens need
+        user = User.objects.prefetch_related("groups").get(
+            **validate_email_return_filters(username)
+        )
         password_mathches = user.check_password(password)
 
         if password_mathches:
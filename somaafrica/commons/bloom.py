@@ -0,0 +1,53 @@
+import hashlib
+import math
+
+
+class BloomFilter(object):
+    """
+    Fixed size Bloom filter sized for capacity items at error_rate false
+    positives. Membership tests never give false negatives.
+    """
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(
+            -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hash_count = max(
+            1,
+            round(self.size / self.capacity * math.log(2))
+        )
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for number in range(self.hash_count):
+            yield (first + number * second) % self.size
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & 1 << (position & 7)
+            for position in self._positions(item)
+        )
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    @property
+    def estimated_error_rate(self):
+        """
+        False positive rate for the number of items added so far
+        """
+        return (
+            1 - math.exp(-self.hash_count * self.count / self.size)
+        ) ** self.hash_count
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# Backends keeping their entries in one process's memory, or nowhere
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+
+def is_shared(alias="default"):
+    """
+    Whether every worker reads and writes the same entries through a
+    cache alias, which invalidating across processes relies on
+    """
+    if alias in getattr(settings, "SHARED_CACHES", ()):
+        return True
+
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    return backend is not None and backend not in PROCESS_LOCAL_BACKENDS
+
+
+class LRUCache(object):
+    """
+    Thread-safe, size bounded, process-local cache whose entries expire
+    ttl seconds after they were set
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                return default
+
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+
+        return None if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,210 @@
+"""
+Conditional requests answered from updated_at, without serializing.
+
+Validators come from the updated_at of each row a response shows and of
+the rows nested in its representation, read in one grouped query before
+the handler runs. A list joins only the rows of the requested page and
+the row after it, and adds the count the page reports, so its
+validators cost about as much as the page. GET and HEAD requests whose
+If-None-Match or If-Modified-Since still hold get a 304, and writes
+whose If-Match or If-Unmodified-Since no longer hold a 412, detail
+actions that write too when decorated with preconditioned.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+# Request headers that make a write conditional
+WRITE_PRECONDITIONS = (
+    "HTTP_IF_MATCH",
+    "HTTP_IF_UNMODIFIED_SINCE",
+    "HTTP_IF_NONE_MATCH",
+)
+
+
+def _options():
+    options = {
+        "ENABLED": True,
+    }
+    options.update(getattr(settings, "CONDITIONAL_REQUESTS", {}))
+    return options
+
+
+def stamps(queryset, fields):
+    """
+    The pk of each of the queryset's rows with the latest value of each
+    field
+    """
+    return queryset.values_list("pk").annotate(**{
+        f"field_{number}": Max(field) for number, field in enumerate(fields)
+    })
+
+
+def validators(rows, *extra):
+    """
+    The ETag and Last-Modified timestamp of stamps() rows, or (None, None)
+    when there are none. extra values, such as a page's count, are part
+    of the ETag.
+    """
+    rows = sorted(rows, key=lambda row: str(row[0]))
+
+    if not rows:
+        return None, None
+
+    raw = "|".join(
+        [str(value) for value in extra]
+        + [",".join(str(value) for value in row) for row in rows]
+    )
+    etag = quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+    last_modified = max(
+        stamp for row in rows for stamp in row[1:] if stamp
+    )
+
+    return etag, int(last_modified.timestamp())
+
+
+def preconditioned(action):
+    """
+    Checks the preconditions of a ConditionalMixin detail action that
+    writes before running it
+    """
+    @functools.wraps(action)
+    def wrapper(self, request, *args, **kwargs):
+        return self.precondition(
+            functools.partial(action, self), *args, **kwargs
+        )
+
+    return wrapper
+
+
+class ConditionalMixin(object):
+    """
+    ETag and Last-Modified on list and retrieve responses, and the
+    conditional requests they make possible. conditional_fields are the
+    updated_at lookups whose changes show in a representation; changes
+    to relations themselves, clears and deletes included, touch
+    updated_at on both sides.
+    """
+    conditional_fields = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(
+            lambda: self.get_list_validators(queryset),
+            super().list,
+            *args,
+            **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(
+            lambda: self.get_validators(self.get_object_queryset()),
+            super().retrieve,
+            *args,
+            **kwargs
+        )
+
+    def update(self, request, *args, **kwargs):
+        return self.precondition(super().update, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self.precondition(super().destroy, *args, **kwargs)
+
+    def get_object_queryset(self):
+        """
+        The filtered queryset narrowed to the requested object, None for
+        lookups get_object() would answer with a 404
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            return queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def get_conditional_fields(self):
+        """
+        conditional_fields of the relations the response nests, all of
+        them for viewsets without sparse fieldsets
+        """
+        expands = getattr(self, "expands", None)
+        if expands is None:
+            return self.conditional_fields
+
+        return [
+            field for field in self.conditional_fields
+            if "__" not in field or expands(field.split("__")[0])
+        ]
+
+    def get_validators(self, queryset):
+        if queryset is None:
+            return None, None
+
+        return validators(stamps(queryset, self.get_conditional_fields()))
+
+    def get_list_validators(self, queryset):
+        """
+        Validators of the requested page, every row for lists without
+        pagination
+        """
+        page, count = None, None
+        get_page_queryset = getattr(self.paginator, "get_page_queryset", None)
+
+        if get_page_queryset is not None:
+            page, count = get_page_queryset(queryset, self.request)
+
+        if page is not None:
+            # The page is found first, only its rows are joined
+            queryset = queryset.filter(pk__in=page.values("pk"))
+
+        return validators(
+            stamps(queryset, self.get_conditional_fields()), count
+        )
+
+    def conditional(self, get_validators, handler, *args, **kwargs):
+        if not _options()["ENABLED"]:
+            return handler(self.request, *args, **kwargs)
+
+        etag, last_modified = get_validators()
+
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(self.request, *args, **kwargs)
+
+        if etag is not None:
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+
+        return response
+
+    def precondition(self, handler, *args, **kwargs):
+        """
+        Runs a write unless its preconditions fail; unconditional writes
+        cost no extra query
+        """
+        meta = self.request.META
+        if not _options()["ENABLED"] or not any(
+            header in meta for header in WRITE_PRECONDITIONS
+        ):
+            return handler(self.request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(self.get_object_queryset())
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+
+        if response is None:
+            response = handler(self.request, *args, **kwargs)
+
+        return response
@@ -0,0 +1,108 @@
+"""
+Sparse fieldsets and expandable relations for list and detail reads.
+
+``?fields=guid,first_name`` limits the response to the named fields.
+``?expand=user`` nests only the named relations and renders the others
+as primary keys; without it every relation is nested as before. Views
+use wants() and expands() to load only the columns and relations the
+response will serialize.
+"""
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+
+SPARSE_ACTIONS = ("list", "retrieve")
+
+
+def _names(value):
+    if value is None:
+        return None
+
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsetSerializerMixin(object):
+    # Field rendering each relation when it is not expanded
+    collapsed_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        expand = kwargs.pop("expand", None)
+        super().__init__(*args, **kwargs)
+
+        if expand is not None:
+            for name, field in self.collapsed_fields.items():
+                if name not in expand:
+                    self.fields[name] = copy.deepcopy(field)
+
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin(object):
+    """
+    Viewset side of sparse fieldsets, to pair with a serializer using
+    SparseFieldsetSerializerMixin
+    """
+
+    def get_fieldset(self):
+        """
+        Requested (fields, expand) names, None where not limited
+        """
+        if self.action not in SPARSE_ACTIONS:
+            return None, None
+
+        params = self.request.query_params
+        return _names(params.get("fields")), _names(params.get("expand"))
+
+    def wants(self, name):
+        fields, _ = self.get_fieldset()
+        return fields is None or name in fields
+
+    def expands(self, name):
+        _, expand = self.get_fieldset()
+        return self.wants(name) and (expand is None or name in expand)
+
+    def only_requested(self, queryset):
+        fields, _ = self.get_fieldset()
+
+        if fields is None:
+            return queryset
+
+        opts = queryset.model._meta
+        columns = {opts.pk.name}
+
+        for name in fields:
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+
+            if field.concrete and not field.many_to_many:
+                columns.add(name)
+
+        return queryset.only(*columns)
+
+    def prefetch_requested(self, queryset, name, related_queryset):
+        """
+        Prefetch a requested relation, only its keys unless expanded
+        """
+        if not self.wants(name):
+            return queryset
+
+        if not self.expands(name):
+            related_queryset = related_queryset.only("pk")
+
+        return queryset.prefetch_related(
+            Prefetch(name, queryset=related_queryset)
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_fieldset()
+        kwargs.setdefault("fields", fields)
+        kwargs.setdefault("expand", expand)
+
+        return super().get_serializer(*args, **kwargs)
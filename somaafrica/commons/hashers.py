@@ -0,0 +1,60 @@
+"""
+Password hashers whose cost comes from PASSWORD_HASHER_PROFILES.
+
+Algorithm names are Django's own, so existing hashes keep verifying, and
+Django's must_update() compares the stored cost with the profile's so a
+changed cost is picked up by the rehash on the next successful login.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def profile_option(name, default):
+    """
+    Hasher attribute read from the profile options on every access
+    """
+    def getter(self):
+        profile = settings.PASSWORD_HASHER_PROFILES.get(self.profile, {})
+        return profile.get("OPTIONS", {}).get(name, default)
+
+    return property(getter)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    profile = "pbkdf2"
+    iterations = profile_option(
+        "iterations",
+        hashers.PBKDF2PasswordHasher.iterations
+    )
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    profile = "scrypt"
+    work_factor = profile_option(
+        "work_factor",
+        hashers.ScryptPasswordHasher.work_factor
+    )
+    block_size = profile_option(
+        "block_size",
+        hashers.ScryptPasswordHasher.block_size
+    )
+    parallelism = profile_option(
+        "parallelism",
+        hashers.ScryptPasswordHasher.parallelism
+    )
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    profile = "argon2"
+    time_cost = profile_option(
+        "time_cost",
+        hashers.Argon2PasswordHasher.time_cost
+    )
+    memory_cost = profile_option(
+        "memory_cost",
+        hashers.Argon2PasswordHasher.memory_cost
+    )
+    parallelism = profile_option(
+        "parallelism",
+        hashers.Argon2PasswordHasher.parallelism
+    )
@@ -0,0 +1,173 @@
+"""
+Password hashing offloaded to a bounded process pool.
+
+PBKDF2 and friends hold the GIL for the whole computation, so they run in
+worker processes instead of request threads. Admission is bounded by the
+pool size plus PASSWORD_HASHING_POOL["QUEUE_DEPTH"], requests beyond that
+fail fast with a 503 and Retry-After instead of queueing without limit.
+A pool broken by a dying worker is replaced and the call retried once.
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import exceptions, status
+
+from somaafrica.commons import metrics
+
+
+LOGGER = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_POOL = {}
+
+# Workers are not forked from the web process, whose request and timer
+# threads may hold locks a forked child would inherit held
+START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+
+class HashingPoolFull(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Server is busy, please retry shortly."
+    default_code = "hashing_pool_full"
+
+    def __init__(self, wait, detail=None, code=None):
+        # DRF's exception handler turns wait into a Retry-After header
+        self.wait = wait
+        super().__init__(detail, code)
+
+
+def _options():
+    options = {"WORKERS": 0, "QUEUE_DEPTH": 16, "RETRY_AFTER": 1}
+    options.update(getattr(settings, "PASSWORD_HASHING_POOL", {}))
+    return options
+
+
+def _setup_worker():  # pragma: no cover
+    # Workers start in a fresh interpreter, without Django configured
+    import django
+    django.setup()
+
+
+def _get_pool():
+    with _LOCK:
+        if not _POOL:
+            options = _options()
+            _POOL["executor"] = ProcessPoolExecutor(
+                max_workers=options["WORKERS"],
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_setup_worker
+            )
+            _POOL["slots"] = threading.BoundedSemaphore(
+                options["WORKERS"] + options["QUEUE_DEPTH"]
+            )
+
+        return _POOL["executor"], _POOL["slots"]
+
+
+def shutdown():
+    with _LOCK:
+        executor = _POOL.pop("executor", None)
+        _POOL.clear()
+
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown)
+
+
+def _discard(executor):
+    """
+    Drop a broken executor so the next call starts a new pool, unless
+    another thread replaced it already
+    """
+    with _LOCK:
+        if _POOL.get("executor") is not executor:
+            return
+        _POOL.clear()
+
+    metrics.incr("hashing_pool.restarted")
+    LOGGER.error("Password hashing pool is broken, starting a new one")
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run(func, *args):
+    """
+    Run func(*args) in the hashing pool, or inline when it is disabled
+    """
+    options = _options()
+
+    if not options["WORKERS"]:
+        return func(*args)
+
+    try:
+        return _submit(options, func, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM kill, segfault), not because of this call
+        return _submit(options, func, *args)
+
+
+def _submit(options, func, *args):
+    executor, slots = _get_pool()
+
+    if not slots.acquire(blocking=False):
+        metrics.incr("hashing_pool.rejected")
+        LOGGER.warning("Password hashing pool is full, rejecting request")
+        raise HashingPoolFull(wait=options["RETRY_AFTER"])
+
+    metrics.incr("hashing_pool.submitted")
+    try:
+        future = executor.submit(func, *args)
+    except BrokenProcessPool:
+        slots.release()
+        _discard(executor)
+        raise
+    except Exception:
+        slots.release()
+        raise
+
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        _discard(executor)
+        raise
+
+
+def _verify(password, encoded):
+    upgrade = []
+    is_correct = hashers.check_password(
+        password,
+        encoded,
+        setter=upgrade.append
+    )
+    return is_correct, bool(upgrade)
+
+
+def make_password(password):
+    return run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """
+    Same contract as django.contrib.auth.hashers.check_password, with the
+    hash verified in the pool and setter called back in this process
+    """
+    is_correct, must_update = run(_verify, password, encoded)
+
+    if setter and is_correct and must_update:
+        setter(password)
+
+    return is_correct
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = (
+        "Report p50/p99 password verification latency and logins/sec per "
+        "core for each password hasher profile"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--profile",
+            action="append",
+            dest="profiles",
+            help="Profile to benchmark, repeat for several (default: all)"
+        )
+
+    def handle(self, *args, **options):
+        profiles = options["profiles"] or list(
+            settings.PASSWORD_HASHER_PROFILES
+        )
+
+        self.stdout.write(
+            f"{'profile':<10} {'p50 ms':>10} {'p99 ms':>10} "
+            f"{'logins/s/core':>14}"
+        )
+        for name in profiles:
+            if name not in settings.PASSWORD_HASHER_PROFILES:
+                raise CommandError(f"Unknown password hasher profile {name}")
+
+            timings = self.time_profile(name, options["iterations"])
+            self.stdout.write(
+                f"{name:<10} {self.percentile(timings, 50) * 1e3:>10.2f} "
+                f"{self.percentile(timings, 99) * 1e3:>10.2f} "
+                f"{1 / statistics.mean(timings):>14.1f}"
+            )
+
+    def time_profile(self, name, iterations):
+        hasher = import_string(
+            settings.PASSWORD_HASHER_PROFILES[name]["HASHER"]
+        )()
+        encoded = hasher.encode("bench-password", hasher.salt())
+        timings = []
+
+        # Verification is the work a successful login pays for
+        for _ in range(iterations):
+            start = time.perf_counter()
+            hasher.verify("bench-password", encoded)
+            timings.append(time.perf_counter() - start)
+
+        return timings
+
+    @staticmethod
+    def percentile(timings, percent):
+        ordered = sorted(timings)
+        index = round(percent / 100 * (len(ordered) - 1))
+        return ordered[index]
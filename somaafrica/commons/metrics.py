@@ -0,0 +1,45 @@
+import threading
+
+from collections import Counter
+
+
+_LOCK = threading.Lock()
+_COUNTERS = Counter()
+_GAUGES = {}
+
+
+def incr(name, value=1):
+    """
+    Increment a process-local counter
+    """
+    with _LOCK:
+        _COUNTERS[name] += value
+
+
+def gauge(name, value):
+    """
+    Set a process-local gauge to its current value
+    """
+    with _LOCK:
+        _GAUGES[name] = value
+
+
+def snapshot(prefix=""):
+    """
+    Return a copy of the counters and gauges, optionally limited to a name
+    prefix
+    """
+    with _LOCK:
+        return {
+            name: value
+            for values in (_COUNTERS, _GAUGES)
+            for name, value in values.items()
+            if name.startswith(prefix)
+        }
+
+
+def reset(prefix=""):
+    with _LOCK:
+        for values in (_COUNTERS, _GAUGES):
+            for name in [name for name in values if name.startswith(prefix)]:
+                del values[name]
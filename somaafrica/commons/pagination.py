@@ -0,0 +1,335 @@
+"""
+Pagination for large tables.
+
+Offset pages count rows cheaply: unfiltered tables above a threshold
+report the planner's row estimate, and large filtered counts are cached
+for a while. Responses say whether their count is exact, and clients
+may ask for an exact one. Whether there is a next page is decided by
+fetching the row after the page, never by an inexact count.
+
+Keyset pages seek past the (created_at, guid) of the last row seen
+instead of counting past an offset, so deep pages cost as much as the
+first one given the matching composite index. Positions travel in
+opaque cursors.
+"""
+import base64
+import binascii
+import datetime
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+COUNT_KEY = "pagination:count:{digest}"
+
+
+def _options():
+    options = {
+        "ENABLED": True,
+        "THRESHOLD": 100000,
+        "CACHE_TIMEOUT": 60,
+    }
+    options.update(getattr(settings, "APPROXIMATE_COUNT", {}))
+    return options
+
+
+def estimated_rows(queryset):
+    """
+    The planner's row estimate for the queryset's table, None where the
+    database keeps none
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:  # pragma: no cover
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(queryset.model._meta.db_table)]
+        )
+        row = cursor.fetchone()
+
+    # -1 until the table is first vacuumed or analyzed
+    if row is None or row[0] < 0:  # pragma: no cover
+        return None
+
+    return row[0]  # pragma: no cover
+
+
+class ApproximateCountPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination with approximate counts, exact ones for
+    requests with exact_count=true
+    """
+    exact_count_query_param = "exact_count"
+    count_exact = True
+    page_count = None
+
+    def exact_count_requested(self):
+        value = self.request.query_params.get(self.exact_count_query_param)
+        return value in ("1", "true", "True")
+
+    def get_count(self, queryset):
+        if self.page_count is not None:
+            # Counted already for the validators of the same page
+            return self.page_count
+
+        options = _options()
+        self.count_exact = True
+
+        if not options["ENABLED"] or self.exact_count_requested():
+            return super().get_count(queryset)
+
+        if not queryset.query.where and not queryset.query.distinct:
+            estimate = estimated_rows(queryset)
+            if estimate is not None and estimate >= options["THRESHOLD"]:
+                self.count_exact = False
+                return estimate
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        digest = hashlib.sha256(repr((sql, params)).encode()).hexdigest()
+        key = COUNT_KEY.format(digest=digest)
+
+        count = cache.get(key)
+        if count is not None:
+            self.count_exact = False
+            return count
+
+        count = super().get_count(queryset)
+        if count >= options["THRESHOLD"]:
+            cache.set(key, count, options["CACHE_TIMEOUT"])
+
+        return count
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = self.get_count(queryset)
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+
+        offset = self.offset + self.limit
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        The rows of the requested page and the row after it, with the
+        count the page reports, (None, None) for requests without a limit.
+        The count is kept for paginating the same queryset.
+        """
+        limit = self.get_limit(request)
+        if limit is None:
+            return None, None
+
+        self.request = request
+        offset = self.get_offset(request)
+        self.page_count = self.get_count(queryset)
+
+        return queryset[offset:offset + limit + 1], self.page_count
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.count,
+            "count_exact": self.count_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+
+class KeysetPagination(ApproximateCountPagination):
+    """
+    Offset pagination, or keyset pagination for requests asking for it
+    with a cursor or page_size parameter. Keyset pages are always in
+    (created_at, guid) order.
+    """
+    ordering = ("created_at", "guid")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor"
+    keyset = False
+
+    def keyset_requested(self, request):
+        params = request.query_params
+        return (
+            self.cursor_query_param in params
+            or self.page_size_query_param in params
+        )
+
+    def get_limit(self, request):
+        # Offset limits do not apply to keyset pages
+        if self.keyset_requested(request):
+            return None
+
+        return super().get_limit(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.keyset_requested(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        rows = list(self.seek(queryset, position, reverse)[:page_size + 1])
+        more = len(rows) > page_size
+        page = rows[:page_size]
+
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = position is not None, more
+        else:
+            self.has_next, self.has_previous = more, position is not None
+
+        self.first = self.key(page[0]) if page else position
+        self.last = self.key(page[-1]) if page else position
+
+        return page
+
+    def seek(self, queryset, position, reverse):
+        """
+        The queryset in keyset order, past position when there is one
+        """
+        created_at, guid = self.ordering
+        if reverse:
+            queryset = queryset.order_by(f"-{created_at}", f"-{guid}")
+            after = "lt"
+        else:
+            queryset = queryset.order_by(created_at, guid)
+            after = "gt"
+
+        if position is None:
+            return queryset
+
+        # Row value comparison the index can range scan
+        return queryset.filter(
+            Q(**{f"{created_at}__{after}e": position[0]})
+            & (
+                Q(**{f"{created_at}__{after}": position[0]})
+                | Q(**{f"{guid}__{after}": position[1]})
+            )
+        )
+
+    def get_page_queryset(self, queryset, request):
+        if not self.keyset_requested(request):
+            return super().get_page_queryset(queryset, request)
+
+        position, reverse = self.decode_cursor(request)
+        page_size = self.get_page_size(request)
+
+        return self.seek(queryset, position, reverse)[:page_size + 1], None
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def key(self, row):
+        # values() rows or model instances
+        if isinstance(row, dict):
+            return tuple(row[name] for name in self.ordering)
+
+        return tuple(getattr(row, name) for name in self.ordering)
+
+    def encode_cursor(self, position, reverse):
+        created_at, guid = position
+        raw = f"{created_at.isoformat()}|{guid}|{int(reverse)}"
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            cursor
+        )
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, guid, reverse = raw.split("|")
+            position = (
+                datetime.datetime.fromisoformat(created_at),
+                uuid.UUID(guid)
+            )
+            return position, bool(int(reverse))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+
+class CreatedAtCursorPagination(KeysetPagination):
+    """
+    Keyset pagination only, for collections too large to count or offset
+    into
+    """
+
+    def keyset_requested(self, request):
+        return True
@@ -0,0 +1,32 @@
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+
+from .renderers import ORJSONRenderer
+
+
+class ORJSONParser(parsers.JSONParser):
+    """
+    JSONParser decoding request bodies with orjson.
+
+    Bodies orjson rejects, malformed ones or those with integers wider
+    than 64 bits, are parsed again by JSONParser for its result or error.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read()
+
+        try:
+            if encoding.lower() in ("utf-8", "utf8"):
+                return orjson.loads(body)
+
+            return orjson.loads(body.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context
+            )
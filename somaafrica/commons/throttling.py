@@ -0,0 +1,115 @@
+"""
+Token bucket throttles that shed credential stuffing before any password
+hashing or user lookup happens.
+
+Buckets live in the Django cache named by LOGIN_THROTTLE["CACHE"], a
+local-memory cache keeps them per worker while a shared one applies the
+limits across all workers. A bucket is updated under a cache.add lock so
+concurrent requests can't both spend the same token.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from somaafrica.commons import metrics
+
+
+BUCKET_KEY = "throttle:{scope}:{ident}"
+
+# Seconds a bucket lock is held at most, should its holder die
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 5
+LOCK_WAIT = 0.01
+
+
+def consume(cache, key, capacity, refill_rate, cost=1):
+    """
+    Take cost tokens from the bucket at key, returning (allowed, wait)
+    where wait is the seconds until enough tokens are available
+    """
+    lock_key = f"{key}:lock"
+
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        # Still contended by concurrent requests on the same bucket
+        return False, LOCK_TIMEOUT
+
+    try:
+        now = time.time()
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * refill_rate)
+        allowed = tokens >= cost
+
+        if allowed:
+            tokens -= cost
+
+        cache.set(key, (tokens, now), int(capacity / refill_rate) + 1)
+    finally:
+        cache.delete(lock_key)
+
+    return allowed, 0 if allowed else (cost - tokens) / refill_rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def get_bucket_ident(self, request):
+        raise NotImplementedError(".get_bucket_ident() must be overridden")
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        ident = self.get_bucket_ident(request)
+
+        if ident is None:
+            return True
+
+        options = getattr(settings, "LOGIN_THROTTLE", {})
+        bucket = options.get("BUCKETS", {}).get(self.scope)
+
+        if bucket is None:
+            return True
+
+        allowed, self.wait_seconds = consume(
+            caches[options.get("CACHE", "default")],
+            BUCKET_KEY.format(scope=self.scope, ident=ident),
+            bucket["CAPACITY"],
+            bucket["REFILL_RATE"]
+        )
+        metrics.incr(
+            f"throttle.{self.scope}.{'allowed' if allowed else 'rejected'}"
+        )
+
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = "ip"
+
+    def get_bucket_ident(self, request):
+        if api_settings.NUM_PROXIES is None:
+            # X-Forwarded-For is client supplied unless the proxies in
+            # front of us are known
+            return request.META.get("REMOTE_ADDR")
+
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    scope = "username"
+
+    def get_bucket_ident(self, request):
+        username = request.data.get("username")
+
+        if not username:
+            return None
+
+        return str(username).strip().lower()
@@ -0,0 +1,300 @@
+"""
+Read-only serializers building list responses from values() rows.
+
+A ValuesSerializer compiles the fields of a ModelSerializer into column
+converters once, then represents rows fetched with values() without
+building model instances or running serializer fields per row. Its
+output matches the ModelSerializer's. Fields that are not columns of
+the model are filled by a load_<field>(rows) method returning one value
+per row.
+
+List pages with a limit above STREAMING_LIST["THRESHOLD"] are streamed:
+rows are read through a server-side cursor and rendered chunk by chunk
+into the same JSON a buffered response would hold.
+"""
+import itertools
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.relations import RelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# Largest number of keys looked up in one query
+BATCH_SIZE = 1000
+
+# Fields representing database values as they are
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+def _options():
+    options = {
+        "ENABLED": True,
+        "THRESHOLD": 1000,
+        "CHUNK_SIZE": 2000,
+    }
+    options.update(getattr(settings, "STREAMING_LIST", {}))
+    return options
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    # Resolved once rather than per value as the field does
+    field_timezone = getattr(field, "timezone", field.default_timezone())
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not timezone.is_aware(value):
+            return field.to_representation(value)
+
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _converter(field):
+    if isinstance(field, RelatedField):
+        # values() yields the primary key a related field would render
+        if field.pk_field is None:
+            return None
+
+        return field.pk_field.to_representation
+
+    if isinstance(field, IDENTITY_FIELDS):
+        return None
+
+    if (
+        isinstance(field, serializers.UUIDField)
+        and field.uuid_format == "hex_verbose"
+    ):
+        return str
+
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+
+    return field.to_representation
+
+
+def fetch(queryset, lookup, keys, *columns, **expressions):
+    """
+    values() rows of queryset whose lookup is one of keys, fetched in
+    batches
+    """
+    keys = list(keys)
+
+    for start in range(0, len(keys), BATCH_SIZE):
+        batch = keys[start:start + BATCH_SIZE]
+        # Filtered before values() so expressions reuse the lookup's joins
+        yield from queryset.filter(**{f"{lookup}__in": batch}).values(
+            *columns, **expressions
+        )
+
+
+class ValuesSerializer(object):
+    serializer_class = None
+
+    def __init__(self):
+        serializer = self.serializer_class()
+        opts = serializer.Meta.model._meta
+
+        self.pk = opts.pk.name
+        self.columns = [self.pk]
+        self.fields = []
+        self.loaders = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            column = self.is_column(opts, field.source)
+            if column and field.source != self.pk:
+                # Also kept for loaders following a foreign key
+                self.columns.append(field.source)
+
+            loader = getattr(self, f"load_{name}", None)
+            if loader is not None:
+                self.fields.append((name, None, None))
+                self.loaders.append((name, loader))
+            elif column:
+                self.fields.append((name, field.source, _converter(field)))
+            else:
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} needs a load_{name}() method, "
+                    f"{field.source} is not a column of {opts.label}"
+                )
+
+    @staticmethod
+    def is_column(opts, source):
+        try:
+            field = opts.get_field(source)
+        except FieldDoesNotExist:
+            return False
+
+        return field.concrete and not field.many_to_many
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def to_representation(self, rows):
+        loaded = {name: loader(rows) for name, loader in self.loaders}
+        data = []
+
+        for index, row in enumerate(rows):
+            item = {}
+
+            for name, column, convert in self.fields:
+                if column is None:
+                    item[name] = loaded[name][index]
+                    continue
+
+                value = row[column]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+
+            data.append(item)
+
+        return data
+
+    def serialize(self, queryset):
+        return self.to_representation(list(self.values(queryset)))
+
+    def related_rows(self, rows, queryset, owner, *columns):
+        """
+        For each row, the values() rows of queryset whose owner lookup
+        points back at it
+        """
+        keys = [row[self.pk] for row in rows]
+        related = {key: [] for key in keys}
+        related_rows = fetch(
+            queryset, owner, related, *columns, values_owner=F(owner)
+        )
+
+        for related_row in related_rows:
+            related[related_row["values_owner"]].append(related_row)
+
+        return [related[key] for key in keys]
+
+    def related_objects(self, rows, column, serializer, queryset):
+        """
+        For each row, the representation of the object its foreign key
+        column points at, None when it is unset
+        """
+        keys = {row[column] for row in rows if row[column] is not None}
+        related_rows = list(
+            fetch(queryset, serializer.pk, keys, *serializer.columns)
+        )
+        related = dict(zip(
+            [related_row[serializer.pk] for related_row in related_rows],
+            serializer.to_representation(related_rows)
+        ))
+
+        return [related.get(row[column]) for row in rows]
+
+
+class ValuesListMixin(object):
+    """
+    Serves the list action through values_serializer_class, unless a
+    sparse fieldset needs the regular serializer
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        if "fields" in params or "expand" in params:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class()
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        if self.should_stream():
+            return self.stream_list(serializer, rows)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+
+        return Response(serializer.to_representation(list(rows)))
+
+    def should_stream(self):
+        options = _options()
+        renderer = self.request.accepted_renderer
+
+        if (
+            not options["ENABLED"]
+            or not isinstance(self.paginator, LimitOffsetPagination)
+            or not isinstance(renderer, JSONRenderer)
+            or renderer.get_indent(self.request.accepted_media_type, {})
+        ):
+            return False
+
+        limit = self.paginator.get_limit(self.request)
+        return limit is not None and limit > options["THRESHOLD"]
+
+    def stream_list(self, serializer, rows):
+        """
+        The page LimitOffsetPagination would return, streamed
+        """
+        paginator = self.paginator
+        paginator.request = self.request
+        paginator.limit = paginator.get_limit(self.request)
+        paginator.offset = paginator.get_offset(self.request)
+        paginator.count = paginator.get_count(rows)
+
+        # Counts of ApproximateCountPagination may be estimates, so the row
+        # after the page decides whether there is a next one
+        end = paginator.offset + paginator.limit
+        if getattr(paginator, "count_exact", True):
+            paginator.has_next = end < paginator.count
+        else:
+            paginator.has_next = rows[end:end + 1].exists()
+
+        renderer = self.request.accepted_renderer
+        envelope = renderer.render(paginator.get_paginated_response([]).data)
+        # Results come last, split around their empty list
+        prefix, _, suffix = envelope.rpartition(b"[]")
+
+        page = rows[paginator.offset:end]
+        return StreamingHttpResponse(
+            self.stream_rows(serializer, page, renderer, prefix, suffix),
+            content_type=renderer.media_type
+        )
+
+    @staticmethod
+    def stream_rows(serializer, rows, renderer, prefix, suffix):
+        chunk_size = _options()["CHUNK_SIZE"]
+        rows = rows.iterator(chunk_size=chunk_size)
+        separator = b""
+
+        yield prefix + b"["
+
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            body = renderer.render(serializer.to_representation(chunk))
+            yield separator + body[1:-1]
+            separator = b","
+
+        yield b"]" + suffix
@@ -1,3 +1,4 @@
+import importlib.util
 import logging
 import logging.config
 import os
@@ -5,6 +6,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.conf import global_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -95,6 +98,76 @@ if os.getenv('GITHUB_WORKFLOW'):
            'PORT': '5432',
         }
     }
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Point this at a shared backend (e.g. Redis) in production so that cached
+# permissions are shared and invalidated across all workers. Caching that
+# relies on cross-worker invalidation (permissions and their JWT claims,
+# user snapshots) stays off while the default cache is process-local,
+# unless its alias is listed in SHARED_CACHES.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "somaafrica",
+    }
+}
+
+SHARED_CACHES = []
+
+# Seconds a user's effective permission set stays cached
+PERMISSION_CACHE_TIMEOUT = 60 * 60
+
+# Per-process cache of the users behind JWTs, off unless the default cache
+# is shared. SHARED_CACHE optionally names an alias in CACHES used as a
+# second tier shared by all workers.
+AUTH_USER_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 300,
+    "SHARED_CACHE": None,
+}
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+# PASSWORD_HASHER_PROFILE picks the algorithm and cost used for new hashes,
+# the other profiles stay installed so existing hashes still verify and are
+# upgraded on the next successful login. Django's default hashers the
+# profiles don't replace follow them, so legacy hashes (pbkdf2_sha1,
+# bcrypt_sha256) are upgraded the same way.
+
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": {
+        "HASHER": "somaafrica.commons.hashers.PBKDF2PasswordHasher",
+        "OPTIONS": {"iterations": 600000},
+    },
+    "scrypt": {
+        "HASHER": "somaafrica.commons.hashers.ScryptPasswordHasher",
+        "OPTIONS": {"work_factor": 2 ** 14, "block_size": 8, "parallelism": 1},
+    },
+}
+
+if importlib.util.find_spec("argon2"):  # pragma: no cover
+    PASSWORD_HASHER_PROFILES["argon2"] = {
+        "HASHER": "somaafrica.commons.hashers.Argon2PasswordHasher",
+        "OPTIONS": {"time_cost": 2, "memory_cost": 102400, "parallelism": 8},
+    }
+
+PASSWORD_HASHER_PROFILE = os.getenv("SOMAAFRICA_HASHER_PROFILE", "pbkdf2")
+
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]["HASHER"]
+] + [
+    profile["HASHER"]
+    for name, profile in PASSWORD_HASHER_PROFILES.items()
+    if name != PASSWORD_HASHER_PROFILE
+]
+PASSWORD_HASHERS += [
+    hasher for hasher in global_settings.PASSWORD_HASHERS
+    if hasher.rsplit(".", 1)[-1] not in {
+        profile["HASHER"].rsplit(".", 1)[-1]
+        for profile in PASSWORD_HASHER_PROFILES.values()
+    }
+]
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -114,6 +187,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs in a pool of WORKERS processes (0 hashes inline)
+# per web worker process, so keep it small next to the web workers' count.
+# At most WORKERS + QUEUE_DEPTH hashes are admitted at once, the rest get a
+# 503 with a Retry-After of RETRY_AFTER seconds.
+PASSWORD_HASHING_POOL = {
+    "WORKERS": 2,
+    "QUEUE_DEPTH": 16,
+    "RETRY_AFTER": 1,
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -163,8 +246,60 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        'somaafrica.commons.authentication.SomaAfricaJWTAuthentication',
+    ],
+    # orjson backed JSON in the format of DRF's own
+    'DEFAULT_RENDERER_CLASSES': [
+        'somaafrica.commons.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'somaafrica.commons.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Token buckets shedding credential stuffing on login and change_password
+# before any password hashing or user lookup. REFILL_RATE is tokens/second.
+# The ip bucket keys on REMOTE_ADDR unless REST_FRAMEWORK["NUM_PROXIES"]
+# says how many proxies in front of us append to X-Forwarded-For.
+LOGIN_THROTTLE = {
+    "CACHE": "default",
+    "BUCKETS": {
+        "ip": {"CAPACITY": 30, "REFILL_RATE": 0.5},
+        "username": {"CAPACITY": 10, "REFILL_RATE": 0.1},
+    },
+}
+
+# Bloom filter of usernames and emails rejecting logins for unknown
+# identifiers without a query. Rebuilt in the background every
+# REBUILD_INTERVAL seconds. Every identifier passes unless the default
+# cache is shared, as users saved by other workers are only found there.
+IDENTIFIER_FILTER = {
+    "ENABLED": True,
+    "CAPACITY": 1000000,
+    "ERROR_RATE": 0.01,
+    "REBUILD_INTERVAL": 15 * 60,
+}
+
+# Refresh token blacklist checks answered from memory and a Bloom filter
+# of blacklisted jtis, rebuilt every REBUILD_INTERVAL seconds. MAX_SIZE
+# bounds the blacklisted jtis kept in memory per worker. Unless the default
+# cache is shared, jtis the filter doesn't hold are still queried.
+JTI_BLACKLIST = {
+    "ENABLED": True,
+    "CAPACITY": 100000,
+    "ERROR_RATE": 0.01,
+    "REBUILD_INTERVAL": 15 * 60,
+    "MAX_SIZE": 10000,
+}
+
+# Expired token_blacklist rows are deleted BATCH_SIZE at a time, pausing
+# PAUSE seconds between batches. See the purge_tokens command.
+TOKEN_PURGE = {
+    "BATCH_SIZE": 1000,
+    "PAUSE": 0.5,
 }
 
 SIMPLE_JWT = {
@@ -180,6 +315,59 @@ SIMPLE_JWT = {
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZATION"
 }
 
+# Asymmetric JWT signing. KEY_DIR holds <kid>.pem RSA (RS256) or Ed25519
+# (EdDSA) keys, CURRENT names the private key signing new tokens. Public
+# keys are served at /.well-known/jwks.json. Without a KEY_DIR, tokens
+# are signed with HS256 and the SECRET_KEY.
+JWT_SIGNING_KEYS = {
+    "KEY_DIR": os.getenv("SOMAAFRICA_JWT_KEY_DIR", ""),
+    "CURRENT": os.getenv("SOMAAFRICA_JWT_KEY_ID", ""),
+}
+
+# Most access tokens validated by one token/introspect request
+TOKEN_INTROSPECTION_MAX_TOKENS = 100
+
+# List pages with a limit above THRESHOLD rows are streamed, reading and
+# rendering CHUNK_SIZE rows at a time
+STREAMING_LIST = {
+    "ENABLED": True,
+    "THRESHOLD": 1000,
+    "CHUNK_SIZE": 2000,
+}
+
+# Paginated lists of unfiltered tables over THRESHOLD rows report the
+# planner's row estimate as their count, and filtered counts that large
+# are cached for CACHE_TIMEOUT seconds. ?exact_count=true counts anyway.
+APPROXIMATE_COUNT = {
+    "ENABLED": True,
+    "THRESHOLD": 100000,
+    "CACHE_TIMEOUT": 60,
+}
+
+# List and detail responses carry an ETag and Last-Modified derived from
+# updated_at, and conditional requests against them get 304 or 412. A
+# list's validators cover the rows of the requested page only.
+CONDITIONAL_REQUESTS = {
+    "ENABLED": True,
+}
+
+# Seconds during which a just-rotated refresh token still gets the pair it
+# was rotated to, instead of failing as blacklisted. 0 disables.
+REFRESH_TOKEN_GRACE_PERIOD = 10
+
+# API logins only issue JWTs: no session is created and last_login is
+# written in batches, every FLUSH_INTERVAL seconds or MAX_PENDING logins.
+JWT_ONLY_LOGIN = True
+
+LAST_LOGIN_BATCH = {
+    "FLUSH_INTERVAL": 30,
+    "MAX_PENDING": 500,
+}
+
+# Embed permission claims in JWTs so requests are authorized without
+# loading the user, tokens with a stale permission version are re-derived
+JWT_PERMISSION_CLAIMS = False
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:4200",
 ]
@@ -17,7 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
-from somaafrica.persons.views import HealthCheckAPIView
+from somaafrica.persons.views import HealthCheckAPIView, MetricsAPIView
+from somaafrica.persons.views import JWKSAPIView, TokenIntrospectionAPIView
 from somaafrica.persons.views import (
     SignupAPIView,
     LoginAPIView,
@@ -44,6 +45,8 @@ urlpatterns = [
         name="reset_password"
     ),
     path("api/health", HealthCheckAPIView.as_view(), name="health_check"),
+    path("api/metrics", MetricsAPIView.as_view(), name="metrics"),
+    path(".well-known/jwks.json", JWKSAPIView.as_view(), name="jwks"),
     # path(
     #     "social/<str:backend>/",
     #     SocialLoginAPIView.as_view(),
@@ -51,5 +54,10 @@ urlpatterns = [
     # ),
     path("token", LoginAPIView.as_view(), name="token_obtain_pair"),
     path("token/refresh", TokenRefreshView.as_view(), name="token_refresh"),
+    path(
+        "token/introspect",
+        TokenIntrospectionAPIView.as_view(),
+        name="token_introspect"
+    ),
     path("persons/", include("somaafrica.persons.urls")),
 ]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PersonsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "somaafrica.persons"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import signing_keys
+
+        signing_keys.install()
@@ -0,0 +1,152 @@
+"""
+Negative lookup filter for login identifiers.
+
+A Bloom filter of every normalized username and email lets logins for
+identifiers that cannot exist be rejected without a query. Each worker
+builds its filter on start and rebuilds it in a background thread every
+REBUILD_INTERVAL seconds. Users saved meanwhile are added to the local
+filter and recorded in the shared cache, so other workers still find
+them until their next rebuild. Without a shared cache other workers
+could never see them, so every identifier passes.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from somaafrica.commons import metrics
+from somaafrica.commons.bloom import BloomFilter
+from somaafrica.commons.cache import is_shared
+
+from .models import User
+
+
+LOGGER = logging.getLogger(__name__)
+
+RECENT_KEY = "persons:identifiers:recent:{identifier}"
+
+
+def normalize(identifier):
+    return str(identifier).strip().lower()
+
+
+def _options():
+    options = {
+        "ENABLED": True,
+        "CAPACITY": 1000000,
+        "ERROR_RATE": 0.01,
+        "REBUILD_INTERVAL": 15 * 60,
+    }
+    options.update(getattr(settings, "IDENTIFIER_FILTER", {}))
+    return options
+
+
+class KnownIdentifiers(object):
+    def __init__(self):
+        self.bloom = None
+        self.built_at = 0
+        self._rebuilding = threading.Lock()
+
+    def rebuild(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        self._build()
+
+    def rebuild_in_background(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        threading.Thread(
+            target=self._build_in_background, daemon=True
+        ).start()
+
+    def _build_in_background(self):
+        try:
+            self._build()
+        except Exception as e:
+            LOGGER.exception(e)
+        finally:
+            connections.close_all()
+
+    def _build(self):
+        """
+        Build a new filter, with the rebuilding lock already held
+        """
+        try:
+            options = _options()
+            bloom = BloomFilter(options["CAPACITY"], options["ERROR_RATE"])
+            rows = User.objects.values_list("username", "email").iterator()
+
+            for username, email in rows:
+                for identifier in (username, email):
+                    if identifier:
+                        bloom.add(normalize(identifier))
+
+            self.bloom = bloom
+            self.built_at = time.monotonic()
+            self.report()
+        finally:
+            self._rebuilding.release()
+
+    def report(self):
+        metrics.gauge("identifier_filter.items", self.bloom.count)
+        metrics.gauge(
+            "identifier_filter.memory_bytes", self.bloom.memory_bytes
+        )
+        metrics.gauge(
+            "identifier_filter.estimated_error_rate",
+            round(self.bloom.estimated_error_rate, 6)
+        )
+
+    def add(self, *identifiers):
+        options = _options()
+
+        for identifier in identifiers:
+            if not identifier:
+                continue
+
+            identifier = normalize(identifier)
+            cache.set(
+                RECENT_KEY.format(identifier=identifier),
+                True,
+                options["REBUILD_INTERVAL"] * 2
+            )
+
+            if self.bloom is not None:
+                self.bloom.add(identifier)
+
+    def might_exist(self, identifier):
+        """
+        False only when no user can have this username or email
+        """
+        options = _options()
+
+        if not options["ENABLED"] or not is_shared():
+            return True
+
+        age = time.monotonic() - self.built_at
+        if self.bloom is None or age > options["REBUILD_INTERVAL"]:
+            self.rebuild_in_background()
+
+        if self.bloom is None:
+            # First build still running
+            return True
+
+        identifier = normalize(identifier)
+        if identifier in self.bloom:
+            metrics.incr("identifier_filter.passed")
+            return True
+
+        if cache.get(RECENT_KEY.format(identifier=identifier)):
+            metrics.incr("identifier_filter.passed")
+            return True
+
+        metrics.incr("identifier_filter.rejected")
+        return False
+
+
+known_identifiers = KnownIdentifiers()
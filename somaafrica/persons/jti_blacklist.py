@@ -0,0 +1,149 @@
+"""
+Process-local view of the refresh token blacklist.
+
+Every refresh and logout checks whether the token's jti is blacklisted.
+Blacklisted jtis are kept in memory until their token expires, and a
+Bloom filter of the unexpired blacklisted jtis answers "not blacklisted"
+without a query. Blacklisting still writes the BlacklistedToken row;
+the jti is then also recorded in the shared cache so workers whose
+filter predates it still find it until their next rebuild, which runs
+in a background thread. Without a shared cache they could not, so the
+filter's negatives are not trusted and the check falls back to a query.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from somaafrica.commons import metrics
+from somaafrica.commons.bloom import BloomFilter
+from somaafrica.commons.cache import LRUCache, is_shared
+
+
+LOGGER = logging.getLogger(__name__)
+
+RECENT_KEY = "persons:jti_blacklist:{jti}"
+
+
+def _options():
+    options = {
+        "ENABLED": True,
+        "CAPACITY": 100000,
+        "ERROR_RATE": 0.01,
+        "REBUILD_INTERVAL": 15 * 60,
+        "MAX_SIZE": 10000,
+    }
+    options.update(getattr(settings, "JTI_BLACKLIST", {}))
+    return options
+
+
+class JtiBlacklist(object):
+    def __init__(self):
+        self.bloom = None
+        self.built_at = 0
+        self.local = LRUCache(_options()["MAX_SIZE"], 0)
+        self._rebuilding = threading.Lock()
+
+    def rebuild(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        self._build()
+
+    def rebuild_in_background(self):
+        if not self._rebuilding.acquire(blocking=False):
+            return
+
+        threading.Thread(
+            target=self._build_in_background, daemon=True
+        ).start()
+
+    def _build_in_background(self):
+        try:
+            self._build()
+        except Exception as e:
+            LOGGER.exception(e)
+        finally:
+            connections.close_all()
+
+    def _build(self):
+        """
+        Build a new filter, with the rebuilding lock already held
+        """
+        try:
+            options = _options()
+            bloom = BloomFilter(options["CAPACITY"], options["ERROR_RATE"])
+            jtis = BlacklistedToken.objects.filter(
+                token__expires_at__gt=timezone.now()
+            ).values_list("token__jti", flat=True).iterator()
+
+            for jti in jtis:
+                bloom.add(jti)
+
+            self.bloom = bloom
+            self.built_at = time.monotonic()
+            metrics.gauge("jti_blacklist.items", bloom.count)
+            metrics.gauge("jti_blacklist.memory_bytes", bloom.memory_bytes)
+        finally:
+            self._rebuilding.release()
+
+    def add(self, jti, expires_at):
+        """
+        Remember a blacklisted jti until its token expires
+        """
+        ttl = (expires_at - timezone.now()).total_seconds()
+        if ttl <= 0:
+            return
+
+        self.local.set(jti, True, ttl)
+        cache.set(RECENT_KEY.format(jti=jti), True, ttl)
+
+        if self.bloom is not None:
+            self.bloom.add(jti)
+
+    def is_blacklisted(self, jti):
+        options = _options()
+
+        if not options["ENABLED"]:
+            return self._query(jti)
+
+        if self.local.get(jti) or cache.get(RECENT_KEY.format(jti=jti)):
+            metrics.incr("jti_blacklist.memory_hits")
+            return True
+
+        if not is_shared():
+            # Jtis blacklisted by other workers never reach this one
+            return self._query(jti)
+
+        age = time.monotonic() - self.built_at
+        if self.bloom is None or age > options["REBUILD_INTERVAL"]:
+            # Jtis blacklisted since the stale filter was built are in
+            # the shared cache, so it still answers meanwhile
+            self.rebuild_in_background()
+
+        if self.bloom is not None and jti not in self.bloom:
+            metrics.incr("jti_blacklist.bloom_negatives")
+            return False
+
+        # Bloom filter false positive, or its first build still running
+        return self._query(jti)
+
+    def _query(self, jti):
+        metrics.incr("jti_blacklist.queries")
+        expires_at = BlacklistedToken.objects.filter(
+            token__jti=jti
+        ).values_list("token__expires_at", flat=True).first()
+
+        if expires_at is None:
+            return False
+
+        self.add(jti, expires_at)
+        return True
+
+
+jti_blacklist = JtiBlacklist()
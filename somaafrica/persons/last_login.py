@@ -0,0 +1,99 @@
+"""
+Batched last_login updates for JWT-only logins.
+
+Logins record the user's last_login in memory. Pending updates are
+written by a background thread in a single bulk UPDATE once MAX_PENDING
+users are waiting, by a timer FLUSH_INTERVAL seconds after the first of
+them logged in, and when the worker exits.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from somaafrica.commons import metrics
+
+from .models import User
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def jwt_only_login():
+    return getattr(settings, "JWT_ONLY_LOGIN", False)
+
+
+def _options():
+    options = {"FLUSH_INTERVAL": 30, "MAX_PENDING": 500}
+    options.update(getattr(settings, "LAST_LOGIN_BATCH", {}))
+    return options
+
+
+class LastLoginBatcher(object):
+    def __init__(self):
+        self.pending = {}
+        self.timer = None
+        self._lock = threading.Lock()
+
+    def record(self, user):
+        options = _options()
+        user.last_login = timezone.now()
+        timer = None
+
+        with self._lock:
+            self.pending[user.pk] = user.last_login
+            due = len(self.pending) >= options["MAX_PENDING"]
+
+            if not due and self.timer is None:
+                # Flushes this login even if no other one follows
+                timer = self.timer = threading.Timer(
+                    options["FLUSH_INTERVAL"], self.flush_in_background
+                )
+                timer.daemon = True
+
+        if due:
+            threading.Thread(target=self.flush_in_background).start()
+        elif timer is not None:
+            timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            self._cancel_timer()
+
+        if not pending:
+            return 0
+
+        User.objects.bulk_update(
+            [User(pk=pk, last_login=at) for pk, at in pending.items()],
+            ["last_login"],
+            batch_size=_options()["MAX_PENDING"]
+        )
+        metrics.incr("last_login.flushes")
+        metrics.incr("last_login.users", len(pending))
+        return len(pending)
+
+    def flush_in_background(self):
+        try:
+            self.flush()
+        except Exception as e:
+            LOGGER.exception(e)
+        finally:
+            connections.close_all()
+
+    def reset(self):
+        with self._lock:
+            self.pending.clear()
+            self._cancel_timer()
+
+    def _cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+last_logins = LastLoginBatcher()
+atexit.register(last_logins.flush)
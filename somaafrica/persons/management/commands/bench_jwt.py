@@ -0,0 +1,61 @@
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.backends import TokenBackend
+
+from somaafrica.persons.management.commands.create_signing_key import (
+    generate_key
+)
+from somaafrica.persons.signing_keys import KeyRingTokenBackend, SigningKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Report access token signing and verification cost per JWT "
+        "signing algorithm"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        payload = {
+            "token_type": "access",
+            "exp": int(time.time()) + 3600,
+            "jti": uuid.uuid4().hex,
+            "user_id": str(uuid.uuid4()),
+        }
+
+        self.stdout.write(
+            f"{'algorithm':<10} {'sign us':>10} {'verify us':>10} "
+            f"{'verifies/s/core':>16}"
+        )
+        for algorithm, backend in self.backends():
+            sign = self.time(backend.encode, options["iterations"], payload)
+            token = backend.encode(payload)
+            verify = self.time(backend.decode, options["iterations"], token)
+
+            self.stdout.write(
+                f"{algorithm:<10} {sign * 1e6:>10.1f} {verify * 1e6:>10.1f} "
+                f"{1 / verify:>16.0f}"
+            )
+
+    def backends(self):
+        yield "HS256", TokenBackend("HS256", uuid.uuid4().hex)
+
+        for algorithm in ["RS256", "EdDSA"]:
+            key = SigningKey("bench", generate_key(algorithm))
+            yield algorithm, KeyRingTokenBackend({"bench": key}, "bench")
+
+    @staticmethod
+    def time(func, iterations, argument):
+        timings = []
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func(argument)
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings)
@@ -0,0 +1,104 @@
+import timeit
+
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from somaafrica.persons.models import Group, User
+
+
+def legacy_user_permissions(user):
+    """
+    The list based lookup User.user_permissions used before the bitset
+    engine, one query for the groups and one more per group
+    """
+    perms = []
+
+    for group in user.groups.all():
+        perms += group.group_permissions
+
+    return perms
+
+
+def legacy_has_perms(user, perm_list):
+    return all(perm in legacy_user_permissions(user) for perm in perm_list)
+
+
+class Command(BaseCommand):
+    help = "Benchmark list based permission checks against the bitset engine"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=5)
+        parser.add_argument("--perms-per-group", type=int, default=10)
+        parser.add_argument("--checks", type=int, default=3)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Fixture rows are rolled back once the benchmark is done
+        with transaction.atomic():
+            user, perm_list = self.make_fixtures(options)
+            self.run_benchmarks(user, perm_list, options["iterations"])
+            transaction.set_rollback(True)
+
+    def make_fixtures(self, options):
+        permissions = list(
+            Permission.objects.order_by("id")[
+                :options["groups"] * options["perms_per_group"]
+            ]
+        )
+        user = User.objects.create(username="bench-permissions-user")
+
+        for number in range(options["groups"]):
+            group = Group.objects.create(
+                name=f"bench-permissions-{number}",
+                created_by=user.guid,
+                updated_by=user.guid
+            )
+            start = number * options["perms_per_group"]
+            group.permissions.add(
+                *permissions[start:start + options["perms_per_group"]]
+            )
+            user.groups.add(group)
+
+        checked = permissions[-options["checks"]:]
+        return user, [perm.codename for perm in checked]
+
+    def run_benchmarks(self, user, perm_list, iterations):
+        mask, index = user._compiled_permissions()
+        legacy = legacy_user_permissions(user)
+        compiled = user.permission_set
+
+        results = [
+            (
+                "legacy user_permissions + has_perms (queries)",
+                lambda: legacy_has_perms(user, perm_list)
+            ),
+            (
+                "list membership only",
+                lambda: all(perm in legacy for perm in perm_list)
+            ),
+            (
+                "frozenset membership",
+                lambda: compiled.issuperset(perm_list)
+            ),
+            (
+                "bitmask test",
+                lambda: index.has_perms(mask, perm_list)
+            ),
+            (
+                "User.has_perms (memoized)",
+                lambda: user.has_perms(perm_list)
+            ),
+        ]
+
+        self.stdout.write(
+            f"{len(legacy)} permissions, {len(perm_list)} checked per call, "
+            f"mask has {bin(mask).count('1')} bits set in "
+            f"{(mask.bit_length() + 7) // 8} bytes"
+        )
+
+        for name, func in results:
+            seconds = timeit.timeit(func, number=iterations)
+            self.stdout.write(
+                f"{name:<48} {seconds / iterations * 1e6:>12.2f} us/call"
+            )
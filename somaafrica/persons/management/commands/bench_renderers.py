@@ -0,0 +1,102 @@
+import io
+import uuid
+
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from somaafrica.commons.parsers import ORJSONParser
+from somaafrica.commons.renderers import ORJSONRenderer
+from somaafrica.commons.values import BATCH_SIZE
+from somaafrica.persons.models import Group, User
+from somaafrica.persons.views import GroupViewSet, PersonViewSet, UserViewSet
+
+from .bench_serializers import Command as SerializersCommand, make_fixtures
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark rendering and parsing user, person and group list "
+        "responses with DRF's JSON renderer and parser against orjson's"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1000, 10000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'rows':>8} {'list':<8} {'json ms':>8} {'orjson ms':>10} "
+            f"{'parse ms':>9} {'orjson ms':>10} {'same bytes':>11}"
+        )
+
+        for rows in options["rows"]:
+            # Fixture rows are rolled back once each size is measured
+            with transaction.atomic():
+                make_fixtures(rows)
+                self.make_groups(rows)
+                self.run_benchmarks(rows, options["repeat"])
+                transaction.set_rollback(True)
+
+    def make_groups(self, rows):
+        permissions = list(Permission.objects.all()[:10])
+        groups = Group.objects.bulk_create([
+            Group(
+                name=f"bench-renderers-{number}",
+                created_by=uuid.uuid4(),
+                updated_by=uuid.uuid4()
+            )
+            for number in range(rows)
+        ], batch_size=BATCH_SIZE)
+
+        Group.permissions.through.objects.bulk_create([
+            Group.permissions.through(group=group, permission=permission)
+            for group in groups
+            for permission in permissions
+        ], batch_size=BATCH_SIZE)
+
+    def responses(self):
+        admin = User.objects.create(
+            username="bench-renderers",
+            is_staff=True,
+            is_superuser=True
+        )
+
+        for name, viewset in [
+            ("users", UserViewSet),
+            ("persons", PersonViewSet),
+            ("groups", GroupViewSet),
+        ]:
+            request = APIRequestFactory().get(f"/{name}")
+            force_authenticate(request, user=admin)
+            response = viewset.as_view({"get": "list"})(request)
+
+            yield name, response.data
+
+    def run_benchmarks(self, rows, repeat):
+        time = SerializersCommand.time
+
+        for name, data in self.responses():
+            json_body = JSONRenderer().render(data)
+            orjson_body = ORJSONRenderer().render(data)
+
+            render = time(lambda: JSONRenderer().render(data), repeat)
+            orjson_render = time(lambda: ORJSONRenderer().render(data), repeat)
+            parse = time(
+                lambda: JSONParser().parse(io.BytesIO(json_body)), repeat
+            )
+            orjson_parse = time(
+                lambda: ORJSONParser().parse(io.BytesIO(json_body)), repeat
+            )
+
+            self.stdout.write(
+                f"{rows:>8} {name:<8} {render * 1e3:>8.1f} "
+                f"{orjson_render * 1e3:>10.1f} {parse * 1e3:>9.1f} "
+                f"{orjson_parse * 1e3:>10.1f} "
+                f"{str(json_body == orjson_body):>11}"
+            )
@@ -0,0 +1,149 @@
+import datetime
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from somaafrica.commons.values import BATCH_SIZE
+from somaafrica.persons.models import Address, Group, Person, Phone, User
+from somaafrica.persons.serializers import (
+    AddressSerializer,
+    AddressValuesSerializer,
+    PersonSerializer,
+    PersonValuesSerializer,
+    PhoneSerializer,
+    PhoneValuesSerializer,
+    UserSerializer,
+    UserValuesSerializer
+)
+
+
+def make_fixtures(rows):
+    """
+    rows users, each with a person, phone and address, in two groups
+    """
+    creator = uuid.uuid4()
+    tracked = {"created_by": creator, "updated_by": creator}
+
+    groups = Group.objects.bulk_create([
+        Group(name=f"bench-serializers-{number}", **tracked)
+        for number in range(2)
+    ])
+    users = User.objects.bulk_create([
+        User(username=f"bench-serializers-{number}")
+        for number in range(rows)
+    ], batch_size=BATCH_SIZE)
+    phones = Phone.objects.bulk_create([
+        Phone(number=f"+2567{number:08d}", **tracked)
+        for number in range(rows)
+    ], batch_size=BATCH_SIZE)
+    addresses = Address.objects.bulk_create([
+        Address(address=f"Plot {number}, Kampala", **tracked)
+        for number in range(rows)
+    ], batch_size=BATCH_SIZE)
+    persons = Person.objects.bulk_create([
+        Person(
+            user=user,
+            first_name="Bench",
+            last_name=str(number),
+            gender="F",
+            date_of_birth=datetime.date(1990, 1, 1),
+            account_status="Complete",
+            **tracked
+        )
+        for number, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+
+    User.groups.through.objects.bulk_create([
+        User.groups.through(user=user, group=groups[number % 2])
+        for number, user in enumerate(users)
+    ], batch_size=BATCH_SIZE)
+    Person.phone.through.objects.bulk_create([
+        Person.phone.through(person=person, phone=phone)
+        for person, phone in zip(persons, phones)
+    ], batch_size=BATCH_SIZE)
+    Person.address.through.objects.bulk_create([
+        Person.address.through(person=person, address=address)
+        for person, address in zip(persons, addresses)
+    ], batch_size=BATCH_SIZE)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark list serialization with the model serializers against "
+        "the values() serializers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'rows':>8} {'list':<10} {'serializer ms':>14} "
+            f"{'values ms':>10} {'speedup':>8}"
+        )
+
+        for rows in options["rows"]:
+            # Fixture rows are rolled back once each size is measured
+            with transaction.atomic():
+                make_fixtures(rows)
+                self.run_benchmarks(rows, options["repeat"])
+                transaction.set_rollback(True)
+
+    def lists(self):
+        yield (
+            "users",
+            UserSerializer,
+            UserValuesSerializer,
+            User.objects.prefetch_related("groups")
+        )
+        yield (
+            "persons",
+            PersonSerializer,
+            PersonValuesSerializer,
+            Person.objects.select_related("user").prefetch_related(
+                "phone", "address", "user__groups"
+            )
+        )
+        yield "phones", PhoneSerializer, PhoneValuesSerializer, Phone.objects
+        yield (
+            "addresses",
+            AddressSerializer,
+            AddressValuesSerializer,
+            Address.objects
+        )
+
+    def run_benchmarks(self, rows, repeat):
+        for name, serializer_class, values_class, queryset in self.lists():
+            queryset = queryset.order_by("created_at")
+
+            serializer = self.time(
+                lambda: serializer_class(
+                    queryset.iterator(chunk_size=BATCH_SIZE), many=True
+                ).data,
+                repeat
+            )
+            values = self.time(
+                lambda: values_class().serialize(queryset),
+                repeat
+            )
+
+            self.stdout.write(
+                f"{rows:>8} {name:<10} {serializer * 1e3:>14.1f} "
+                f"{values * 1e3:>10.1f} {serializer / values:>7.1f}x"
+            )
+
+    @staticmethod
+    def time(func, repeat):
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings)
@@ -0,0 +1,62 @@
+import os
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+def generate_key(algorithm):
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a new JWT signing key to the key directory. Tokens are "
+        "signed with it once SOMAAFRICA_JWT_KEY_ID names it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--algorithm",
+            choices=["EdDSA", "RS256"],
+            default="EdDSA"
+        )
+        parser.add_argument(
+            "--key-dir",
+            default=settings.JWT_SIGNING_KEYS["KEY_DIR"]
+        )
+        parser.add_argument("--kid", help="Key id (default: a timestamp)")
+
+    def handle(self, *args, **options):
+        if not options["key_dir"]:
+            raise CommandError("No key directory, set SOMAAFRICA_JWT_KEY_DIR")
+
+        kid = options["kid"] or (
+            f"{options['algorithm'].lower()}-"
+            f"{timezone.now():%Y%m%d%H%M%S}"
+        )
+        pem = generate_key(options["algorithm"]).private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+        os.makedirs(options["key_dir"], exist_ok=True)
+
+        try:
+            descriptor = os.open(
+                os.path.join(options["key_dir"], f"{kid}.pem"),
+                os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                0o600
+            )
+        except FileExistsError:
+            raise CommandError(f"Signing key {kid} already exists")
+
+        with os.fdopen(descriptor, "wb") as key_file:
+            key_file.write(pem)
+
+        self.stdout.write(kid)
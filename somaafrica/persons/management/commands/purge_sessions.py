@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from somaafrica.commons import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions, or with --all every session left by "
+        "session logins, in throttled batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.5,
+            help="Seconds to sleep between batches"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also delete unexpired sessions, logging their users out"
+        )
+
+    def handle(self, *args, **options):
+        sessions = Session.objects.order_by("session_key")
+        if not options["all"]:
+            sessions = sessions.filter(expire_date__lt=timezone.now())
+
+        before = Session.objects.count()
+        deleted = 0
+        last_key = ""
+
+        while True:
+            keys = list(
+                sessions.filter(session_key__gt=last_key)
+                .values_list("session_key", flat=True)[:options["batch_size"]]
+            )
+            if keys:
+                with transaction.atomic():
+                    count, _ = Session.objects.filter(
+                        session_key__in=keys
+                    ).delete()
+                deleted += count
+                last_key = keys[-1]
+
+            if len(keys) < options["batch_size"]:
+                break
+            time.sleep(options["pause"])
+
+        metrics.incr("session_purge.deleted", deleted)
+        self.stdout.write(
+            f"Deleted {deleted} of {before} sessions, "
+            f"{Session.objects.count()} left"
+        )
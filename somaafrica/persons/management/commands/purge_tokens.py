@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from somaafrica.persons import token_purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted JWT refresh tokens in "
+        "throttled batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            help="Seconds to sleep between batches"
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Stop after this many batches, the next run does the rest"
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            help="Keep running, purging every this many seconds"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.purge(options)
+
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
+
+    def purge(self, options):
+        before = token_purge.table_sizes()
+        deleted = token_purge.purge_expired(
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            max_batches=options["max_batches"]
+        )
+        after = token_purge.sizes_after(before, deleted)
+
+        self.stdout.write(
+            f"{'table':<12} {'before':>10} {'deleted':>10} {'after':>10}"
+        )
+        for table in token_purge.TABLES:
+            self.stdout.write(
+                f"{table:<12} {before[table]:>10} {deleted[table]:>10} "
+                f"{after[table]:>10}"
+            )
@@ -12,8 +12,11 @@ from django.contrib.auth.models import (
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from somaafrica.commons import hashing, metrics
 from somaafrica.commons.validator import validate_phone_number
 
+from . import permission_bits
+
 
 LOGGER = logging.getLogger(__name__)
 
@@ -82,19 +85,19 @@ class Group(UserTimeStampModel):
     class Meta:
         verbose_name = "Custom Group"
         verbose_name_plural = "Custom Groups"
-
-    @property
-    def group_members(self):
-        return self.user_set.all()
+        indexes = [
+            # Keyset pagination
+            models.Index(
+                fields=["created_at", "guid"],
+                name="group_created_guid_idx"
+            ),
+        ]
 
     @property
     def group_permissions(self):
-        qs = self.permissions.all()
-        return list(
-            # set(
-            #     [str(perm[0]) for perm in qs.values_list("codename")]
-            # )
-            set(qs.values_list("codename", flat=True))  # optimized
+        # Iterates all() so prefetched permissions are used
+        return sorted(
+            set(permission.codename for permission in self.permissions.all())
         )
 
     def __str__(self):
@@ -197,6 +200,9 @@ class User(AbstractBaseUser, TimeStampModel):
 
     objects = CustomUserManager()
 
+    # Bumped whenever group permissions change so memoized sets go stale
+    permission_generation = 0
+
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = []
 
@@ -208,19 +214,69 @@ class User(AbstractBaseUser, TimeStampModel):
             ("add_user_to_group", "Can add user to group"),
             ("remove_user_group", "Can remove user from group")
         ]
+        indexes = [
+            # Keyset pagination
+            models.Index(
+                fields=["created_at", "guid"],
+                name="user_created_guid_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.guid} - {self.username} - {self.email}"
 
+    @property
+    def permission_mask(self):
+        """
+        Bitmask of the permissions granted through the user's groups,
+        memoized on the instance until the user's groups or any group's
+        permissions change.
+        """
+        return self._compiled_permissions()[0]
+
+    @property
+    def permission_set(self):
+        mask, index = self._compiled_permissions()
+        return index.codenames(mask)
+
     @property
     def user_permissions(self):
-        user_groups = self.groups.all()
-        perms = []
+        return list(self.permission_set)
+
+    def _compiled_permissions(self):
+        if self._state.adding:
+            return 0, permission_bits.EMPTY_INDEX
+
+        generation = User.permission_generation
+        cached = self.__dict__.get("_permissions")
+
+        if cached is None or cached[0] != generation:
+            cached = (generation,) + permission_bits.get_user_permissions(
+                self.guid,
+                self._prefetched_group_ids()
+            )
+            self.__dict__["_permissions"] = cached
+
+        return cached[1:]
+
+    def _prefetched_group_ids(self):
+        groups = getattr(self, "_prefetched_objects_cache", {}).get("groups")
 
-        for group in user_groups:
-            perms += group.group_permissions
+        if groups is None:
+            return None
 
-        return perms
+        return [group.pk for group in groups]
+
+    def clear_permission_cache(self):
+        self.__dict__.pop("_permissions", None)
+
+    @classmethod
+    def bump_permission_generation(cls):
+        cls.permission_generation += 1
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.clear_permission_cache()
+        return super().refresh_from_db(*args, **kwargs)
 
     @property
     def user_groups(self):
@@ -228,6 +284,20 @@ class User(AbstractBaseUser, TimeStampModel):
 
         return [group.name for group in user_groups]
 
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=["password"])
+            metrics.incr("password.rehashed")
+
+        return hashing.check_password(raw_password, self.password, setter)
+
     def change_password(self, password):
         self.set_password(password)
         self.save()
@@ -238,14 +308,20 @@ class User(AbstractBaseUser, TimeStampModel):
         if self.is_active and self.is_superuser:
             return True
 
-        # Otherwise we need to check the backends.
-        return perm in self.user_permissions
+        # Otherwise test the compiled permission mask.
+        mask, index = self._compiled_permissions()
+        return index.has_perm(mask, perm)
 
     def has_perms(self, perm_list, obj=None):
         if not isinstance(perm_list, Iterable) or isinstance(perm_list, str):
             LOGGER.error("perm_list must be an iterable of permissions.")
             raise ValueError("perm_list must be an iterable of permissions.")
-        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+        if self.is_active and self.is_superuser:
+            return True
+
+        mask, index = self._compiled_permissions()
+        return index.has_perms(mask, perm_list)
 
 
 class Phone(UserTimeStampModel):
@@ -262,6 +338,15 @@ class Phone(UserTimeStampModel):
         validators=[validate_phone_number]
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination
+            models.Index(
+                fields=["created_at", "guid"],
+                name="phone_created_guid_idx"
+            ),
+        ]
+
 
 class Address(UserTimeStampModel):
     """
@@ -274,6 +359,15 @@ class Address(UserTimeStampModel):
     )
     address = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination
+            models.Index(
+                fields=["created_at", "guid"],
+                name="address_created_guid_idx"
+            ),
+        ]
+
 
 class Person(UserTimeStampModel):
     """
@@ -311,6 +405,13 @@ class Person(UserTimeStampModel):
                 name='unique_person'
             )
         ]
+        indexes = [
+            # Keyset pagination
+            models.Index(
+                fields=["created_at", "guid"],
+                name="person_created_guid_idx"
+            ),
+        ]
 
     def add_user(self, user: str):
         try:
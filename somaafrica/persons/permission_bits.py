@@ -0,0 +1,194 @@
+"""
+Bitset permission engine.
+
+Every Permission owns the bit at its id, each group has a precomputed
+mask of its permissions' bits and a user's mask is the OR of their
+groups' masks, so permission checks become integer ANDs.
+"""
+import base64
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+
+from . import permission_cache
+
+
+INDEX_KEY = "persons:perms:index:{version}"
+
+_LOCK = threading.Lock()
+_LOCAL_INDEX = {}
+
+
+class PermissionIndex(object):
+    """
+    Codename and group lookups for permission masks
+    """
+    def __init__(self, permissions, group_permissions):
+        self.codename_masks = {}
+        self.codenames_by_bit = {}
+        self.group_masks = {}
+
+        for pk, codename in permissions:
+            self.codename_masks[codename] = (
+                self.codename_masks.get(codename, 0) | 1 << pk
+            )
+            self.codenames_by_bit[pk] = codename
+
+        for group_id, permission_id in group_permissions:
+            self.group_masks[group_id] = (
+                self.group_masks.get(group_id, 0) | 1 << permission_id
+            )
+
+    def mask_for(self, codename):
+        return self.codename_masks.get(codename, 0)
+
+    def user_mask(self, group_ids):
+        mask = 0
+
+        for group_id in group_ids:
+            mask |= self.group_masks.get(group_id, 0)
+
+        return mask
+
+    def has_perm(self, mask, codename):
+        return bool(mask & self.mask_for(codename))
+
+    def has_perms(self, mask, codenames):
+        codename_masks = self.codename_masks
+
+        for codename in codenames:
+            if not mask & codename_masks.get(codename, 0):
+                return False
+
+        return True
+
+    def codenames(self, mask):
+        found = set()
+
+        while mask:
+            lowest = mask & -mask
+            codename = self.codenames_by_bit.get(lowest.bit_length() - 1)
+
+            if codename is not None:
+                found.add(codename)
+            mask ^= lowest
+
+        return frozenset(found)
+
+
+EMPTY_INDEX = PermissionIndex((), ())
+
+
+def build_index(group_ids=None):
+    """
+    Index every permission, or only the permissions of group_ids, read
+    in one join query
+    """
+    group_model = apps.get_model("persons", "Group")
+    through = group_model.permissions.through
+
+    if group_ids is None:
+        return PermissionIndex(
+            Permission.objects.order_by().values_list("id", "codename"),
+            through.objects.values_list("group_id", "permission_id")
+        )
+
+    rows = list(
+        through.objects.filter(group_id__in=group_ids).values_list(
+            "group_id", "permission_id", "permission__codename"
+        )
+    )
+    return PermissionIndex(
+        [(permission_id, codename) for _, permission_id, codename in rows],
+        [(group_id, permission_id) for group_id, permission_id, _ in rows]
+    )
+
+
+def get_index(group_ids=None):
+    """
+    Return the index for the current global permission version, reusing
+    the process-local copy until that version changes. Without a shared
+    cache there is no version to trust, so only the permissions of
+    group_ids are read, on every call.
+    """
+    if not permission_cache.enabled():
+        return build_index(group_ids)
+
+    version = permission_cache.get_global_version()
+
+    with _LOCK:
+        if _LOCAL_INDEX.get("version") == version:
+            return _LOCAL_INDEX["index"]
+
+    key = INDEX_KEY.format(version=version)
+    index = cache.get(key)
+
+    if index is None:
+        index = build_index()
+        cache.set(
+            key,
+            index,
+            getattr(settings, "PERMISSION_CACHE_TIMEOUT", 60 * 60)
+        )
+
+    with _LOCK:
+        _LOCAL_INDEX.update(version=version, index=index)
+
+    return index
+
+
+def get_user_permissions(guid, group_ids=None):
+    """
+    Return a user guid's mask and the index to read it with. Without a
+    shared cache both come from one query over the user's groups.
+    """
+    if permission_cache.enabled():
+        index = get_index()
+        return get_user_mask(guid, group_ids, index), index
+
+    index = build_index(
+        _group_ids(guid) if group_ids is None else group_ids
+    )
+    return index.user_mask(index.group_masks), index
+
+
+def get_user_mask(guid, group_ids=None, index=None):
+    """
+    Return the cached mask of a user guid, OR-ing their groups' masks on
+    a miss. Pass group_ids when they are already loaded to skip the query,
+    and the index when it is at hand.
+    """
+    return permission_cache.get_permissions(
+        guid,
+        lambda: _user_mask(guid, group_ids, index)
+    )
+
+
+def _user_mask(guid, group_ids=None, index=None):
+    if group_ids is None:
+        group_ids = _group_ids(guid)
+
+    return (index or get_index()).user_mask(group_ids)
+
+
+def _group_ids(guid):
+    user_model = apps.get_model("persons", "User")
+    return user_model.groups.through.objects.filter(
+        user_id=guid
+    ).values_list("group_id", flat=True)
+
+
+def encode_mask(mask):
+    """
+    Pack a mask into a short url-safe string for caches or tokens
+    """
+    raw = mask.to_bytes(max(1, (mask.bit_length() + 7) // 8), "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_mask(value):
+    raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+    return int.from_bytes(raw, "big")
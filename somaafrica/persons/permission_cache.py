@@ -0,0 +1,116 @@
+"""
+Cross-request cache of each user's effective permission mask.
+
+Entries are keyed by user guid plus a global and a per-user permission
+version. Bumping a version makes every entry built under the old one
+unreachable, so invalidation never has to find and delete keys.
+
+Version bumps only reach other workers through a shared cache, so
+permissions are not cached across requests while the default cache is
+process-local.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from somaafrica.commons import metrics
+from somaafrica.commons.cache import is_shared
+
+
+GLOBAL_VERSION_KEY = "persons:perms:version"
+USER_VERSION_KEY = "persons:perms:version:{guid}"
+PERMISSIONS_KEY = "persons:perms:{guid}:{version}:{user_version}"
+
+
+def _timeout():
+    return getattr(settings, "PERMISSION_CACHE_TIMEOUT", 60 * 60)
+
+
+def enabled():
+    return is_shared()
+
+
+def _new_version():
+    # Random rather than incremented, an evicted version key can never
+    # come back with a value that old entries were stored under.
+    return uuid.uuid4().hex[:12]
+
+
+def _get_version(key):
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def get_global_version():
+    return _get_version(GLOBAL_VERSION_KEY)
+
+
+def get_versions(guid):
+    """
+    Return the (global, per-user) permission versions for a user guid
+    """
+    user_key = USER_VERSION_KEY.format(guid=guid)
+    versions = cache.get_many([GLOBAL_VERSION_KEY, user_key])
+
+    global_version = versions.get(GLOBAL_VERSION_KEY)
+    if global_version is None:
+        global_version = get_global_version()
+
+    user_version = versions.get(user_key)
+    if user_version is None:
+        user_version = _get_version(user_key)
+
+    return global_version, user_version
+
+
+def get_permissions(guid, loader):
+    """
+    Return the cached permissions for a user guid, calling loader()
+    and caching its result on a miss
+    """
+    if not enabled():
+        return loader()
+
+    global_version, user_version = get_versions(guid)
+    key = PERMISSIONS_KEY.format(
+        guid=guid,
+        version=global_version,
+        user_version=user_version
+    )
+
+    permissions = cache.get(key)
+    if permissions is not None:
+        metrics.incr("permission_cache.hit")
+        return permissions
+
+    metrics.incr("permission_cache.miss")
+    permissions = loader()
+    cache.set(key, permissions, _timeout())
+
+    return permissions
+
+
+def bump_global_version():
+    """
+    Invalidate the cached permissions of every user
+    """
+    cache.set(GLOBAL_VERSION_KEY, _new_version(), None)
+    metrics.incr("permission_cache.invalidate.global")
+
+
+def bump_user_versions(guids):
+    """
+    Invalidate the cached permissions of the given user guids
+    """
+    guids = list(guids)
+    cache.set_many(
+        {USER_VERSION_KEY.format(guid=guid): _new_version() for guid in guids},
+        None
+    )
+    metrics.incr("permission_cache.invalidate.user", len(guids))
@@ -1,7 +1,24 @@
+import hashlib
+import time
+
+from django.conf import settings
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer
+)
+
+from somaafrica.commons import metrics
+from somaafrica.commons.fieldsets import SparseFieldsetSerializerMixin
+from somaafrica.commons.values import ValuesSerializer
 
 from .models import User, Address, Phone, Person, Group
+from .tokens import ClaimsRefreshToken
+
+
+ROTATION_KEY = "persons:refresh_rotation:{digest}"
+ROTATION_LOCK_KEY = "persons:refresh_rotation_lock:{digest}"
 
 
 class PermissionSerializer(serializers.ModelSerializer):
@@ -11,25 +28,50 @@ class PermissionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     # password = serializers.CharField(write_only=True)  # passwd not returned
     groups = serializers.ReadOnlyField(source="user_groups")
 
+    collapsed_fields = {
+        "groups": serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+    }
+
     class Meta:
         model = User
         exclude = ['password']
 
 
-class GroupSerializer(serializers.ModelSerializer):
-    group_members = UserSerializer(many=True, read_only=True)
+class GroupSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    member_count = serializers.SerializerMethodField()
+    members = serializers.HyperlinkedIdentityField(view_name="group-members")
     permissions = serializers.ReadOnlyField(source="group_permissions")
     created_by = serializers.UUIDField(required=True)
     updated_by = serializers.UUIDField(required=True)
 
+    collapsed_fields = {
+        "permissions": serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+    }
+
     class Meta:
         model = Group
         fields = '__all__'
 
+    def get_member_count(self, group):
+        # Annotated by GroupViewSet, counted for groups built elsewhere
+        member_count = getattr(group, "member_count", None)
+        if member_count is None:
+            member_count = group.user_set.count()
+
+        return member_count
+
 
 class UserSignupSerializer(serializers.Serializer):
     username = serializers.CharField(required=False, allow_blank=True)
@@ -53,10 +95,83 @@ class UserLoginSerializer(serializers.Serializer):
     password = serializers.CharField(required=True)
 
 
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    Refreshes presenting a refresh token rotated less than
+    REFRESH_TOKEN_GRACE_PERIOD seconds ago get the pair it was rotated
+    to, so concurrent refreshes of one token all succeed with a single
+    rotation
+    """
+    token_class = ClaimsRefreshToken
+    wait_timeout = 2
+    poll_interval = 0.05
+
+    def validate(self, attrs):
+        grace_period = getattr(settings, "REFRESH_TOKEN_GRACE_PERIOD", 0)
+        if not grace_period:
+            return super().validate(attrs)
+
+        # Keyed by the whole token, only its holder can get the new pair
+        digest = hashlib.sha256(attrs["refresh"].encode()).hexdigest()
+        key = ROTATION_KEY.format(digest=digest)
+        lock_key = ROTATION_LOCK_KEY.format(digest=digest)
+
+        data = cache.get(key)
+        locked = data is None and cache.add(lock_key, True, grace_period)
+        if data is None and not locked:
+            data = self.wait_for_rotation(key)
+
+        if data is not None:
+            metrics.incr("token_refresh.grace_hits")
+            return data
+
+        try:
+            data = super().validate(attrs)
+            cache.set(key, data, grace_period)
+        finally:
+            # A timed out wait rotates without the lock, leave it be
+            if locked:
+                cache.delete(lock_key)
+
+        metrics.incr("token_refresh.rotations")
+        return data
+
+    def wait_for_rotation(self, key):
+        """
+        Wait for a concurrent refresh of the same token to rotate it
+        """
+        deadline = time.monotonic() + self.wait_timeout
+
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            data = cache.get(key)
+            if data is not None:
+                return data
+
+        return None
+
+
 class LogoutJWTAPIViewSerializer(serializers.Serializer):
     refresh = serializers.CharField(required=True)
 
 
+class TokenIntrospectionSerializer(serializers.Serializer):
+    tokens = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False
+    )
+
+    def validate_tokens(self, tokens):
+        max_tokens = getattr(settings, "TOKEN_INTROSPECTION_MAX_TOKENS", 100)
+
+        if len(tokens) > max_tokens:
+            raise serializers.ValidationError(
+                f"At most {max_tokens} tokens per request"
+            )
+
+        return tokens
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     password = serializers.CharField(required=True)
@@ -119,13 +234,73 @@ class RemoveAddressSerializer(serializers.Serializer):
     guid = serializers.CharField(required=True)
 
 
-class PersonSerializer(serializers.ModelSerializer):
+class PersonSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     user = UserSerializer(required=False)
     phone = PhoneSerializer(required=False, many=True)
     address = AddressSerializer(required=False, many=True)
     created_by = serializers.UUIDField(required=True)
     updated_by = serializers.UUIDField(required=True)
 
+    collapsed_fields = {
+        "user": serializers.PrimaryKeyRelatedField(read_only=True),
+        "phone": serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+        "address": serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+    }
+
     class Meta:
         model = Person
         fields = '__all__'
+
+
+class PermissionValuesSerializer(ValuesSerializer):
+    serializer_class = PermissionSerializer
+
+
+class AddressValuesSerializer(ValuesSerializer):
+    serializer_class = AddressSerializer
+
+
+class PhoneValuesSerializer(ValuesSerializer):
+    serializer_class = PhoneSerializer
+
+
+class UserValuesSerializer(ValuesSerializer):
+    serializer_class = UserSerializer
+
+    def load_groups(self, rows):
+        # Group names, as User.user_groups lists them
+        return [
+            [group["name"] for group in groups]
+            for groups in self.related_rows(
+                rows, Group.objects.all(), "user", "name"
+            )
+        ]
+
+
+class PersonValuesSerializer(ValuesSerializer):
+    serializer_class = PersonSerializer
+
+    def load_user(self, rows):
+        return self.related_objects(
+            rows, "user", UserValuesSerializer(), User.objects.all()
+        )
+
+    def load_phone(self, rows):
+        return self.load_many(rows, PhoneValuesSerializer(), Phone)
+
+    def load_address(self, rows):
+        return self.load_many(rows, AddressValuesSerializer(), Address)
+
+    def load_many(self, rows, serializer, model):
+        return [
+            serializer.to_representation(related)
+            for related in self.related_rows(
+                rows, model.objects.all(), "person", *serializer.columns
+            )
+        ]
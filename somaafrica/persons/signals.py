@@ -0,0 +1,146 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from somaafrica.commons.authentication import user_snapshots
+
+from . import permission_cache
+from .identifiers import known_identifiers
+from .jti_blacklist import jti_blacklist
+from .models import Address, Group, Person, Phone, TimeStampModel, User
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, pk_set, **kwargs):
+    """
+    Invalidate the permissions of users whose groups changed
+    """
+    if not action.startswith("post_"):
+        return
+
+    if isinstance(instance, User):
+        instance.clear_permission_cache()
+        permission_cache.bump_user_versions([instance.guid])
+        return
+
+    User.bump_permission_generation()
+
+    if pk_set is None:
+        # Group side clear(), the affected users are no longer known
+        permission_cache.bump_global_version()
+    else:
+        permission_cache.bump_user_versions(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    """
+    Any group's permissions changing invalidates every user's permissions
+    """
+    if action.startswith("post_"):
+        User.bump_permission_generation()
+        permission_cache.bump_global_version()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(m2m_changed, sender=Person.phone.through)
+@receiver(m2m_changed, sender=Person.address.through)
+def relations_changed(sender, instance, action, model, pk_set, **kwargs):
+    """
+    Touch updated_at on both sides of a changed relation, so the ETags
+    and Last-Modified of their representations change with it
+    """
+    if action == "pre_clear" and issubclass(model, TimeStampModel):
+        # post_clear sends no pk_set, touch the rows while still linked
+        source, target = _through_fields(sender, type(instance), model)
+        model.objects.filter(
+            pk__in=sender.objects.filter(
+                **{source: instance.pk}
+            ).values(target)
+        ).update(updated_at=timezone.now())
+
+    if not action.startswith("post_"):
+        return
+
+    now = timezone.now()
+
+    if isinstance(instance, TimeStampModel):
+        type(instance).objects.filter(pk=instance.pk).update(updated_at=now)
+        instance.updated_at = now
+
+    if pk_set and issubclass(model, TimeStampModel):
+        model.objects.filter(pk__in=pk_set).update(updated_at=now)
+
+
+def _through_fields(through, source_model, target_model):
+    """
+    Names of the through model's foreign keys to either side
+    """
+    fields = {
+        field.related_model: field.name
+        for field in through._meta.fields
+        if field.is_relation
+    }
+    return fields[source_model], fields[target_model]
+
+
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=Group)
+@receiver(pre_delete, sender=Phone)
+@receiver(pre_delete, sender=Address)
+def related_deleted(sender, instance, **kwargs):
+    """
+    Touch the rows related to a deleted one, whose relations are
+    deleted with it without m2m_changed
+    """
+    now = timezone.now()
+
+    for field in sender._meta.get_fields():
+        if not field.many_to_many:
+            continue
+        if not issubclass(field.related_model, TimeStampModel):
+            continue
+
+        name = field.name if field.concrete else field.get_accessor_name()
+        getattr(instance, name).update(updated_at=now)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, **kwargs):
+    User.bump_permission_generation()
+    permission_cache.bump_global_version()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """
+    Stale cached snapshots and permission claims of a changed user, so
+    e.g. a deactivation takes effect on the next request
+    """
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        # Written on every login and irrelevant to authorization
+        return
+
+    known_identifiers.add(instance.username, instance.email)
+
+    if not created:
+        user_snapshots.invalidate(instance.guid)
+        permission_cache.bump_user_versions([instance.guid])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_snapshots.invalidate(instance.guid)
+    permission_cache.bump_user_versions([instance.guid])
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, **kwargs):
+    jti_blacklist.add(instance.token.jti, instance.token.expires_at)
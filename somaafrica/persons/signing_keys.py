@@ -0,0 +1,192 @@
+"""
+Asymmetric JWT signing keys with rotation.
+
+Each PEM file in JWT_SIGNING_KEYS KEY_DIR is a key named by its file
+name, RSA keys sign with RS256 and Ed25519 keys with EdDSA. New tokens
+are signed by the CURRENT private key with its name as the "kid" header,
+and tokens are verified with the key their kid names, so tokens signed
+before a rotation stay valid while that key remains in the directory.
+Retired keys can be kept as public keys only. The public keys are
+published as a JWKS, letting other services verify tokens locally.
+
+Keys are parsed once when the app is ready. Until KEY_DIR holds the
+CURRENT key, e.g. before create_signing_key first ran, tokens keep being
+signed with HS256 and the SECRET_KEY.
+"""
+import logging
+import os
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import (
+    TokenBackendError,
+    TokenBackendExpiredToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+
+LOGGER = logging.getLogger(__name__)
+
+ALGORITHMS = {
+    rsa.RSAPrivateKey: "RS256",
+    rsa.RSAPublicKey: "RS256",
+    ed25519.Ed25519PrivateKey: "EdDSA",
+    ed25519.Ed25519PublicKey: "EdDSA",
+}
+
+
+def _options():
+    options = {"KEY_DIR": "", "CURRENT": ""}
+    options.update(getattr(settings, "JWT_SIGNING_KEYS", {}))
+    return options
+
+
+class SigningKey(object):
+    def __init__(self, kid, key):
+        self.kid = kid
+        self.algorithm = next(
+            (
+                algorithm for key_type, algorithm in ALGORITHMS.items()
+                if isinstance(key, key_type)
+            ),
+            None
+        )
+        if self.algorithm is None:
+            raise ImproperlyConfigured(
+                f"JWT signing key {kid} is neither an RSA nor Ed25519 key"
+            )
+
+        if hasattr(key, "public_key"):
+            self.private_key = key
+            self.public_key = key.public_key()
+        else:
+            self.private_key = None
+            self.public_key = key
+
+    @classmethod
+    def from_pem(cls, kid, pem):
+        try:
+            key = serialization.load_pem_private_key(pem, password=None)
+        except ValueError:
+            key = serialization.load_pem_public_key(pem)
+
+        return cls(kid, key)
+
+    def to_jwk(self):
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(
+            self.public_key,
+            as_dict=True
+        )
+        jwk.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return jwk
+
+
+def load_keys(key_dir):
+    keys = {}
+
+    for name in sorted(os.listdir(key_dir)):
+        kid, extension = os.path.splitext(name)
+        if extension == ".pem":
+            with open(os.path.join(key_dir, name), "rb") as pem:
+                keys[kid] = SigningKey.from_pem(kid, pem.read())
+
+    return keys
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    Token backend signing with the current key of a key ring and
+    verifying with whichever key a token's kid header names
+    """
+    def __init__(self, keys, current):
+        if current not in keys or keys[current].private_key is None:
+            raise ImproperlyConfigured(
+                f"No private JWT signing key named {current}"
+            )
+
+        super().__init__(
+            keys[current].algorithm,
+            audience=api_settings.AUDIENCE,
+            issuer=api_settings.ISSUER,
+            leeway=api_settings.LEEWAY,
+            json_encoder=api_settings.JSON_ENCODER,
+        )
+        self.keys = keys
+        self.current = keys[current]
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            self.current.private_key,
+            algorithm=self.current.algorithm,
+            headers={"kid": self.current.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            key = self.keys.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise TokenBackendError(_("Token is invalid"))
+
+            return jwt.decode(
+                token,
+                key.public_key,
+                algorithms=[key.algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken(_("Token is expired")) from e
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+    def jwks(self):
+        return {"keys": [key.to_jwk() for key in self.keys.values()]}
+
+
+def install():
+    """
+    Sign and verify every simplejwt token with the configured key ring.
+    simplejwt looks its backend up on its state module for each token.
+    """
+    options = _options()
+    if not options["KEY_DIR"]:
+        return
+
+    current = os.path.join(options["KEY_DIR"], f"{options['CURRENT']}.pem")
+    if not options["CURRENT"] or not os.path.isfile(current):
+        LOGGER.warning(
+            "No current JWT signing key in %s, signing with HS256",
+            options["KEY_DIR"]
+        )
+        return
+
+    state.token_backend = KeyRingTokenBackend(
+        load_keys(options["KEY_DIR"]),
+        options["CURRENT"]
+    )
+
+
+def jwks():
+    if isinstance(state.token_backend, KeyRingTokenBackend):
+        return state.token_backend.jwks()
+
+    return {"keys": []}
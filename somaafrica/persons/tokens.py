@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import permission_bits, permission_cache
+from .jti_blacklist import jti_blacklist
+from .models import User
+
+
+PERMISSIONS_CLAIM = "perms"
+PERMISSION_VERSION_CLAIM = "pv"
+SUPERUSER_CLAIM = "su"
+
+
+def permission_claims_enabled():
+    return getattr(settings, "JWT_PERMISSION_CLAIMS", False)
+
+
+def permission_version(guid):
+    return ".".join(permission_cache.get_versions(guid))
+
+
+def add_permission_claims(token, user):
+    """
+    Embed the user's permission mask and the version it was built under
+    """
+    # Read the version first so a concurrent change can only make the
+    # claim look stale, never fresh.
+    token[PERMISSION_VERSION_CLAIM] = permission_version(user.guid)
+    token[PERMISSIONS_CLAIM] = permission_bits.encode_mask(
+        user.permission_mask
+    )
+    token[SUPERUSER_CLAIM] = user.is_active and user.is_superuser
+
+    return token
+
+
+def tokens_for_user(user):
+    refresh = RefreshToken.for_user(user)
+
+    if permission_claims_enabled():
+        add_permission_claims(refresh, user)
+
+    return refresh
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    Refresh token checking the blacklist through the in-memory jti
+    blacklist instead of a query per check
+    """
+    def check_blacklist(self):
+        if jti_blacklist.is_blacklisted(self[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+
+class ClaimsRefreshToken(CachedBlacklistRefreshToken):
+    """
+    Refresh token that re-derives the permission claims it carries, used
+    on the refresh path so rotated tokens never repeat stale claims
+    """
+    def __init__(self, token=None, verify=True):
+        super().__init__(token, verify)
+
+        if token is not None and permission_claims_enabled():
+            user = User.objects.only("guid", "is_active", "is_superuser").get(
+                guid=self[api_settings.USER_ID_CLAIM]
+            )
+            add_permission_claims(self, user)
+
+
+def _load_users(guids):
+    """
+    Activity and group ids of each user, in one query joining groups
+    """
+    users = {}
+    rows = User.objects.filter(guid__in=guids).values_list(
+        "guid", "is_active", "is_superuser", "groups"
+    )
+
+    for guid, is_active, is_superuser, group_id in rows:
+        user = users.setdefault(str(guid), {
+            "is_active": is_active,
+            "is_superuser": is_superuser,
+            "group_ids": [],
+        })
+        if group_id is not None:
+            user["group_ids"].append(group_id)
+
+    return users
+
+
+def introspect(raw_tokens):
+    """
+    Validate access tokens and describe the user of each valid one, with
+    a single user query for the whole batch
+    """
+    results = []
+
+    for raw_token in raw_tokens:
+        try:
+            token = AccessToken(raw_token)
+            results.append({
+                "valid": True,
+                "guid": str(token[api_settings.USER_ID_CLAIM]),
+                "exp": token["exp"],
+            })
+        except (TokenError, KeyError) as e:
+            results.append({"valid": False, "detail": str(e)})
+
+    users = _load_users({
+        result["guid"] for result in results if result["valid"]
+    })
+    index = permission_bits.get_index({
+        group_id for user in users.values() for group_id in user["group_ids"]
+    })
+
+    for result in results:
+        user = users.get(result.get("guid"))
+
+        if user is not None:
+            mask = index.user_mask(user["group_ids"])
+            result.update(
+                is_active=user["is_active"],
+                is_superuser=user["is_superuser"],
+                permissions=sorted(index.codenames(mask))
+            )
+        elif result["valid"]:
+            result.update(valid=False, detail="User not found")
+
+    return results
@@ -7,36 +7,53 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import Permission
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
+from django.db.models import Count
+from django.http import Http404
 # from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status, filters
+from rest_framework import generics, status, filters
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet, ModelViewSet
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 # from social_core.backends.google import GoogleOAuth2
 # from social_core.backends.facebook import FacebookOAuth2
 # from social_core.exceptions import AuthException
 # from social_core.actions import do_complete
 
-from somaafrica.commons.validator import (
-    validate_email_return_filters,
-    validate_email_address
+from somaafrica.commons import metrics
+from somaafrica.commons.conditional import ConditionalMixin, preconditioned
+from somaafrica.commons.fieldsets import SparseFieldsetMixin
+from somaafrica.commons.hashing import HashingPoolFull
+from somaafrica.commons.pagination import (
+    ApproximateCountPagination,
+    CreatedAtCursorPagination,
+    KeysetPagination
 )
+from somaafrica.commons.throttling import (
+    LoginIPThrottle,
+    LoginUsernameThrottle
+)
+from somaafrica.commons.validator import validate_email_address
+from somaafrica.commons.values import ValuesListMixin
 from somaafrica.configs.settings import FRONTEND_URL
 
+from . import signing_keys
+from .identifiers import known_identifiers
+from .last_login import jwt_only_login, last_logins
 from .models import User, Group, Person, Phone, Address
 from .serializers import (
     UserSerializer,
     UserSignupSerializer,
     UserLoginSerializer,
+    TokenRefreshSerializer,
     LogoutJWTAPIViewSerializer,
+    TokenIntrospectionSerializer,
     ChangePasswordSerializer,
     GroupSerializer,
     PermissionSerializer,
@@ -48,7 +65,17 @@ from .serializers import (
     RemoveAddressSerializer,
     ResetPasswordSerializer,
     RequestPasswordResetSerializer,
-    AddressSerializer
+    AddressSerializer,
+    AddressValuesSerializer,
+    PermissionValuesSerializer,
+    PersonValuesSerializer,
+    PhoneValuesSerializer,
+    UserValuesSerializer
+)
+from .tokens import (
+    CachedBlacklistRefreshToken,
+    introspect,
+    tokens_for_user
 )
 
 
@@ -65,6 +92,47 @@ class HealthCheckAPIView(APIView):
         )
 
 
+class MetricsAPIView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot(), status=status.HTTP_200_OK)
+
+
+class JWKSAPIView(APIView):
+    """
+    Public keys verifying access tokens, for services verifying them
+    locally
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        response = Response(signing_keys.jwks(), status=status.HTTP_200_OK)
+        response["Cache-Control"] = "public, max-age=300"
+        return response
+
+
+class TokenIntrospectionAPIView(APIView):
+    """
+    Validate a batch of access tokens for services authorizing on behalf
+    of their users
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = TokenIntrospectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        tokens = serializer.validated_data["tokens"]
+        metrics.incr("token_introspection.tokens", len(tokens))
+
+        return Response(
+            {"results": introspect(tokens)},
+            status=status.HTTP_200_OK
+        )
+
+
 class RequestPasswordResetAPIView(APIView):
     permission_classes = [AllowAny]
 
@@ -73,9 +141,11 @@ class RequestPasswordResetAPIView(APIView):
         password_serializer.is_valid(raise_exception=True)
 
         try:
-            email_validated = validate_email_address(
-                password_serializer.validated_data["email"]
-            )
+            email = password_serializer.validated_data["email"]
+            email_validated = validate_email_address(email)
+
+            if email_validated and not known_identifiers.might_exist(email):
+                raise Http404("No User matches the given query.")
 
             if email_validated:
                 user = get_object_or_404(
@@ -153,6 +223,9 @@ class ResetPasswordAPIView(APIView):
                     status=status.HTTP_200_OK
                 )
 
+        except HashingPoolFull:
+            raise
+
         except Exception as e:
             LOGGER.exception(str(e))
             return Response(
@@ -183,6 +256,9 @@ class SignupAPIView(APIView):
                 status=status.HTTP_200_OK
             )
 
+        except HashingPoolFull:
+            raise
+
         except Exception as e:
             LOGGER.exception(str(e))
             return Response(
@@ -196,27 +272,25 @@ class SignupAPIView(APIView):
 
 class LoginAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
         login_serializer = UserLoginSerializer(data=request.data)
         login_serializer.is_valid(raise_exception=True)
-        username = login_serializer._validated_data['username']
 
         try:
-            # pdb.set_trace
-            filters = validate_email_return_filters(username)
-            get_object_or_404(
-                User,
-                **filters
-            )
-
             user = authenticate(request, **login_serializer._validated_data)
-            login(request, user)
+
+            if jwt_only_login():
+                # No session row, last_login is written in batches
+                last_logins.record(user)
+            else:
+                login(request, user)
 
             user_serializer = UserSerializer(user)
 
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)
 
             return Response(
                 {
@@ -227,6 +301,18 @@ class LoginAPIView(APIView):
                 }
             )
 
+        except User.DoesNotExist:
+            return Response(
+                {
+                    "message": "Authentication failed",
+                    "detail": "No User matches the given query."
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        except HashingPoolFull:
+            raise
+
         except Exception as e:
             LOGGER.exception(e)
             return Response(
@@ -236,6 +322,8 @@ class LoginAPIView(APIView):
 
 
 class TokenRefreshView(TokenRefreshView):
+    serializer_class = TokenRefreshSerializer
+
     def post(self, request, *args, **kwargs):
         try:
             # Use the parent class to handle the refresh token process
@@ -321,7 +409,7 @@ class LogoutJWTAPIView(APIView):
             # Get the refresh token from the request data
             refresh_token = logout_serializer.validated_data["refresh"]
             # Create a RefreshToken object from the token string
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             # Blacklist the refresh token
             token.blacklist()
 
@@ -339,8 +427,13 @@ class LogoutJWTAPIView(APIView):
             )
 
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(
+    ConditionalMixin, ValuesListMixin, SparseFieldsetMixin, ModelViewSet
+):
     serializer_class = UserSerializer
+    pagination_class = KeysetPagination
+    values_serializer_class = UserValuesSerializer
+    conditional_fields = ("updated_at", "groups__updated_at")
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -385,24 +478,25 @@ class UserViewSet(ModelViewSet):
         admin_user = self.request.user.is_superuser
 
         if admin_user or self.request.user.has_perm("modify_other_user"):
-            return User.objects.all()
+            queryset = User.objects.all()
+        else:
+            queryset = User.objects.filter(guid=user_guid)
 
-        return User.objects.filter(guid=user_guid)
+        return self.prefetch_requested(
+            self.only_requested(queryset), "groups", Group.objects.all()
+        )
 
-    @action(methods=['patch'], detail=True)
+    @action(
+        methods=['patch'],
+        detail=True,
+        throttle_classes=[LoginIPThrottle, LoginUsernameThrottle]
+    )
+    @preconditioned
     def change_password(self, request, pk=None):
         password_serializer = ChangePasswordSerializer(data=request.data)
         password_serializer.is_valid(raise_exception=True)
 
         try:
-            filters = validate_email_return_filters(
-                password_serializer.validated_data["username"]
-            )
-            get_object_or_404(
-                User,
-                **filters
-            )
-
             authenticate(
                 request,
                 username=password_serializer.validated_data["username"],
@@ -420,6 +514,18 @@ class UserViewSet(ModelViewSet):
                 status=status.HTTP_200_OK
             )
 
+        except User.DoesNotExist:
+            return Response(
+                {
+                    "message": "Unsuccessful",
+                    "detail": "No User matches the given query."
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        except HashingPoolFull:
+            raise
+
         except Exception as e:
             LOGGER.exception(str(e))
             return Response(
@@ -428,9 +534,11 @@ class UserViewSet(ModelViewSet):
             )
 
 
-class PermissionViewSet(ReadOnlyModelViewSet):
+class PermissionViewSet(ValuesListMixin, ReadOnlyModelViewSet):
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
+    values_serializer_class = PermissionValuesSerializer
+    pagination_class = ApproximateCountPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -460,9 +568,10 @@ class PermissionViewSet(ReadOnlyModelViewSet):
     ordering = 'content_type'
 
 
-class GroupViewSet(ModelViewSet):
+class GroupViewSet(ConditionalMixin, SparseFieldsetMixin, ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -501,7 +610,36 @@ class GroupViewSet(ModelViewSet):
         'DELETE': ['delete_group'],
     }
 
+    def get_queryset(self):
+        queryset = self.only_requested(super().get_queryset())
+
+        if self.wants("member_count"):
+            queryset = queryset.annotate(
+                member_count=Count("user", distinct=True)
+            )
+
+        return self.prefetch_requested(
+            queryset, "permissions", Permission.objects.order_by()
+        )
+
+    @action(
+        methods=["get"],
+        detail=True,
+        pagination_class=CreatedAtCursorPagination
+    )
+    def members(self, request, pk=None):
+        # Without the member counts and permissions get_object would add
+        group = generics.get_object_or_404(Group.objects.all(), pk=pk)
+        self.check_object_permissions(request, group)
+        members = group.user_set.prefetch_related("groups")
+
+        page = self.paginate_queryset(members)
+        return self.get_paginated_response(
+            UserSerializer(page, many=True).data
+        )
+
     @action(methods=["patch"], detail=True)
+    @preconditioned
     def add_permissions(self, request, pk=None):
         perms_serializer = AddRemovePermissionsSerializer(data=request.data)
         perms_serializer.is_valid(raise_exception=True)
@@ -512,7 +650,7 @@ class GroupViewSet(ModelViewSet):
                 perms_serializer.validated_data["permissions"]
                 )
 
-            our_group.refresh_from_db()
+            our_group = get_object_or_404(self.get_queryset(), pk=pk)
             our_data = self.get_serializer(our_group).data
 
             return Response(
@@ -527,6 +665,7 @@ class GroupViewSet(ModelViewSet):
             )
 
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def remove_permissions(self, request, pk=None):
         perms_serializer = AddRemovePermissionsSerializer(data=request.data)
         perms_serializer.is_valid(raise_exception=True)
@@ -537,7 +676,7 @@ class GroupViewSet(ModelViewSet):
                 perms_serializer.validated_data["permissions"]
             )
 
-            our_group.refresh_from_db()
+            our_group = get_object_or_404(self.get_queryset(), pk=pk)
             our_data = self.get_serializer(our_group).data
 
             return Response(
@@ -553,6 +692,7 @@ class GroupViewSet(ModelViewSet):
             )
 
     @action(methods=["patch"], detail=True)
+    @preconditioned
     def add_user(self, request, pk=None):
         user_serializer = AddRemoveUserSerializer(data=request.data)
         user_serializer.is_valid(raise_exception=True)
@@ -563,7 +703,7 @@ class GroupViewSet(ModelViewSet):
                 user_serializer.validated_data["user_guid"]
             )
 
-            our_group.refresh_from_db()
+            our_group = get_object_or_404(self.get_queryset(), pk=pk)
             our_data = self.get_serializer(our_group).data
 
             return Response(
@@ -579,6 +719,7 @@ class GroupViewSet(ModelViewSet):
             )
 
     @action(methods=["patch"], detail=True)
+    @preconditioned
     def remove_user(self, request, pk=None):
         user_serializer = AddRemoveUserSerializer(data=request.data)
         user_serializer.is_valid()
@@ -589,7 +730,7 @@ class GroupViewSet(ModelViewSet):
                 user_serializer.validated_data["user_guid"]
             )
 
-            our_group.refresh_from_db()
+            our_group = get_object_or_404(self.get_queryset(), pk=pk)
             our_data = self.get_serializer(our_group).data
 
             return Response(
@@ -605,9 +746,20 @@ class GroupViewSet(ModelViewSet):
             )
 
 
-class PersonViewSet(ModelViewSet):
+class PersonViewSet(
+    ConditionalMixin, ValuesListMixin, SparseFieldsetMixin, ModelViewSet
+):
     queryset = Person.objects.all()
     serializer_class = PersonSerializer
+    pagination_class = KeysetPagination
+    values_serializer_class = PersonValuesSerializer
+    conditional_fields = (
+        "updated_at",
+        "user__updated_at",
+        "user__groups__updated_at",
+        "phone__updated_at",
+        "address__updated_at",
+    )
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -666,7 +818,23 @@ class PersonViewSet(ModelViewSet):
         'DELETE': ['delete_person'],
     }
 
+    def get_queryset(self):
+        queryset = self.only_requested(super().get_queryset())
+
+        if self.expands("user"):
+            queryset = queryset.select_related("user").prefetch_related(
+                "user__groups"
+            )
+
+        queryset = self.prefetch_requested(
+            queryset, "phone", Phone.objects.all()
+        )
+        return self.prefetch_requested(
+            queryset, "address", Address.objects.all()
+        )
+
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def add_user(self, request, pk=None):
         user_serializer = AddRemoveUserSerializer(data=request.data)
         user_serializer.is_valid(raise_exception=True)
@@ -676,7 +844,7 @@ class PersonViewSet(ModelViewSet):
 
             person.add_user(user=user_serializer.validated_data["user_guid"])
 
-            person.refresh_from_db()
+            person = get_object_or_404(self.get_queryset(), pk=pk)
             person_data = self.get_serializer(person).data
 
             return Response(
@@ -692,12 +860,13 @@ class PersonViewSet(ModelViewSet):
             )
 
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def remove_user(self, request, pk=None):
         try:
             person = get_object_or_404(self.get_queryset(), pk=pk)
             person.remove_user()
 
-            person.refresh_from_db()
+            person = get_object_or_404(self.get_queryset(), pk=pk)
             person_data = self.get_serializer(person).data
 
             return Response(
@@ -713,6 +882,7 @@ class PersonViewSet(ModelViewSet):
             )
 
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def add_phone(self, request, pk=None):
         phone_serializer = PhoneSerializer(data=request.data)
         phone_serializer.is_valid(raise_exception=True)
@@ -721,7 +891,7 @@ class PersonViewSet(ModelViewSet):
             person = get_object_or_404(self.get_queryset(), pk=pk)
             person.add_phone(phone_serializer.validated_data)
 
-            person.refresh_from_db()
+            person = get_object_or_404(self.get_queryset(), pk=pk)
             person_data = self.get_serializer(person).data
 
             return Response(
@@ -738,6 +908,7 @@ class PersonViewSet(ModelViewSet):
             )
 
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def remove_phone(self, request, pk=None):
         phone_serializer = RemovePhoneSerializer(data=request.data)
         phone_serializer.is_valid(raise_exception=True)
@@ -746,7 +917,7 @@ class PersonViewSet(ModelViewSet):
             person = get_object_or_404(self.get_queryset(), pk=pk)
             person.remove_phone(phone_serializer.validated_data)
 
-            person.refresh_from_db()
+            person = get_object_or_404(self.get_queryset(), pk=pk)
             person_data = self.get_serializer(person).data
 
             return Response(
@@ -763,6 +934,7 @@ class PersonViewSet(ModelViewSet):
             )
 
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def add_address(self, request, pk=None):
         address_serializer = AddressSerializer(data=request.data)
         address_serializer.is_valid(raise_exception=True)
@@ -771,7 +943,7 @@ class PersonViewSet(ModelViewSet):
             person = get_object_or_404(self.get_queryset(), pk=pk)
             person.add_address(address_serializer.validated_data)
 
-            person.refresh_from_db()
+            person = get_object_or_404(self.get_queryset(), pk=pk)
             person_data = self.get_serializer(person).data
 
             return Response(
@@ -788,6 +960,7 @@ class PersonViewSet(ModelViewSet):
             )
 
     @action(methods=['patch'], detail=True)
+    @preconditioned
     def remove_address(self, request, pk=None):
         address_serializer = RemoveAddressSerializer(data=request.data)
         address_serializer.is_valid(raise_exception=True)
@@ -796,7 +969,7 @@ class PersonViewSet(ModelViewSet):
             person = get_object_or_404(self.get_queryset(), pk=pk)
             person.remove_address(address_serializer.validated_data)
 
-            person.refresh_from_db()
+            person = get_object_or_404(self.get_queryset(), pk=pk)
             person_data = self.get_serializer(person).data
 
             return Response(
@@ -813,9 +986,11 @@ class PersonViewSet(ModelViewSet):
             )
 
 
-class AddressViewSet(ModelViewSet):
+class AddressViewSet(ConditionalMixin, ValuesListMixin, ModelViewSet):
     queryset = Address.objects.all()
     serializer_class = AddressSerializer
+    pagination_class = KeysetPagination
+    values_serializer_class = AddressValuesSerializer
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -854,9 +1029,11 @@ class AddressViewSet(ModelViewSet):
     }
 
 
-class PhoneViewSet(ModelViewSet):
+class PhoneViewSet(ConditionalMixin, ValuesListMixin, ModelViewSet):
     queryset = Phone.objects.all()
     serializer_class = PhoneSerializer
+    pagination_class = KeysetPagination
+    values_serializer_class = PhoneValuesSerializer
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
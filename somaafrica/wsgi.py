@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -14,3 +15,21 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "somaafrica.settings")
 
 application = get_wsgi_application()
+
+# Build the login identifier filter before the first request arrives.
+# A process-local filter would be built again in every worker, so it is
+# only worth it when the workers share it through the cache.
+from django.db import connections  # noqa: E402
+
+from somaafrica.commons.cache import is_shared  # noqa: E402
+from somaafrica.persons.identifiers import known_identifiers  # noqa: E402
+
+if is_shared():
+    try:
+        known_identifiers.rebuild()
+    except Exception as e:
+        # Built lazily on the first login instead
+        logging.getLogger(__name__).warning(str(e))
+    finally:
+        # Don't hand an open connection to workers forked after preload
+        connections.close_all()
@@ -0,0 +1,144 @@
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from somaafrica.commons.authentication import (
+    LazyUser,
+    SomaAfricaJWTAuthentication
+)
+from somaafrica.persons import permission_bits
+from somaafrica.persons.models import Group, User
+
+
+@override_settings(JWT_PERMISSION_CLAIMS=True)
+class TestPermissionClaims(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group, name="teachers")
+        cls.group.permissions.add(
+            *Permission.objects.filter(codename__in=["add_group", "add_user"])
+        )
+        cls.user = baker.make(User, username="teacher")
+        cls.user.set_password("teacher")
+        cls.user.save()
+        cls.user.groups.add(cls.group)
+
+    def login(self):
+        response = self.client.post(
+            reverse("login"),
+            {"username": "teacher", "password": "teacher"}
+        )
+        return response.json()
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get(
+            "/",
+            HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        return SomaAfricaJWTAuthentication().authenticate(request)[0]
+
+    def test_login_embeds_claims(self):
+        token = AccessToken(self.login()["access"])
+
+        self.assertFalse(token["su"])
+        self.assertEqual(
+            permission_bits.decode_mask(token["perms"]),
+            User.objects.get(guid=self.user.guid).permission_mask
+        )
+        self.assertIn("pv", token)
+
+    def test_authorizes_without_database(self):
+        access = self.login()["access"]
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+
+            self.assertIsInstance(user, LazyUser)
+            self.assertTrue(user.has_perms(["add_group", "add_user"]))
+            self.assertFalse(user.has_perm("delete_group"))
+            self.assertEqual(str(user.guid), str(self.user.guid))
+
+        with self.assertRaises(ValueError):
+            user.has_perms("add_group")
+
+    def test_claims_user_loads_row_lazily(self):
+        user = self.authenticate(self.login()["access"])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "teacher")
+            self.assertEqual(user.username, "teacher")
+
+        with self.assertRaises(AttributeError):
+            user._missing
+
+    def test_stale_version_rederives_user(self):
+        access = self.login()["access"]
+        self.group.add_permissions_to_group(["delete_group"])
+
+        user = self.authenticate(access)
+
+        self.assertIsInstance(user, LazyUser)
+        self.assertTrue(user.has_perm("delete_group"))
+
+    def test_deactivation_rejects_claims(self):
+        access = self.login()["access"]
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(
+            reverse("user-list"),
+            HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_superuser_claim(self):
+        superuser = baker.make(User, is_superuser=True)
+        user = LazyUser(superuser.guid, True, 0)
+
+        self.assertTrue(user.has_perm("anything"))
+        self.assertTrue(user.has_perms(["anything"]))
+
+    def test_refresh_rederives_claims(self):
+        refresh = self.login()["refresh"]
+        self.group.remove_permissions_from_group(["add_user"])
+
+        response = self.client.post(
+            reverse("token_refresh"),
+            {"refresh": refresh}
+        )
+        user = self.authenticate(response.json()["access"])
+
+        self.assertIsInstance(user, LazyUser)
+        self.assertFalse(user.has_perm("add_user"))
+        self.assertTrue(user.has_perm("add_group"))
+
+    @override_settings(JWT_PERMISSION_CLAIMS=False)
+    def test_claims_disabled(self):
+        access = self.login()["access"]
+
+        self.assertNotIn("perms", AccessToken(access))
+        self.assertIsInstance(self.authenticate(access), LazyUser)
+
+    def test_token_without_claims_uses_snapshot(self):
+        access = AccessToken.for_user(self.user)
+        user = self.authenticate(str(access))
+
+        self.assertIsInstance(user, LazyUser)
+        self.assertTrue(user.has_perm("add_group"))
+
+    @override_settings(SHARED_CACHES=[])
+    def test_claims_not_trusted_without_shared_cache(self):
+        access = self.login()["access"]
+
+        with mock.patch.object(
+            SomaAfricaJWTAuthentication, "get_snapshot_user"
+        ) as get_snapshot_user:
+            self.assertEqual(
+                self.authenticate(access), get_snapshot_user.return_value
+            )
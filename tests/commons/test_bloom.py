@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from somaafrica.commons.bloom import BloomFilter
+
+
+class TestBloomFilter(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = ["user{}@tests.com".format(number) for number in range(1000)]
+
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_within_bound(self):
+        bloom = BloomFilter(1000, 0.01)
+        for number in range(1000):
+            bloom.add("known{}".format(number))
+
+        false_positives = sum(
+            "unknown{}".format(number) in bloom for number in range(10000)
+        )
+
+        self.assertLess(false_positives / 10000, 0.03)
+        self.assertLess(bloom.estimated_error_rate, 0.02)
+
+    def test_size(self):
+        bloom = BloomFilter(1000000, 0.01)
+
+        # About 9.6 bits per item at 1% false positives
+        self.assertLess(bloom.memory_bytes, 1300000)
+        self.assertEqual(bloom.hash_count, 7)
@@ -0,0 +1,293 @@
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from model_bakery import baker
+
+from somaafrica.persons.models import Group, Person, Phone, User
+from tests.utils.admin_api import AdminAPITestCase
+
+
+class ConditionalRequestTests(AdminAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.persons = [
+            baker.make(Person, user=user, make_m2m=True)
+            for user in baker.make(User, _quantity=3)
+        ]
+        cls.person = cls.persons[0]
+        cls.group = baker.make(Group)
+
+    def get(self, url, status_code=200, **headers):
+        response = self.client.get(url, **self.headers, **headers)
+        self.assertEqual(response.status_code, status_code)
+
+        return response
+
+    def detail_url(self, person=None):
+        person = person or self.person
+        return reverse("person-detail", kwargs={"pk": person.guid})
+
+    def test_list_not_modified(self):
+        url = reverse("person-list")
+        response = self.get(url)
+        etag = response["ETag"]
+
+        # validators only, nothing fetched or serialized
+        with self.assertNumQueries(1):
+            not_modified = self.get(url, 304, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified["ETag"], etag)
+        self.assertEqual(not_modified.content, b"")
+        self.get(url, 304, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.get(url, 200, HTTP_IF_NONE_MATCH='"stale"')
+
+    def test_list_etag_changes(self):
+        url = reverse("person-list")
+        etags = {self.get(url)["ETag"]}
+
+        self.person.save()
+        etags.add(self.get(url)["ETag"])
+
+        self.persons[1].delete()
+        etags.add(self.get(url)["ETag"])
+
+        self.assertEqual(len(etags), 3)
+        self.assertNotIn("ETag", self.get(f"{url}?first_name=nobody"))
+
+    def test_keyset_page_validated_alone(self):
+        url = f"{reverse('person-list')}?page_size=1"
+        etag = self.get(url)["ETag"]
+        persons = list(Person.objects.order_by("created_at", "guid"))
+
+        # page keys and their stamps in one query, no count
+        with self.assertNumQueries(1):
+            self.get(url, 304, HTTP_IF_NONE_MATCH=etag)
+
+        # Past the page and the row after it
+        persons[2].save()
+        self.get(url, 304, HTTP_IF_NONE_MATCH=etag)
+
+        persons[1].save()
+        self.get(url, 200, HTTP_IF_NONE_MATCH=etag)
+
+    def test_offset_page_count_validated(self):
+        url = f"{reverse('person-list')}?limit=1"
+        etag = self.get(url)["ETag"]
+
+        # count, then the page's stamps
+        with self.assertNumQueries(2):
+            self.get(url, 304, HTTP_IF_NONE_MATCH=etag)
+
+        baker.make(Person)
+        self.get(url, 200, HTTP_IF_NONE_MATCH=etag)
+
+    def test_page_counted_once(self):
+        for query in ("limit=1", "limit=3&offset=1"):
+            with self.subTest(query=query), override_settings(
+                STREAMING_LIST={"THRESHOLD": 2}
+            ), CaptureQueriesContext(connection) as queries:
+                self.get(f"{reverse('person-list')}?{query}")
+
+            counts = [
+                executed for executed in queries
+                if "COUNT(" in executed["sql"]
+            ]
+            self.assertEqual(len(counts), 1)
+
+    @override_settings(STREAMING_LIST={"THRESHOLD": 1})
+    def test_streamed_list(self):
+        response = self.get(f"{reverse('person-list')}?limit=2")
+
+        self.assertTrue(response.streaming)
+        self.assertIn("ETag", response)
+
+    def test_detail_not_modified(self):
+        response = self.get(self.detail_url())
+
+        self.get(
+            self.detail_url(), 304, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertNotEqual(
+            self.get(self.detail_url(self.persons[1]))["ETag"],
+            response["ETag"]
+        )
+
+    def test_nested_changes_change_etag(self):
+        etag = self.get(self.detail_url())["ETag"]
+
+        phone = self.person.phone.first()
+        phone.number = "+256779341293"
+        phone.save()
+        self.assertNotEqual(self.get(self.detail_url())["ETag"], etag)
+
+        etag = self.get(self.detail_url())["ETag"]
+        self.person.phone.add(baker.make(Phone))
+        self.assertNotEqual(self.get(self.detail_url())["ETag"], etag)
+
+        etag = self.get(self.detail_url())["ETag"]
+        self.person.user.groups.add(self.group)
+        self.assertNotEqual(self.get(self.detail_url())["ETag"], etag)
+
+    def test_relations_touch_both_sides(self):
+        url = reverse("group-detail", kwargs={"pk": self.group.guid})
+        etag = self.get(url)["ETag"]
+
+        # Users' side add, seen in the group's member count
+        self.admin.groups.add(self.group)
+        self.assertNotEqual(self.get(url)["ETag"], etag)
+
+        etag = self.get(url)["ETag"]
+        Permission.objects.first().group_permissions.add(self.group)
+        self.assertNotEqual(self.get(url)["ETag"], etag)
+
+    def test_deletes_touch_related_rows(self):
+        group_url = reverse("group-detail", kwargs={"pk": self.group.guid})
+        self.persons[1].user.groups.add(self.group)
+        etag = self.get(group_url)["ETag"]
+
+        # The member count changes with the member's deletion
+        self.persons[1].user.delete()
+        self.assertNotEqual(self.get(group_url)["ETag"], etag)
+
+        older = self.person.phone.first()
+        self.person.phone.add(baker.make(Phone))
+        etag = self.get(self.detail_url())["ETag"]
+
+        older.delete()
+        self.assertNotEqual(self.get(self.detail_url())["ETag"], etag)
+
+    def test_cleared_relations_touch_other_side(self):
+        user = self.person.user
+        url = reverse("user-detail", kwargs={"pk": user.guid})
+        newer = baker.make(Group)
+        user.groups.add(self.group)
+        user.groups.add(newer)
+        etag = self.get(url)["ETag"]
+
+        self.group.user_set.clear()
+        self.assertNotEqual(self.get(url)["ETag"], etag)
+
+        etag = self.get(url)["ETag"]
+        user.groups.clear()
+        self.assertNotEqual(self.get(url)["ETag"], etag)
+
+    def test_collapsed_relations_ignored(self):
+        url = f"{self.detail_url()}?fields=guid,first_name"
+        etag = self.get(url)["ETag"]
+
+        phone = self.person.phone.first()
+        phone.save()
+
+        self.get(url, 304, HTTP_IF_NONE_MATCH=etag)
+
+    def test_missing_objects(self):
+        self.get(reverse("person-detail", kwargs={"pk": "nope"}), 404)
+
+        response = self.get(
+            reverse("person-detail", kwargs={"pk": self.group.guid}), 404
+        )
+        self.assertNotIn("ETag", response)
+
+    def test_stale_writes_rejected(self):
+        etag = self.get(self.detail_url())["ETag"]
+
+        self.person.save()
+
+        for method in [self.client.patch, self.client.put, self.client.delete]:
+            with self.subTest(method=method.__name__):
+                response = method(
+                    self.detail_url(),
+                    data={"first_name": "Amina"},
+                    content_type="application/json",
+                    HTTP_IF_MATCH=etag,
+                    **self.headers
+                )
+                self.assertEqual(response.status_code, 412)
+
+        self.person.refresh_from_db()
+        self.assertNotEqual(self.person.first_name, "Amina")
+
+    def test_current_writes_accepted(self):
+        etag = self.get(self.detail_url())["ETag"]
+
+        response = self.client.patch(
+            self.detail_url(),
+            data={"first_name": "Amina"},
+            content_type="application/json",
+            HTTP_IF_MATCH=etag,
+            **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.delete(
+            self.detail_url(self.persons[1]),
+            HTTP_IF_MATCH="*",
+            **self.headers
+        )
+        self.assertEqual(response.status_code, 204)
+
+    def test_stale_actions_rejected(self):
+        phone = {
+            "number": "+256779341293",
+            "created_by": self.admin.guid,
+            "updated_by": self.admin.guid
+        }
+        group_url = reverse("group-detail", kwargs={"pk": self.group.guid})
+        person_etag = self.get(self.detail_url())["ETag"]
+        group_etag = self.get(group_url)["ETag"]
+
+        self.person.save()
+        self.group.save()
+
+        for url_name, pk, etag, data in [
+            ("person-add-phone", self.person.guid, person_etag, phone),
+            ("person-remove-user", self.person.guid, person_etag, {}),
+            (
+                "group-add-permissions",
+                self.group.guid,
+                group_etag,
+                {"permissions": ["add_group"]}
+            ),
+        ]:
+            with self.subTest(url_name=url_name):
+                response = self.client.patch(
+                    reverse(url_name, kwargs={"pk": pk}),
+                    data=data,
+                    content_type="application/json",
+                    HTTP_IF_MATCH=etag,
+                    **self.headers
+                )
+                self.assertEqual(response.status_code, 412)
+
+        self.assertFalse(
+            self.person.phone.filter(number="+256779341293").exists()
+        )
+        self.assertIsNotNone(Person.objects.get(pk=self.person.pk).user)
+        self.assertFalse(self.group.permissions.exists())
+
+        response = self.client.patch(
+            reverse("person-add-phone", kwargs={"pk": self.person.guid}),
+            data=phone,
+            content_type="application/json",
+            HTTP_IF_MATCH=self.get(self.detail_url())["ETag"],
+            **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(CONDITIONAL_REQUESTS={"ENABLED": False})
+    def test_disabled(self):
+        response = self.get(reverse("person-list"), HTTP_IF_MATCH='"stale"')
+        self.assertNotIn("ETag", response)
+
+        response = self.client.patch(
+            self.detail_url(),
+            data={"first_name": "Amina"},
+            content_type="application/json",
+            HTTP_IF_MATCH='"stale"',
+            **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
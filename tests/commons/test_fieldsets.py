@@ -0,0 +1,109 @@
+from django.contrib.auth.models import Permission
+from django.urls import reverse
+
+from model_bakery import baker
+
+from somaafrica.persons.models import Group, Person, User
+from tests.utils.admin_api import AdminAPITestCase
+
+
+class SparseFieldsetTests(AdminAPITestCase):
+    warm_up_url = "person-list"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.group = baker.make(Group)
+        cls.group.permissions.add(
+            *Permission.objects.filter(codename="add_group")
+        )
+
+        cls.persons = []
+        for user in baker.make(User, _quantity=3):
+            user.groups.add(cls.group)
+            cls.persons.append(baker.make(Person, user=user, make_m2m=True))
+
+    def get(self, url_name, query, queries, **kwargs):
+        # Plus the ETag and Last-Modified aggregate
+        with self.assertNumQueries(queries + 1):
+            response = self.client.get(
+                f"{reverse(url_name, kwargs=kwargs)}?{query}",
+                **self.headers
+            )
+
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_person_fields_without_relations(self):
+        persons = self.get("person-list", "fields=guid,first_name", 1)
+
+        self.assertEqual(len(persons), 3)
+        self.assertEqual(set(persons[0]), {"guid", "first_name"})
+
+    def test_person_collapsed_relations(self):
+        # persons, phone keys, address keys
+        persons = self.get(
+            "person-list", "fields=guid,user,phone,address&expand=", 3
+        )
+
+        person = {p["guid"]: p for p in persons}[str(self.persons[0].guid)]
+        self.assertEqual(person["user"], str(self.persons[0].user.guid))
+        self.assertEqual(
+            person["phone"],
+            [str(phone.guid) for phone in self.persons[0].phone.all()]
+        )
+
+    def test_person_expand_user_only(self):
+        # persons with users, user groups
+        persons = self.get("person-list", "fields=guid,user&expand=user", 2)
+
+        self.assertEqual(persons[0]["user"]["groups"], [self.group.name])
+
+    def test_person_detail(self):
+        person = self.get(
+            "person-detail",
+            "fields=guid,phone&expand=phone",
+            2,
+            pk=self.persons[1].guid
+        )
+
+        self.assertEqual(set(person), {"guid", "phone"})
+        self.assertIn("number", person["phone"][0])
+
+    def test_unknown_and_blank_names_ignored(self):
+        persons = self.get("person-list", "fields=guid,,nope", 1)
+
+        self.assertEqual(set(persons[0]), {"guid"})
+
+    def test_user_groups_collapsed(self):
+        # users, group keys
+        users = self.get("user-list", "fields=guid,groups&expand=", 2)
+
+        user = {u["guid"]: u for u in users}[str(self.persons[0].user.guid)]
+        self.assertEqual(user["groups"], [str(self.group.guid)])
+
+    def test_group_fields(self):
+        groups = self.get("group-list", "fields=guid,name", 1)
+        self.assertEqual(set(groups[0]), {"guid", "name"})
+
+        # groups with member counts, permission keys
+        groups = self.get(
+            "group-list", "fields=guid,member_count,permissions&expand=", 2
+        )
+        self.assertEqual(groups[0]["member_count"], 3)
+        self.assertCountEqual(
+            groups[0]["permissions"],
+            self.group.permissions.values_list("pk", flat=True)
+        )
+
+    def test_writes_ignore_fieldsets(self):
+        url = reverse("person-detail", kwargs={"pk": self.persons[2].guid})
+        response = self.client.patch(
+            f"{url}?fields=guid",
+            data={"first_name": "Amina"},
+            content_type="application/json",
+            **self.headers
+        )
+
+        self.assertEqual(response.json()["first_name"], "Amina")
+        self.assertIn("user", response.json())
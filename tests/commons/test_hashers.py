@@ -0,0 +1,119 @@
+from io import StringIO
+
+from django.contrib.auth import hashers
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+
+from somaafrica.commons import metrics
+from somaafrica.configs import settings
+from somaafrica.persons.models import User
+
+
+PBKDF2 = "somaafrica.commons.hashers.PBKDF2PasswordHasher"
+SCRYPT = "somaafrica.commons.hashers.ScryptPasswordHasher"
+
+
+def profiles(iterations=1000):
+    return {
+        "pbkdf2": {"HASHER": PBKDF2, "OPTIONS": {"iterations": iterations}},
+        "scrypt": {"HASHER": SCRYPT, "OPTIONS": {"work_factor": 2 ** 4}},
+    }
+
+
+@override_settings(
+    PASSWORD_HASHERS=[PBKDF2, SCRYPT],
+    PASSWORD_HASHER_PROFILES=profiles(),
+    PASSWORD_HASHING_POOL={"WORKERS": 0}
+)
+class TestHasherProfiles(TestCase):
+    def setUp(self):
+        metrics.reset("password")
+        self.user = baker.make(User, username="profiled")
+        self.user.set_password("profiled")
+        self.user.save()
+
+    def login(self):
+        return self.client.post(
+            reverse("login"),
+            {"username": "profiled", "password": "profiled"}
+        )
+
+    def stored_hash(self):
+        return User.objects.get(guid=self.user.guid).password
+
+    def test_hash_uses_profile_cost(self):
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$1000$"))
+
+    def test_cost_change_rehashes_on_login(self):
+        with self.settings(PASSWORD_HASHER_PROFILES=profiles(2000)):
+            self.assertContains(self.login(), "Successful", status_code=200)
+
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$2000$"))
+        self.assertEqual(metrics.snapshot("password"), {
+            "password.rehashed": 1
+        })
+
+    def test_profile_switch_rehashes_on_login(self):
+        with self.settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2]):
+            self.assertContains(self.login(), "Successful", status_code=200)
+
+            self.assertTrue(self.stored_hash().startswith("scrypt$"))
+            self.assertContains(self.login(), "Successful", status_code=200)
+
+        self.assertEqual(metrics.snapshot("password"), {
+            "password.rehashed": 1
+        })
+
+    def test_failed_login_does_not_rehash(self):
+        with self.settings(PASSWORD_HASHER_PROFILES=profiles(2000)):
+            self.client.post(
+                reverse("login"),
+                {"username": "profiled", "password": "wrong"}
+            )
+
+        self.assertTrue(self.stored_hash().startswith("pbkdf2_sha256$1000$"))
+
+    def test_bench_login_command(self):
+        out = StringIO()
+        call_command("bench_login", iterations=3, stdout=out)
+
+        self.assertIn("pbkdf2", out.getvalue())
+        self.assertIn("scrypt", out.getvalue())
+
+    def test_bench_login_unknown_profile(self):
+        with self.assertRaises(CommandError):
+            call_command("bench_login", profiles=["bogus"], stdout=StringIO())
+
+
+@override_settings(
+    PASSWORD_HASHERS=settings.PASSWORD_HASHERS,
+    PASSWORD_HASHER_PROFILES=profiles(),
+    PASSWORD_HASHING_POOL={"WORKERS": 0}
+)
+class TestLegacyHashers(TestCase):
+    def test_django_defaults_follow_profiles(self):
+        self.assertEqual(settings.PASSWORD_HASHERS[0], PBKDF2)
+        self.assertIn(
+            "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+            settings.PASSWORD_HASHERS
+        )
+        self.assertNotIn(
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            settings.PASSWORD_HASHERS
+        )
+
+    def test_legacy_hash_upgraded_on_login(self):
+        legacy = hashers.PBKDF2SHA1PasswordHasher().encode(
+            "legacy", hashers.PBKDF2SHA1PasswordHasher().salt(), 1000
+        )
+        user = baker.make(User, username="legacy", password=legacy)
+
+        response = self.client.post(
+            reverse("login"), {"username": "legacy", "password": "legacy"}
+        )
+
+        self.assertContains(response, "Successful", status_code=200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
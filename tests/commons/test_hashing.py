@@ -0,0 +1,230 @@
+import os
+import signal
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.contrib.auth import hashers
+from django.contrib.auth.tokens import default_token_generator
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.commons import hashing, metrics
+from somaafrica.persons.models import User
+
+
+POOL = {"WORKERS": 1, "QUEUE_DEPTH": 0, "RETRY_AFTER": 7}
+
+
+@override_settings(PASSWORD_HASHING_POOL=POOL)
+class TestHashingPool(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User, username="hasher")
+        cls.user.set_password("hasher")
+        cls.user.save()
+
+    def setUp(self):
+        hashing.shutdown()
+        metrics.reset("hashing_pool")
+
+    def tearDown(self):
+        hashing.shutdown()
+
+    def test_hashes_in_pool(self):
+        encoded = hashing.make_password("secret")
+
+        self.assertTrue(hashers.check_password("secret", encoded))
+        self.assertTrue(hashing.check_password("secret", encoded))
+        self.assertFalse(hashing.check_password("wrong", encoded))
+        self.assertEqual(metrics.snapshot("hashing_pool"), {
+            "hashing_pool.submitted": 3
+        })
+
+    def test_workers_not_forked(self):
+        with mock.patch.object(hashing.atexit, "register") as register:
+            executor, _ = hashing._get_pool()
+
+        self.assertEqual(
+            executor._mp_context.get_start_method(), hashing.START_METHOD
+        )
+        self.assertIn(hashing.START_METHOD, ("forkserver", "spawn"))
+        # Registered once on import, not per pool
+        register.assert_not_called()
+
+    @override_settings(PASSWORD_HASHING_POOL={"WORKERS": 0})
+    def test_inline_when_disabled(self):
+        encoded = hashing.make_password("secret")
+
+        self.assertTrue(hashing.check_password("secret", encoded))
+        self.assertEqual(metrics.snapshot("hashing_pool"), {})
+
+    def test_full_pool_returns_503(self):
+        _, slots = hashing._get_pool()
+        slots.acquire()
+
+        try:
+            response = self.client.post(
+                reverse("login"),
+                {"username": "hasher", "password": "hasher"}
+            )
+        finally:
+            slots.release()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertEqual(metrics.snapshot("hashing_pool.rejected"), {
+            "hashing_pool.rejected": 1
+        })
+
+    def test_full_pool_on_signup(self):
+        _, slots = hashing._get_pool()
+        slots.acquire()
+
+        try:
+            response = self.client.post(
+                reverse("signup"),
+                {"username": "new", "password1": "new", "password2": "new"}
+            )
+        finally:
+            slots.release()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.objects.filter(username="new").exists())
+
+    def test_login_through_pool(self):
+        response = self.client.post(
+            reverse("login"),
+            {"username": "hasher", "password": "hasher"}
+        )
+
+        self.assertContains(response, "Successful", status_code=200)
+        self.assertEqual(metrics.snapshot("hashing_pool"), {
+            "hashing_pool.submitted": 1
+        })
+
+    def test_outdated_hash_upgraded(self):
+        outdated = hashers.make_password("hasher", salt="short")
+        User.objects.filter(pk=self.user.pk).update(password=outdated)
+        user = User.objects.get(pk=self.user.pk)
+
+        self.assertTrue(user.check_password("hasher"))
+        user.refresh_from_db()
+        self.assertNotEqual(user.password, outdated)
+        self.assertTrue(hashers.check_password("hasher", user.password))
+
+    def test_slot_released_when_submit_fails(self):
+        executor, slots = hashing._get_pool()
+
+        with mock.patch.object(executor, "submit", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                hashing.make_password("secret")
+
+        self.assertTrue(slots.acquire(blocking=False))
+        slots.release()
+
+    def test_dead_worker_replaced(self):
+        executor, _ = hashing._get_pool()
+        hashing.make_password("secret")
+
+        for process in list(executor._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+        encoded = hashing.make_password("secret")
+
+        self.assertTrue(hashers.check_password("secret", encoded))
+        self.assertIsNot(hashing._get_pool()[0], executor)
+        self.assertEqual(
+            metrics.snapshot("hashing_pool.restarted"),
+            {"hashing_pool.restarted": 1}
+        )
+
+    def test_broken_submit_retried(self):
+        executor, slots = hashing._get_pool()
+
+        with mock.patch.object(
+            executor, "submit", side_effect=BrokenProcessPool
+        ):
+            encoded = hashing.make_password("secret")
+
+        self.assertTrue(hashers.check_password("secret", encoded))
+        self.assertTrue(slots.acquire(blocking=False))
+
+    def test_broken_result_retried(self):
+        executor, _ = hashing._get_pool()
+        broken = Future()
+        broken.set_exception(BrokenProcessPool())
+
+        with mock.patch.object(executor, "submit", return_value=broken):
+            encoded = hashing.make_password("secret")
+
+        self.assertTrue(hashers.check_password("secret", encoded))
+        self.assertIsNot(hashing._get_pool()[0], executor)
+
+    def test_retried_once(self):
+        with mock.patch(
+            "concurrent.futures.ProcessPoolExecutor.submit",
+            side_effect=BrokenProcessPool
+        ):
+            with self.assertRaises(BrokenProcessPool):
+                hashing.make_password("secret")
+
+        self.assertEqual(
+            metrics.snapshot("hashing_pool.restarted"),
+            {"hashing_pool.restarted": 2}
+        )
+
+    def test_replaced_pool_kept(self):
+        executor, _ = hashing._get_pool()
+
+        hashing._discard(mock.Mock())
+
+        self.assertIs(hashing._get_pool()[0], executor)
+
+    def test_full_pool_on_change_password(self):
+        headers = {
+            "HTTP_AUTHORIZATION":
+            f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+        _, slots = hashing._get_pool()
+        slots.acquire()
+
+        try:
+            response = self.client.patch(
+                reverse("user-change-password", kwargs={"pk": self.user.guid}),
+                {
+                    "username": "hasher",
+                    "password": "hasher",
+                    "password1": "new",
+                    "password2": "new"
+                },
+                content_type="application/json",
+                **headers
+            )
+        finally:
+            slots.release()
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_full_pool_on_reset_password(self):
+        token = default_token_generator.make_token(self.user)
+        _, slots = hashing._get_pool()
+        slots.acquire()
+
+        try:
+            response = self.client.patch(
+                reverse(
+                    "reset_password",
+                    kwargs={"guid": self.user.guid, "token": token}
+                ),
+                {"password1": "new", "password2": "new"},
+                content_type="application/json"
+            )
+        finally:
+            slots.release()
+
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,227 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from model_bakery import baker
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from somaafrica.commons import pagination
+from somaafrica.commons.pagination import (
+    ApproximateCountPagination,
+    KeysetPagination
+)
+from somaafrica.persons.models import Group, Person
+from tests.utils.admin_api import AdminAPITestCase
+
+
+class KeysetPaginationTests(AdminAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        baker.make(Person, _quantity=5, make_m2m=True)
+        baker.make(Group, _quantity=3)
+
+        # Ties on created_at are ordered by guid
+        Person.objects.update(created_at=timezone.now())
+        cls.persons = [
+            str(guid) for guid in Person.objects.order_by(
+                "created_at", "guid"
+            ).values_list("guid", flat=True)
+        ]
+
+    def get(self, url, status_code=200):
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, status_code)
+
+        return response.json()
+
+    def walk(self, url, link):
+        pages = []
+
+        while url:
+            page = self.get(url)
+            pages.append([row["guid"] for row in page["results"]])
+            url = page[link]
+
+        return pages
+
+    def test_walks_forward_and_back(self):
+        forward = self.walk(f"{reverse('person-list')}?page_size=2", "next")
+
+        self.assertEqual(
+            forward,
+            [self.persons[:2], self.persons[2:4], self.persons[4:]]
+        )
+
+        last = self.get(f"{reverse('person-list')}?page_size=2")
+        while last["next"]:
+            last = self.get(last["next"])
+
+        backward = self.walk(last["previous"], "previous")
+        self.assertEqual(backward, [self.persons[2:4], self.persons[:2]])
+
+        first = self.get(
+            f"{reverse('person-list')}?page_size=2&ordering=-first_name"
+        )
+        self.assertIsNone(first["previous"])
+        self.assertNotIn("count", first)
+        self.assertEqual(
+            [row["guid"] for row in first["results"]], self.persons[:2]
+        )
+
+    def test_model_instance_pages(self):
+        groups = self.walk(f"{reverse('group-list')}?page_size=2", "next")
+
+        self.assertEqual(
+            sum(groups, []),
+            [
+                str(guid) for guid in Group.objects.order_by(
+                    "created_at", "guid"
+                ).values_list("guid", flat=True)
+            ]
+        )
+
+    def test_page_queries_do_not_count(self):
+        page = self.get(f"{reverse('person-list')}?page_size=2")
+
+        # validators, persons, phones, addresses and no page count
+        with self.assertNumQueries(4):
+            self.client.get(page["next"], **self.headers)
+
+    def test_page_size(self):
+        url = reverse("person-list")
+
+        self.assertEqual(len(self.get(f"{url}?page_size=0")["results"]), 5)
+        self.assertEqual(len(self.get(f"{url}?page_size=x")["results"]), 5)
+
+        with mock.patch.object(KeysetPagination, "max_page_size", 3):
+            self.assertEqual(
+                len(self.get(f"{url}?page_size=100")["results"]), 3
+            )
+
+    def test_empty_page(self):
+        page = self.get(
+            f"{reverse('person-list')}?page_size=2&first_name=nobody"
+        )
+
+        self.assertEqual(page, {"next": None, "previous": None, "results": []})
+
+    def test_invalid_cursor(self):
+        for cursor in ["!!", "bm90IGEgY3Vyc29y", "gA=="]:
+            with self.subTest(cursor=cursor):
+                self.get(f"{reverse('person-list')}?cursor={cursor}", 404)
+
+    def test_offset_pagination_unchanged(self):
+        page = self.get(f"{reverse('person-list')}?limit=2&offset=2")
+
+        self.assertEqual(page["count"], 5)
+        self.assertEqual(len(page["results"]), 2)
+
+    @override_settings(STREAMING_LIST={"THRESHOLD": 1})
+    def test_keyset_pages_not_streamed(self):
+        response = self.client.get(
+            f"{reverse('person-list')}?page_size=2&limit=3", **self.headers
+        )
+
+        self.assertFalse(response.streaming)
+        self.assertNotIn("count", response.json())
+
+
+class ApproximateCountTests(AdminAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        baker.make(Person, _quantity=5)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def get(self, url_name, query):
+        response = self.client.get(
+            f"{reverse(url_name)}?{query}", **self.headers
+        )
+        page = response.json()
+
+        return page["count"], page["count_exact"]
+
+    def test_no_estimate_outside_postgresql(self):
+        self.assertIsNone(pagination.estimated_rows(Person.objects.all()))
+
+    @mock.patch.object(pagination, "estimated_rows", return_value=500000)
+    def test_estimate_for_large_unfiltered_tables(self, estimated_rows):
+        self.assertEqual(self.get("person-list", "limit=2"), (500000, False))
+        self.assertEqual(
+            self.get("permission-list", "limit=2"), (500000, False)
+        )
+        self.assertEqual(
+            self.get("person-list", "limit=2&exact_count=true"), (5, True)
+        )
+        self.assertEqual(
+            self.get("person-list", "limit=2&first_name=nobody"), (0, True)
+        )
+
+        with override_settings(APPROXIMATE_COUNT={"ENABLED": False}):
+            self.assertEqual(self.get("person-list", "limit=2"), (5, True))
+
+    @override_settings(APPROXIMATE_COUNT={"THRESHOLD": 10})
+    @mock.patch.object(pagination, "estimated_rows", return_value=10)
+    def test_pages_past_an_estimate_below_the_row_count(self, estimated):
+        baker.make(Person, _quantity=15)
+
+        for offset, rows, next_offset in (
+            (5, 5, 10),
+            (10, 5, 15),
+            (15, 5, None),
+        ):
+            with self.subTest(offset=offset):
+                response = self.client.get(
+                    f"{reverse('person-list')}?limit=5&offset={offset}",
+                    **self.headers
+                )
+                page = response.json()
+
+                self.assertEqual(page["count"], 10)
+                self.assertFalse(page["count_exact"])
+                self.assertEqual(len(page["results"]), rows)
+                if next_offset is None:
+                    self.assertIsNone(page["next"])
+                else:
+                    self.assertIn(f"offset={next_offset}", page["next"])
+
+    @mock.patch.object(pagination, "estimated_rows", return_value=3)
+    def test_exact_count_for_small_tables(self, estimated_rows):
+        self.assertEqual(self.get("person-list", "limit=2"), (5, True))
+
+    @override_settings(APPROXIMATE_COUNT={"THRESHOLD": 3})
+    def test_large_counts_cached(self):
+        query = "limit=2&account_status=Complete"
+        Person.objects.update(account_status="Complete")
+
+        self.assertEqual(self.get("person-list", query), (5, True))
+        baker.make(Person, account_status="Complete")
+        self.assertEqual(self.get("person-list", query), (5, False))
+        self.assertEqual(
+            self.get("person-list", f"{query}&exact_count=true"), (6, True)
+        )
+
+        # Counts below the threshold are not cached
+        Person.objects.filter(account_status="Complete").delete()
+        baker.make(Person, _quantity=2, account_status="Complete")
+        cache.clear()
+
+        self.assertEqual(self.get("person-list", query), (2, True))
+        self.assertEqual(self.get("person-list", query), (2, True))
+
+    def test_empty_queryset(self):
+        paginator = ApproximateCountPagination()
+        paginator.request = Request(APIRequestFactory().get("/"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                paginator.get_count(Person.objects.filter(guid__in=[])), 0
+            )
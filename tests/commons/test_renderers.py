@@ -0,0 +1,115 @@
+import datetime
+import decimal
+import io
+import uuid
+import zoneinfo
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from somaafrica.commons.parsers import ORJSONParser
+from somaafrica.commons.renderers import ORJSONRenderer
+from somaafrica.persons.models import User
+
+
+DATA = {
+    "guid": uuid.uuid4(),
+    "created_at": datetime.datetime(
+        2024, 5, 1, 8, 30, 1, 123456, tzinfo=datetime.timezone.utc
+    ),
+    "updated_at": datetime.datetime(
+        2024, 5, 1, 8, tzinfo=zoneinfo.ZoneInfo("Africa/Kampala")
+    ),
+    "naive": datetime.datetime(2024, 5, 1, 8),
+    "date_of_birth": datetime.date(1990, 1, 1),
+    "time": datetime.time(8, 30, 1, 123456),
+    "balance": decimal.Decimal("10.50"),
+    "label": gettext_lazy("name"),
+    "name": "Nakato   Ssebaggala  é",
+    "groups": ["students", "staff"],
+    "phone": [{"number": "+256779341293", "primary": True, "rank": 1}],
+    "user": None,
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertSameBytes(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type)
+        )
+
+    def test_matches_json_renderer(self):
+        self.assertSameBytes(DATA)
+        self.assertSameBytes([DATA, DATA])
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_falls_back_for_what_orjson_renders_differently(self):
+        self.assertSameBytes(DATA, "application/json; indent=4")
+        self.assertSameBytes({1: "non-string key"})
+        self.assertSameBytes({"wide": 2 ** 70})
+
+        with mock.patch.object(JSONRenderer, "ensure_ascii", True):
+            self.assertSameBytes(DATA)
+
+        with mock.patch.object(JSONRenderer, "compact", False):
+            self.assertSameBytes(DATA)
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, parser_class, body, encoding="utf-8"):
+        return parser_class().parse(
+            io.BytesIO(body), parser_context={"encoding": encoding}
+        )
+
+    def assertSameResult(self, body, encoding="utf-8"):
+        self.assertEqual(
+            self.parse(ORJSONParser, body, encoding),
+            self.parse(JSONParser, body, encoding)
+        )
+
+    def test_matches_json_parser(self):
+        body = JSONRenderer().render(DATA)
+
+        self.assertSameResult(body)
+        self.assertSameResult(
+            '{"name": "Nakato é"}'.encode("latin-1"), "latin-1"
+        )
+        self.assertSameResult(b'{"wide": 1180591620717411303424}')
+
+    def test_errors_match_json_parser(self):
+        for body in [b'{"name": ', b'{"score": NaN}', b'\xff']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(JSONParser, body)
+
+                with self.assertRaises(ParseError) as raised:
+                    self.parse(ORJSONParser, body)
+
+                self.assertEqual(
+                    str(raised.exception), str(expected.exception)
+                )
+
+    def test_default_encoding(self):
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(b'{"a": 1}')),
+            {"a": 1}
+        )
+
+
+class BenchRenderersTests(TestCase):
+    def test_bench_renderers_command(self):
+        out = StringIO()
+        call_command("bench_renderers", rows=[3], repeat=1, stdout=out)
+
+        self.assertIn("groups", out.getvalue())
+        self.assertNotIn("False", out.getvalue())
+        self.assertFalse(
+            User.objects.filter(username="bench-renderers").exists()
+        )
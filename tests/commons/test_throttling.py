@@ -0,0 +1,149 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.commons import metrics
+from rest_framework.settings import api_settings
+
+from somaafrica.commons.throttling import (
+    LoginIPThrottle,
+    TokenBucketThrottle,
+    consume
+)
+from somaafrica.persons.models import User
+
+
+THROTTLE = {
+    "CACHE": "default",
+    "BUCKETS": {
+        "ip": {"CAPACITY": 5, "REFILL_RATE": 0.5},
+        "username": {"CAPACITY": 2, "REFILL_RATE": 0.1},
+    },
+}
+
+
+class TestConsume(TestCase):
+    @mock.patch("somaafrica.commons.throttling.time.time")
+    def test_bucket_refills(self, now):
+        now.return_value = 1000
+
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (True, 0))
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (True, 0))
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (False, 2))
+
+        now.return_value = 1001
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (False, 1))
+
+        now.return_value = 1002
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (True, 0))
+
+    @mock.patch("somaafrica.commons.throttling.time.sleep")
+    def test_locked_bucket_rejects(self, sleep):
+        cache.add("bucket:lock", 1)
+
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (False, 1))
+        self.assertEqual(sleep.call_count, 5)
+
+        cache.delete("bucket:lock")
+        self.assertEqual(consume(cache, "bucket", 2, 0.5), (True, 0))
+        self.assertIsNone(cache.get("bucket:lock"))
+
+
+@override_settings(LOGIN_THROTTLE=THROTTLE)
+class TestLoginThrottle(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User, username="stuffed")
+        cls.user.set_password("stuffed")
+        cls.user.save()
+
+    def setUp(self):
+        metrics.reset("throttle")
+
+    def login(self, username="stuffed", password="wrong"):
+        return self.client.post(
+            reverse("login"),
+            {"username": username, "password": password}
+        )
+
+    def test_username_bucket_rejects_before_lookup(self):
+        self.login()
+        self.login(username=" Stuffed ")
+
+        with self.assertNumQueries(0):
+            response = self.login(password="stuffed")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response["Retry-After"]), range(1, 11))
+        self.assertEqual(metrics.snapshot("throttle.username"), {
+            "throttle.username.allowed": 2,
+            "throttle.username.rejected": 1
+        })
+
+    def test_ip_bucket_spans_usernames(self):
+        for number in range(5):
+            self.assertEqual(self.login(f"user{number}").status_code, 400)
+
+        self.assertEqual(self.login("another").status_code, 429)
+
+    def test_forwarded_for_ignored(self):
+        for number in range(5):
+            response = self.client.post(
+                reverse("login"),
+                {"username": f"user{number}", "password": "wrong"},
+                HTTP_X_FORWARDED_FOR=f"10.0.0.{number}"
+            )
+            self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.login("another").status_code, 429)
+
+    def test_change_password_throttled(self):
+        headers = {
+            "HTTP_AUTHORIZATION":
+            f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+        data = {
+            "username": "stuffed",
+            "password": "wrong",
+            "password1": "new",
+            "password2": "new"
+        }
+        url = reverse("user-change-password", kwargs={"pk": self.user.guid})
+
+        for expected in [400, 400, 429]:
+            response = self.client.patch(
+                url,
+                data=data,
+                content_type="application/json",
+                **headers
+            )
+            self.assertEqual(response.status_code, expected)
+
+    @override_settings(LOGIN_THROTTLE={})
+    def test_unconfigured_buckets_allow(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 400)
+
+
+class TestTokenBucketThrottle(TestCase):
+    def test_bucket_ident_must_be_overridden(self):
+        with self.assertRaises(NotImplementedError):
+            TokenBucketThrottle().get_bucket_ident(None)
+
+    def test_ip_from_known_proxies(self):
+        request = RequestFactory().post(
+            "/", HTTP_X_FORWARDED_FOR="10.0.0.1, 10.0.0.2"
+        )
+
+        self.assertEqual(
+            LoginIPThrottle().get_bucket_ident(request), "127.0.0.1"
+        )
+
+        with mock.patch.object(api_settings, "NUM_PROXIES", 1):
+            self.assertEqual(
+                LoginIPThrottle().get_bucket_ident(request), "10.0.0.2"
+            )
@@ -0,0 +1,179 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from somaafrica.commons import metrics
+from somaafrica.commons.authentication import (
+    LazyUser,
+    SomaAfricaJWTAuthentication,
+    UserSnapshotCache
+)
+from somaafrica.commons.cache import LRUCache
+from somaafrica.persons.models import Group, User
+
+
+class TestLRUCache(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_entries_expire(self):
+        cache = LRUCache(max_size=2, ttl=60)
+
+        with mock.patch("somaafrica.commons.cache.time.monotonic") as now:
+            now.return_value = 100
+            cache.set("a", 1)
+
+            now.return_value = 159
+            self.assertEqual(cache.get("a"), 1)
+
+            now.return_value = 160
+            self.assertEqual(cache.get("a", "expired"), "expired")
+
+    def test_pop_and_clear(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.pop("a"))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestUserSnapshotCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group, name="teachers")
+        cls.user = baker.make(User, is_staff=True)
+        cls.user.groups.add(cls.group)
+
+    def setUp(self):
+        metrics.reset()
+        self.headers = {
+            "HTTP_AUTHORIZATION":
+            f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+
+    def authenticate(self):
+        request = APIRequestFactory().get("/", **self.headers)
+        return SomaAfricaJWTAuthentication().authenticate(request)[0]
+
+    def test_snapshot_served_without_database(self):
+        self.authenticate()
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+
+        self.assertIsInstance(user, LazyUser)
+        self.assertTrue(user.is_staff)
+        self.assertTrue(user.is_active)
+        self.assertEqual(
+            metrics.snapshot(),
+            {
+                "auth.requests": 2,
+                "auth.db_round_trips_saved": 1,
+                "user_cache.hit.local": 1,
+                "user_cache.miss": 1
+            }
+        )
+
+    def test_deactivation_takes_effect_immediately(self):
+        response = self.client.get(reverse("user-list"), **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse("user-list"), **self.headers)
+        self.assertContains(response, "User is inactive", status_code=401)
+
+    @override_settings(SHARED_CACHES=[])
+    def test_loaded_per_request_without_shared_cache(self):
+        self.authenticate()
+        User.objects.filter(guid=self.user.guid).update(is_active=False)
+
+        # as when deactivated on another worker
+        with self.assertNumQueries(1):
+            with self.assertRaisesMessage(
+                AuthenticationFailed, "User is inactive"
+            ):
+                self.authenticate()
+
+        self.assertEqual(metrics.snapshot("user_cache"), {
+            "user_cache.miss": 2
+        })
+
+    def test_deleted_user_not_found(self):
+        self.authenticate()
+        User.objects.filter(guid=self.user.guid).delete()
+
+        response = self.client.get(reverse("user-list"), **self.headers)
+        self.assertContains(response, "User not found", status_code=401)
+
+    def test_group_change_refreshes_snapshot(self):
+        self.assertFalse(self.authenticate().has_perm("add_user"))
+
+        self.group.add_permissions_to_group(["add_user"])
+
+        self.assertTrue(self.authenticate().has_perm("add_user"))
+
+    @override_settings(AUTH_USER_CACHE={"SHARED_CACHE": "default"})
+    def test_shared_tier(self):
+        first = UserSnapshotCache()
+        second = UserSnapshotCache()
+        first.get(self.user.guid)
+
+        with self.assertNumQueries(0):
+            snapshot = second.get(self.user.guid)
+
+        self.assertEqual(snapshot["group_ids"], (self.group.guid,))
+        self.assertEqual(metrics.snapshot("user_cache.hit"), {
+            "user_cache.hit.shared": 1
+        })
+
+    def test_user_without_groups(self):
+        user = baker.make(User)
+
+        self.assertEqual(UserSnapshotCache().load(user.guid)["group_ids"], ())
+
+    def test_clear(self):
+        snapshots = UserSnapshotCache()
+        snapshots.get(self.user.guid)
+        snapshots.clear()
+
+        self.assertEqual(len(snapshots.local), 0)
+
+    def test_token_without_user_claim(self):
+        with self.assertRaises(InvalidToken):
+            SomaAfricaJWTAuthentication().get_user(AccessToken())
+
+    @mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_revoke_token_check_loads_user(self):
+        self.headers["HTTP_AUTHORIZATION"] = (
+            f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        )
+
+        self.assertIsInstance(self.authenticate(), User)
+
+    def test_lazy_user_str(self):
+        user = LazyUser(self.user.guid, False, 0)
+
+        self.assertEqual(str(user), f"LazyUser {self.user.guid}")
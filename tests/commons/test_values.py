@@ -0,0 +1,233 @@
+import datetime
+import json
+import zoneinfo
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from model_bakery import baker
+from rest_framework import serializers
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+
+from somaafrica.commons import pagination, values
+from somaafrica.commons.values import ValuesSerializer
+from somaafrica.persons.models import Address, Group, Person, Phone, User
+from somaafrica.persons.serializers import (
+    AddressSerializer,
+    GroupSerializer,
+    PermissionSerializer,
+    PersonSerializer,
+    PersonValuesSerializer,
+    PhoneSerializer,
+    UserSerializer
+)
+from somaafrica.persons.views import PersonViewSet
+from tests.utils.admin_api import AdminAPITestCase
+
+
+class ValuesListTests(AdminAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.groups = baker.make(Group, _quantity=2)
+
+        for user in baker.make(User, _quantity=3):
+            user.groups.add(*cls.groups)
+            baker.make(Person, user=user, make_m2m=True)
+
+        baker.make(Person, user=None, make_m2m=True)
+
+    def assertMatchesSerializer(self, url_name, serializer_class, queryset):
+        response = self.client.get(reverse(url_name), **self.headers)
+        expected = serializer_class(queryset, many=True).data
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            json.loads(JSONRenderer().render(expected))
+        )
+
+    def test_output_matches_model_serializers(self):
+        self.assertMatchesSerializer(
+            "user-list", UserSerializer, User.objects.order_by("created_at")
+        )
+        self.assertMatchesSerializer(
+            "person-list",
+            PersonSerializer,
+            Person.objects.order_by("created_at")
+        )
+        self.assertMatchesSerializer(
+            "phone-list", PhoneSerializer, Phone.objects.all()
+        )
+        self.assertMatchesSerializer(
+            "address-list", AddressSerializer, Address.objects.all()
+        )
+        self.assertMatchesSerializer(
+            "permission-list",
+            PermissionSerializer,
+            Permission.objects.order_by("content_type")
+        )
+
+    def test_paginated(self):
+        response = self.client.get(
+            f"{reverse('person-list')}?limit=2&offset=1", **self.headers
+        )
+        expected = PersonSerializer(
+            Person.objects.order_by("created_at")[1:3], many=True
+        ).data
+
+        self.assertEqual(response.json()["count"], 4)
+        self.assertEqual(
+            response.json()["results"],
+            json.loads(JSONRenderer().render(expected))
+        )
+
+    def test_lookups_batched(self):
+        with mock.patch.object(values, "BATCH_SIZE", 2):
+            data = PersonValuesSerializer().serialize(
+                Person.objects.order_by("created_at")
+            )
+
+        expected = PersonSerializer(
+            Person.objects.order_by("created_at"), many=True
+        ).data
+        self.assertEqual(
+            json.loads(JSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(expected))
+        )
+
+    def test_field_without_column_needs_loader(self):
+        class GroupValuesSerializer(ValuesSerializer):
+            serializer_class = GroupSerializer
+
+        with self.assertRaisesMessage(
+            ImproperlyConfigured, "load_member_count"
+        ):
+            GroupValuesSerializer()
+
+    def test_related_key_format_and_write_only_fields(self):
+        class PersonKeySerializer(serializers.ModelSerializer):
+            user = serializers.PrimaryKeyRelatedField(
+                read_only=True, pk_field=serializers.UUIDField(format="hex")
+            )
+            first_name = serializers.CharField(write_only=True)
+
+            class Meta:
+                model = Person
+                exclude = ["phone", "address"]
+
+        class PersonKeyValuesSerializer(ValuesSerializer):
+            serializer_class = PersonKeySerializer
+
+        queryset = Person.objects.order_by("created_at")
+
+        self.assertEqual(
+            PersonKeyValuesSerializer().serialize(queryset),
+            PersonKeySerializer(queryset, many=True).data
+        )
+
+    def test_bench_serializers_command(self):
+        out = StringIO()
+        call_command("bench_serializers", rows=[3], repeat=1, stdout=out)
+
+        self.assertIn("persons", out.getvalue())
+        self.assertFalse(User.objects.filter(
+            username__startswith="bench-serializers"
+        ).exists())
+
+
+class DatetimeConverterTests(TestCase):
+    def assertConverts(self, field, value):
+        convert = values._converter(field)
+        self.assertEqual(convert(value), field.to_representation(value))
+
+    def test_matches_field_representation(self):
+        kampala = zoneinfo.ZoneInfo("Africa/Kampala")
+        aware = datetime.datetime(2024, 5, 1, 8, tzinfo=datetime.timezone.utc)
+        naive = datetime.datetime(2024, 5, 1, 8)
+
+        self.assertConverts(serializers.DateTimeField(), aware)
+        self.assertConverts(serializers.DateTimeField(), naive)
+        self.assertConverts(
+            serializers.DateTimeField(default_timezone=kampala), aware
+        )
+        self.assertConverts(serializers.DateTimeField(format="%Y"), aware)
+
+        with override_settings(USE_TZ=False):
+            self.assertConverts(serializers.DateTimeField(), aware)
+
+
+@override_settings(STREAMING_LIST={"THRESHOLD": 2, "CHUNK_SIZE": 2})
+class StreamingListTests(AdminAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        for user in baker.make(User, _quantity=4):
+            user.groups.add(baker.make(Group))
+            baker.make(Person, user=user, make_m2m=True)
+
+    def get(self, url_name, query, **headers):
+        return self.client.get(
+            f"{reverse(url_name)}?{query}", **self.headers, **headers
+        )
+
+    def test_streams_large_pages_as_buffered(self):
+        for url_name, query in [
+            ("person-list", "limit=3&offset=1"),
+            ("person-list", "limit=100"),
+            ("person-list", "limit=100&offset=100"),
+            ("user-list", "limit=5&ordering=-created_at"),
+        ]:
+            with self.subTest(url_name=url_name, query=query):
+                response = self.get(url_name, query)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response["Content-Type"], "application/json")
+
+                with override_settings(STREAMING_LIST={"ENABLED": False}):
+                    expected = self.get(url_name, query)
+
+                self.assertFalse(expected.streaming)
+                self.assertEqual(
+                    b"".join(response.streaming_content),
+                    expected.content
+                )
+
+    @override_settings(APPROXIMATE_COUNT={"THRESHOLD": 2})
+    def test_streamed_past_an_estimate_below_the_row_count(self):
+        with mock.patch.object(pagination, "estimated_rows", return_value=2):
+            response = self.get("person-list", "limit=3")
+            with override_settings(STREAMING_LIST={"ENABLED": False}):
+                expected = self.get("person-list", "limit=3")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b"".join(response.streaming_content),
+            expected.content
+        )
+        self.assertIn("offset=3", expected.json()["next"])
+
+    def test_buffers_small_pages_and_other_formats(self):
+        self.assertFalse(self.get("person-list", "limit=2").streaming)
+        self.assertFalse(self.get("person-list", "").streaming)
+        self.assertFalse(
+            self.get("person-list", "limit=3&format=api").streaming
+        )
+        self.assertFalse(
+            self.get(
+                "person-list",
+                "limit=3",
+                HTTP_ACCEPT="application/json; indent=2"
+            ).streaming
+        )
+
+        with mock.patch.object(
+            PersonViewSet, "pagination_class", PageNumberPagination
+        ):
+            self.assertFalse(self.get("person-list", "limit=3").streaming)
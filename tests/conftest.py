@@ -0,0 +1,37 @@
+from unittest import mock
+
+import pytest
+
+from django.core.cache import cache
+
+from somaafrica.persons.identifiers import KnownIdentifiers
+from somaafrica.persons.jti_blacklist import JtiBlacklist
+from somaafrica.persons.last_login import last_logins
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached state must not outlive the database rollback of each test
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_last_logins():
+    # Batched last_login updates must not be flushed into other tests
+    last_logins.reset()
+    yield
+    last_logins.reset()
+
+
+@pytest.fixture(autouse=True)
+def build_identifiers_inline():
+    # A background thread would read the database outside the test's
+    # transaction, so identifier and jti filters are built by the caller
+    with mock.patch.object(
+        KnownIdentifiers, "rebuild_in_background", KnownIdentifiers.rebuild
+    ), mock.patch.object(
+        JtiBlacklist, "rebuild_in_background", JtiBlacklist.rebuild
+    ):
+        yield
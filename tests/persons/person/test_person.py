@@ -3,8 +3,9 @@ from django.urls import reverse
 from model_bakery import baker
 from rest_framework import status
 
-from somaafrica.persons.models import Person, User
+from somaafrica.persons.models import Group, Person, User
 from tests.persons.user.crud import CRUD
+from tests.utils.admin_api import AdminAPITestCase
 
 
 class PersonTests(CRUD):
@@ -310,3 +311,66 @@ class PersonTests(CRUD):
 
         with self.assertRaises(TypeError):
             self.persistent_data[0].add_address("898918919")
+
+
+class PersonQueryCountTests(AdminAPITestCase):
+    warm_up_url = "person-list"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.groups = baker.make(Group, _quantity=2)
+        cls.make_persons(2)
+
+    @classmethod
+    def make_persons(cls, quantity):
+        persons = []
+
+        for user in baker.make(User, _quantity=quantity):
+            user.groups.add(*cls.groups)
+            persons.append(
+                baker.make(Person, user=user, make_m2m=True)
+            )
+
+        return persons
+
+    def test_list_queries_independent_of_page_size(self):
+        # validators, persons, users, user groups, phones, addresses
+        with self.assertNumQueries(6):
+            self.client.get(reverse("person-list"), **self.headers)
+
+        self.make_persons(8)
+
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("person-list"), **self.headers)
+
+        self.assertEqual(len(response.json()), 10)
+        self.assertCountEqual(
+            response.json()[-1]["user"]["groups"],
+            [group.name for group in self.groups]
+        )
+        self.assertTrue(response.json()[-1]["phone"])
+        self.assertTrue(response.json()[-1]["address"])
+
+    def test_detail_queries(self):
+        person = Person.objects.latest("created_at")
+        url = reverse("person-detail", kwargs={"pk": person.guid})
+
+        with self.assertNumQueries(5):
+            response = self.client.get(url, **self.headers)
+
+        self.assertEqual(
+            response.json()["user"]["guid"],
+            str(person.user.guid)
+        )
+
+    def test_action_queries(self):
+        person = self.make_persons(1)[0]
+        url = reverse("person-remove-user", kwargs={"pk": person.guid})
+
+        # fetch with relations, unlink the user, refetch with relations
+        # except the now absent user's groups
+        with self.assertNumQueries(8):
+            response = self.client.patch(url, **self.headers)
+
+        self.assertIsNone(response.json()["detail"]["user"])
@@ -203,3 +203,22 @@ class TestListUsers(TestCase):
         print(response.json())
 
         self.assertContains(response, "Password mismatch", status_code=400)
+
+    def test_unknown_username(self):
+        self.data.update(username="nobody", password="nobody")
+
+        response = self.client.patch(
+            reverse(
+                "user-change-password",
+                kwargs={"pk": self.normal_user.guid}
+            ),
+            self.data,
+            content_type="application/json",
+            **self.login_headers
+        )
+
+        self.assertContains(
+            response,
+            "No User matches the given query.",
+            status_code=400
+        )
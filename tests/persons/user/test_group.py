@@ -1,8 +1,10 @@
+from django.contrib.auth.models import Permission
 from django.urls import reverse
 from model_bakery import baker
 from rest_framework import status
 
-from somaafrica.persons.models import Group
+from somaafrica.persons.models import Group, User
+from tests.utils.admin_api import AdminAPITestCase
 
 from .crud import CRUD
 
@@ -146,11 +148,14 @@ class GroupTests(CRUD):
                 self.assertEqual(response.status_code, expected)
 
                 if expected == status.HTTP_200_OK:
-                    self.assertContains(
-                        response,
-                        self.normal_user.guid,
-                        status_code=200
+                    detail = response.json()["detail"]
+                    self.assertEqual(detail["member_count"], 1)
+
+                    members = self.client.get(
+                        detail["members"],
+                        **headers
                     )
+                    self.assertContains(members, self.normal_user.guid)
 
     def test_remove_user(self):
         self.test_add_user()
@@ -218,3 +223,77 @@ class GroupTests(CRUD):
             Group.objects.get_by_natural_key(name),
             self.persistent_data[0]
         )
+
+
+class GroupListingTests(AdminAPITestCase):
+    warm_up_url = "group-list"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        permissions = Permission.objects.filter(
+            codename__in=["add_group", "change_group"]
+        )
+
+        cls.groups = baker.make(Group, _quantity=3)
+        for group in cls.groups:
+            group.permissions.add(*permissions)
+
+        cls.students = cls.groups[0]
+        for user in baker.make(User, _quantity=5):
+            user.groups.add(cls.students, cls.groups[1])
+
+    def test_list_queries_independent_of_groups_and_members(self):
+        # validators, groups with member counts, prefetched permissions
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("group-list"), **self.headers)
+
+        baker.make(Group, _quantity=3)
+        for user in baker.make(User, _quantity=3):
+            user.groups.add(self.students)
+
+        with self.assertNumQueries(3):
+            self.client.get(reverse("group-list"), **self.headers)
+
+        groups = {group["guid"]: group for group in response.json()}
+        students = groups[str(self.students.guid)]
+        self.assertEqual(students["member_count"], 5)
+        self.assertEqual(
+            students["permissions"],
+            ["add_group", "change_group"]
+        )
+        self.assertNotIn("group_members", students)
+
+    def test_members_cursor_paginated(self):
+        url = reverse("group-members", kwargs={"pk": self.students.guid})
+        url += "?page_size=2"
+        seen = []
+
+        while url:
+            # group, page of members, their prefetched groups
+            with self.assertNumQueries(3):
+                response = self.client.get(url, **self.headers)
+
+            seen += [user["guid"] for user in response.json()["results"]]
+            url = response.json()["next"]
+
+        self.assertCountEqual(
+            seen,
+            [str(user.guid) for user in self.students.user_set.all()]
+        )
+        self.assertEqual(
+            sorted(response.json()["results"][0]["groups"]),
+            sorted([self.students.name, self.groups[1].name])
+        )
+
+    def test_members_of_unknown_group(self):
+        for pk in ("not-a-uuid", Group().guid):
+            with self.subTest(pk=pk):
+                response = self.client.get(
+                    reverse("group-members", kwargs={"pk": pk}),
+                    **self.headers
+                )
+
+                self.assertEqual(
+                    response.status_code, status.HTTP_404_NOT_FOUND
+                )
@@ -0,0 +1,151 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+
+from somaafrica.commons import metrics
+from somaafrica.persons.identifiers import KnownIdentifiers, known_identifiers
+from somaafrica.persons.models import User
+
+
+class TestKnownIdentifiers(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(
+            User, username="known", email="known@tests.com"
+        )
+        cls.user.set_password("known")
+        cls.user.save()
+
+    def setUp(self):
+        metrics.reset("identifier_filter")
+        known_identifiers.rebuild()
+
+    def login(self, username, password="known"):
+        return self.client.post(
+            reverse("login"),
+            {"username": username, "password": password}
+        )
+
+    def test_unknown_username_rejected_without_query(self):
+        with self.assertNumQueries(0):
+            response = self.login("nobody")
+
+        self.assertContains(
+            response, "No User matches the given query.", status_code=400
+        )
+        self.assertEqual(metrics.snapshot()["identifier_filter.rejected"], 1)
+
+    def test_unknown_email_rejected_without_query(self):
+        with self.assertNumQueries(0):
+            response = self.login("nobody@tests.com")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_known_identifiers_pass(self):
+        self.assertContains(self.login("known"), "Successful")
+        self.assertContains(self.login("known@tests.com"), "Successful")
+        self.assertEqual(metrics.snapshot()["identifier_filter.passed"], 2)
+
+    def test_new_user_can_log_in_immediately(self):
+        user = baker.make(User, username="fresh", email="fresh@tests.com")
+        user.set_password("fresh")
+        user.save()
+
+        self.assertContains(self.login("fresh", "fresh"), "Successful")
+
+    def test_user_without_email(self):
+        baker.make(User, username="mailless", email="")
+        known_identifiers.rebuild()
+
+        self.assertTrue(known_identifiers.might_exist("mailless"))
+        self.assertFalse(known_identifiers.might_exist(""))
+
+    def test_user_saved_by_another_worker(self):
+        worker = KnownIdentifiers()
+        worker.rebuild()
+
+        with mock.patch(
+            "somaafrica.persons.signals.known_identifiers", KnownIdentifiers()
+        ):
+            baker.make(User, username="elsewhere")
+
+        self.assertTrue(worker.might_exist("elsewhere"))
+
+        cache.clear()
+        self.assertFalse(worker.might_exist("elsewhere"))
+
+    @override_settings(IDENTIFIER_FILTER={"REBUILD_INTERVAL": 60})
+    @mock.patch.object(
+        # Built inline by the conftest fixture otherwise
+        KnownIdentifiers, "rebuild_in_background",
+        KnownIdentifiers.rebuild_in_background
+    )
+    @mock.patch("somaafrica.persons.identifiers.connections")
+    @mock.patch("somaafrica.persons.identifiers.threading.Thread")
+    @mock.patch("somaafrica.persons.identifiers.time.monotonic")
+    def test_periodic_rebuild(self, now, thread, connections):
+        worker = KnownIdentifiers()
+        now.return_value = 1000
+        worker.rebuild()
+        User.objects.filter(pk=self.user.pk).update(username="renamed")
+
+        self.assertFalse(worker.might_exist("renamed"))
+        thread.assert_not_called()
+
+        # The stale filter answers until the rebuild in the background ends
+        now.return_value = 1061
+        with self.assertNumQueries(0):
+            self.assertFalse(worker.might_exist("renamed"))
+            self.assertFalse(worker.might_exist("renamed"))
+
+        thread.assert_called_once_with(
+            target=worker._build_in_background, daemon=True
+        )
+        worker._build_in_background()
+
+        self.assertTrue(worker.might_exist("renamed"))
+        connections.close_all.assert_called_once_with()
+
+    @mock.patch("somaafrica.persons.identifiers.connections")
+    def test_failed_background_build_logged(self, connections):
+        worker = KnownIdentifiers()
+        worker._rebuilding.acquire()
+
+        with mock.patch.object(worker, "report", side_effect=RuntimeError):
+            with self.assertLogs("somaafrica.persons.identifiers", "ERROR"):
+                worker._build_in_background()
+
+        self.assertFalse(worker._rebuilding.locked())
+        connections.close_all.assert_called_once_with()
+
+    @override_settings(SHARED_CACHES=[])
+    def test_passes_without_shared_cache(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(known_identifiers.might_exist("nobody"))
+
+    @override_settings(IDENTIFIER_FILTER={"ENABLED": False})
+    def test_disabled(self):
+        self.assertTrue(known_identifiers.might_exist("nobody"))
+
+    def test_gauges(self):
+        snapshot = metrics.snapshot()
+
+        self.assertGreaterEqual(snapshot["identifier_filter.items"], 2)
+        self.assertGreater(snapshot["identifier_filter.memory_bytes"], 0)
+        self.assertIn("identifier_filter.estimated_error_rate", snapshot)
+
+    def test_passes_while_first_build_runs(self):
+        worker = KnownIdentifiers()
+        worker._rebuilding.acquire()
+
+        try:
+            with self.assertNumQueries(0):
+                self.assertTrue(worker.might_exist("nobody"))
+                worker.rebuild()
+        finally:
+            worker._rebuilding.release()
+
+        self.assertIsNone(worker.bloom)
@@ -0,0 +1,180 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.commons import metrics
+from somaafrica.persons.jti_blacklist import JtiBlacklist, jti_blacklist
+from somaafrica.persons.models import User
+
+
+class TestJtiBlacklist(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User)
+
+    def setUp(self):
+        metrics.reset("jti_blacklist")
+        jti_blacklist.rebuild()
+        self.refresh = RefreshToken.for_user(self.user)
+        self.jti = self.refresh["jti"]
+
+    def logout(self):
+        return self.client.post(
+            reverse("logout_token"),
+            {"refresh": str(self.refresh)},
+            HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}"
+        )
+
+    def test_not_blacklisted_without_query(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(jti_blacklist.is_blacklisted(self.jti))
+
+        self.assertEqual(
+            metrics.snapshot("jti_blacklist.bloom_negatives"),
+            {"jti_blacklist.bloom_negatives": 1}
+        )
+
+    def test_logout_writes_through(self):
+        self.assertContains(self.logout(), "blacklisted, Successfully")
+
+        self.assertTrue(
+            BlacklistedToken.objects.filter(token__jti=self.jti).exists()
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(jti_blacklist.is_blacklisted(self.jti))
+
+    def test_blacklisted_token_cannot_refresh(self):
+        self.logout()
+
+        response = self.client.post(
+            reverse("token_refresh"),
+            {"refresh": str(self.refresh)}
+        )
+
+        self.assertContains(response, "Token is blacklisted", status_code=401)
+
+    @override_settings(REFRESH_TOKEN_GRACE_PERIOD=0)
+    def test_rotated_token_cannot_refresh_twice(self):
+        first = self.client.post(
+            reverse("token_refresh"),
+            {"refresh": str(self.refresh)}
+        )
+        second = self.client.post(
+            reverse("token_refresh"),
+            {"refresh": str(self.refresh)}
+        )
+
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(second, "Token is blacklisted", status_code=401)
+
+    def test_blacklisted_by_another_worker(self):
+        worker = JtiBlacklist()
+        worker.rebuild()
+
+        self.refresh.blacklist()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(worker.is_blacklisted(self.jti))
+
+    def test_rows_written_without_signals_found_by_query(self):
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token=OutstandingToken.objects.get(jti=self.jti))
+        ])
+        worker = JtiBlacklist()
+        worker.rebuild()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(worker.is_blacklisted(self.jti))
+        with self.assertNumQueries(0):
+            self.assertTrue(worker.is_blacklisted(self.jti))
+
+    def test_expired_tokens_not_kept(self):
+        jti_blacklist.add("expired", timezone.now() - timedelta(seconds=1))
+
+        self.assertIsNone(jti_blacklist.local.get("expired"))
+
+    def test_checked_while_first_build_runs(self):
+        worker = JtiBlacklist()
+        worker._rebuilding.acquire()
+
+        try:
+            with self.assertNumQueries(1):
+                self.assertFalse(worker.is_blacklisted(self.jti))
+
+            worker.add(self.jti, self.refresh.current_time + timedelta(days=1))
+        finally:
+            worker._rebuilding.release()
+
+        self.assertIsNone(worker.bloom)
+        self.assertTrue(worker.local.get(self.jti))
+
+    @override_settings(JTI_BLACKLIST={"REBUILD_INTERVAL": 60})
+    @mock.patch.object(
+        # Built inline by the conftest fixture otherwise
+        JtiBlacklist, "rebuild_in_background",
+        JtiBlacklist.rebuild_in_background
+    )
+    @mock.patch("somaafrica.persons.jti_blacklist.connections")
+    @mock.patch("somaafrica.persons.jti_blacklist.threading.Thread")
+    @mock.patch("somaafrica.persons.jti_blacklist.time.monotonic")
+    def test_periodic_rebuild(self, now, thread, connections):
+        worker = JtiBlacklist()
+        now.return_value = 1000
+        worker.rebuild()
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token=OutstandingToken.objects.get(jti=self.jti))
+        ])
+
+        # The stale filter answers until the rebuild in the background ends
+        now.return_value = 1061
+        with self.assertNumQueries(0):
+            self.assertFalse(worker.is_blacklisted(self.jti))
+            self.assertFalse(worker.is_blacklisted(self.jti))
+
+        thread.assert_called_once_with(
+            target=worker._build_in_background, daemon=True
+        )
+        worker._build_in_background()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(worker.is_blacklisted(self.jti))
+        connections.close_all.assert_called_once_with()
+
+    @mock.patch("somaafrica.persons.jti_blacklist.connections")
+    @mock.patch(
+        "somaafrica.persons.jti_blacklist.BloomFilter",
+        side_effect=RuntimeError
+    )
+    def test_failed_background_build_logged(self, bloom, connections):
+        worker = JtiBlacklist()
+        worker._rebuilding.acquire()
+
+        with self.assertLogs("somaafrica.persons.jti_blacklist", "ERROR"):
+            worker._build_in_background()
+
+        self.assertFalse(worker._rebuilding.locked())
+        connections.close_all.assert_called_once_with()
+
+    @override_settings(JTI_BLACKLIST={"ENABLED": False})
+    def test_disabled(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(jti_blacklist.is_blacklisted(self.jti))
+
+    @override_settings(SHARED_CACHES=[])
+    def test_queried_without_shared_cache(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(jti_blacklist.is_blacklisted(self.jti))
+
+        self.refresh.blacklist()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(jti_blacklist.is_blacklisted(self.jti))
@@ -0,0 +1,130 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+
+from somaafrica.commons import metrics
+from somaafrica.persons.last_login import LastLoginBatcher, last_logins
+from somaafrica.persons.models import User
+
+
+@override_settings(
+    JWT_ONLY_LOGIN=True,
+    LAST_LOGIN_BATCH={"FLUSH_INTERVAL": 30, "MAX_PENDING": 2}
+)
+class TestJWTOnlyLogin(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for username in ["first", "second"]:
+            user = baker.make(User, username=username)
+            user.set_password(username)
+            user.save()
+
+    def setUp(self):
+        metrics.reset("last_login")
+
+    def login(self, username):
+        return self.client.post(
+            reverse("login"),
+            {"username": username, "password": username}
+        )
+
+    def last_login(self, username):
+        return User.objects.get(username=username).last_login
+
+    def test_login_creates_no_session(self):
+        response = self.login("first")
+
+        self.assertContains(response, "Successful")
+        self.assertIsNotNone(response.json()["detail"]["last_login"])
+        self.assertFalse(Session.objects.exists())
+        self.assertIsNone(self.last_login("first"))
+
+    @mock.patch("somaafrica.persons.last_login.threading.Thread")
+    def test_flushed_in_one_update(self, thread):
+        self.login("first")
+        thread.assert_not_called()
+        self.login("second")
+        thread.assert_called_once_with(
+            target=last_logins.flush_in_background
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(last_logins.flush(), 2)
+
+        self.assertIsNotNone(self.last_login("first"))
+        self.assertIsNotNone(self.last_login("second"))
+        self.assertEqual(metrics.snapshot("last_login"), {
+            "last_login.flushes": 1,
+            "last_login.users": 2
+        })
+
+    @mock.patch("somaafrica.persons.last_login.threading.Timer")
+    def test_flushed_after_interval(self, timer):
+        batcher = LastLoginBatcher()
+        user = User.objects.get(username="first")
+
+        batcher.record(user)
+        batcher.record(user)
+
+        timer.assert_called_once_with(30, batcher.flush_in_background)
+        timer.return_value.start.assert_called_once_with()
+
+        batcher.flush()
+        timer.return_value.cancel.assert_called_once_with()
+
+        batcher.record(user)
+        self.assertEqual(timer.call_count, 2)
+
+    def test_timer_flushes_without_another_login(self):
+        batcher = LastLoginBatcher()
+        batcher.record(User.objects.get(username="first"))
+
+        try:
+            self.assertTrue(batcher.timer.daemon)
+            self.assertTrue(batcher.timer.is_alive())
+        finally:
+            batcher.reset()
+
+        self.assertIsNone(batcher.timer)
+
+    def test_nothing_to_flush(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(LastLoginBatcher().flush(), 0)
+
+    @mock.patch("somaafrica.persons.last_login.connections")
+    def test_background_flush_errors_logged(self, connections):
+        batcher = LastLoginBatcher()
+
+        with mock.patch.object(batcher, "flush", side_effect=RuntimeError):
+            with self.assertLogs("somaafrica.persons.last_login", "ERROR"):
+                batcher.flush_in_background()
+
+        connections.close_all.assert_called_once_with()
+
+
+class TestPurgeSessions(TestCase):
+    def setUp(self):
+        for expiry in [-60, -60, -60, 3600]:
+            session = SessionStore()
+            session.set_expiry(expiry)
+            session.create()
+
+    @mock.patch("somaafrica.persons.management.commands.purge_sessions.time")
+    def test_purges_expired_sessions(self, time):
+        out = StringIO()
+        call_command("purge_sessions", "--batch-size", "3", stdout=out)
+
+        self.assertEqual(Session.objects.count(), 1)
+        self.assertEqual(time.sleep.call_count, 1)
+        self.assertIn("Deleted 3 of 4 sessions, 1 left", out.getvalue())
+
+    def test_purges_all_sessions(self):
+        call_command("purge_sessions", "--all", stdout=StringIO())
+
+        self.assertFalse(Session.objects.exists())
@@ -1,5 +1,6 @@
 from django.contrib.auth import authenticate
-from django.test import TestCase
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from model_bakery import baker
 
@@ -37,6 +38,35 @@ class TestLogin(TestCase):
 
         self.assertContains(response, "Successful", status_code=200)
 
+    def test_login_query_budget(self):
+        credentials = {
+            "username": "testuser@tests.com",
+            "password": "testuser"
+        }
+
+        # user and prefetched groups, and the outstanding token insert.
+        # last_login is written later, in batches.
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse("login"), credentials)
+
+        self.assertContains(response, "Successful", status_code=200)
+
+    @override_settings(JWT_ONLY_LOGIN=False)
+    def test_session_login_query_budget(self):
+        credentials = {
+            "username": "testuser@tests.com",
+            "password": "testuser"
+        }
+
+        # user and prefetched groups, the session write (exists check plus
+        # an insert and an update, each in a savepoint), last_login and the
+        # outstanding token
+        with self.assertNumQueries(11):
+            response = self.client.post(reverse("login"), credentials)
+
+        self.assertContains(response, "Successful", status_code=200)
+        self.assertEqual(Session.objects.count(), 1)
+
     def test_invalid_password(self):
         credentials = {
             "username": "testuser",
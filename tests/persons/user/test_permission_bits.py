@@ -0,0 +1,153 @@
+from io import StringIO
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import AccessToken
+
+from somaafrica.commons.authentication import SomaAfricaJWTAuthentication
+from somaafrica.persons import permission_bits, tokens
+from somaafrica.persons.models import Group, User
+
+
+class TestPermissionBits(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group, name="teachers")
+        cls.group.permissions.add(
+            *Permission.objects.filter(codename__in=["add_group", "add_user"])
+        )
+        cls.user = baker.make(User)
+        cls.user.groups.add(cls.group)
+
+    def test_user_mask_is_or_of_group_masks(self):
+        other = baker.make(Group, name="parents")
+        other.permissions.add(Permission.objects.get(codename="add_person"))
+        self.user.groups.add(other)
+
+        index = permission_bits.get_index()
+        expected = index.group_masks[self.group.guid] | (
+            index.group_masks[other.guid]
+        )
+
+        self.assertEqual(self.user.permission_mask, expected)
+        self.assertEqual(
+            self.user.permission_set,
+            frozenset(["add_group", "add_user", "add_person"])
+        )
+
+    def test_bit_position_is_permission_id(self):
+        permission = Permission.objects.get(codename="add_user")
+        index = permission_bits.get_index()
+
+        self.assertEqual(index.mask_for("add_user"), 1 << permission.id)
+        self.assertEqual(index.mask_for("fake"), 0)
+
+    def test_codename_shared_by_content_types(self):
+        # auth.Group and persons.Group both define add_group
+        ids = Permission.objects.filter(
+            codename="add_group"
+        ).values_list("id", flat=True)
+        index = permission_bits.get_index()
+
+        self.assertEqual(len(ids), 2)
+        for pk in ids:
+            self.assertTrue(index.has_perm(1 << pk, "add_group"))
+
+    def test_has_perms(self):
+        mask = self.user.permission_mask
+        index = permission_bits.get_index()
+
+        self.assertTrue(index.has_perms(mask, ["add_group", "add_user"]))
+        self.assertFalse(index.has_perms(mask, ["add_group", "fake"]))
+        self.assertTrue(index.has_perms(mask, []))
+
+    def test_encode_decode_mask(self):
+        for mask in [0, 1, 1 << 7, self.user.permission_mask, (1 << 300) - 1]:
+            with self.subTest(mask=mask):
+                encoded = permission_bits.encode_mask(mask)
+
+                self.assertEqual(permission_bits.decode_mask(encoded), mask)
+
+    def test_index_rebuilt_on_version_change(self):
+        index = permission_bits.get_index()
+        self.assertIs(permission_bits.get_index(), index)
+
+        self.group.add_permissions_to_group(["delete_group"])
+
+        self.assertIsNot(permission_bits.get_index(), index)
+
+    def test_bench_permissions_command(self):
+        out = StringIO()
+        call_command(
+            "bench_permissions",
+            groups=2,
+            perms_per_group=3,
+            iterations=2,
+            stdout=out
+        )
+
+        self.assertIn("bitmask test", out.getvalue())
+        self.assertFalse(
+            User.objects.filter(username="bench-permissions-user").exists()
+        )
+
+    def test_unknown_bits_ignored(self):
+        index = permission_bits.get_index()
+        unknown = 1 << (Permission.objects.order_by("-id").first().id + 1)
+
+        self.assertEqual(index.codenames(unknown), frozenset())
+
+    def test_index_shared_between_processes(self):
+        index = permission_bits.get_index()
+        permission_bits._LOCAL_INDEX.clear()
+
+        with self.assertNumQueries(0):
+            shared = permission_bits.get_index()
+
+        self.assertEqual(shared.codename_masks, index.codename_masks)
+
+
+@override_settings(SHARED_CACHES=[])
+class TestPermissionBitsWithoutSharedCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group)
+        cls.group.permissions.add(Permission.objects.get(codename="add_user"))
+        cls.user = baker.make(User)
+        cls.user.groups.add(cls.group)
+
+        # Permissions of groups the user is not in are never read
+        baker.make(Group).permissions.add(*Permission.objects.all())
+
+    def test_user_permissions_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.user.permission_set, {"add_user"})
+
+        self.assertEqual(
+            len(self.user._compiled_permissions()[1].codename_masks), 1
+        )
+
+    def test_snapshot_user_reads_own_groups(self):
+        # user snapshot, then their groups' permissions
+        with self.assertNumQueries(2):
+            user = SomaAfricaJWTAuthentication().get_snapshot_user(
+                self.user.guid
+            )
+            self.assertTrue(user.has_perm("add_user"))
+            self.assertFalse(user.has_perm("add_group"))
+
+    def test_introspection_reads_own_groups(self):
+        token = str(AccessToken.for_user(self.user))
+
+        with self.assertNumQueries(2):
+            result, = tokens.introspect([token])
+
+        self.assertEqual(result["permissions"], ["add_user"])
+
+    def test_user_without_groups(self):
+        user = baker.make(User)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.permission_set, frozenset())
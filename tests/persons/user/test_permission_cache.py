@@ -0,0 +1,134 @@
+from django.contrib.auth.models import Permission
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.commons import metrics
+from somaafrica.commons.cache import is_shared
+from somaafrica.persons import permission_cache
+from somaafrica.persons.models import Group, User
+
+
+class TestPermissionCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group, name="teachers")
+        cls.group.permissions.add(
+            *Permission.objects.filter(codename__in=["add_group", "add_user"])
+        )
+        cls.user = baker.make(User)
+        cls.user.groups.add(cls.group)
+
+    def setUp(self):
+        metrics.reset("permission_cache")
+
+    def auth_headers(self, user):
+        access = RefreshToken.for_user(user).access_token
+        return {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+
+    def fresh_user(self):
+        return User.objects.get(guid=self.user.guid)
+
+    def test_permissions_cached_across_instances(self):
+        self.assertTrue(self.fresh_user().has_perm("add_group"))
+
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perms(["add_group", "add_user"]))
+
+        self.assertEqual(metrics.snapshot("permission_cache.miss"), {
+            "permission_cache.miss": 1
+        })
+        self.assertEqual(metrics.snapshot("permission_cache.hit"), {
+            "permission_cache.hit": 1
+        })
+
+    def test_add_remove_permissions_to_group_invalidates(self):
+        self.assertFalse(self.fresh_user().has_perm("delete_group"))
+
+        self.group.add_permissions_to_group(["delete_group"])
+        self.assertTrue(self.fresh_user().has_perm("delete_group"))
+
+        self.group.remove_permissions_from_group(["delete_group"])
+        self.assertFalse(self.fresh_user().has_perm("delete_group"))
+
+    def test_add_remove_user_from_group_invalidates(self):
+        self.assertTrue(self.fresh_user().has_perm("add_group"))
+
+        self.group.remove_user_from_group(self.user.guid)
+        self.assertFalse(self.fresh_user().has_perm("add_group"))
+
+        self.group.add_user_to_group(self.user.guid)
+        self.assertTrue(self.fresh_user().has_perm("add_group"))
+
+    def test_group_clear_and_delete_invalidates(self):
+        self.assertTrue(self.fresh_user().has_perm("add_group"))
+
+        self.group.user_set.clear()
+        self.assertFalse(self.fresh_user().has_perm("add_group"))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm("add_group"))
+
+        self.group.delete()
+        self.assertFalse(self.fresh_user().has_perm("add_group"))
+
+    def test_metrics_endpoint(self):
+        admin = baker.make(User, is_staff=True)
+        self.fresh_user().has_perm("add_group")
+
+        response = self.client.get(
+            reverse("metrics"),
+            **self.auth_headers(admin)
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["permission_cache.miss"], 1)
+
+    def test_metrics_endpoint_requires_admin(self):
+        response = self.client.get(
+            reverse("metrics"),
+            **self.auth_headers(self.user)
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(SHARED_CACHES=[])
+    def test_not_cached_in_process_local_cache(self):
+        self.assertTrue(self.fresh_user().has_perm("add_group"))
+
+        # Their groups' permissions, again for every user instance
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perms(["add_group", "add_user"]))
+
+        for mask in [1, 2]:
+            self.assertEqual(
+                permission_cache.get_permissions(user.guid, lambda: mask),
+                mask
+            )
+        self.assertEqual(metrics.snapshot("permission_cache"), {})
+
+
+class TestSharedCaches(SimpleTestCase):
+    @override_settings(SHARED_CACHES=[])
+    def test_process_local_backends_not_shared(self):
+        self.assertFalse(is_shared())
+        self.assertFalse(is_shared("missing"))
+
+        with override_settings(SHARED_CACHES=["default"]):
+            self.assertTrue(is_shared())
+
+    @override_settings(
+        SHARED_CACHES=[],
+        CACHES={
+            "default": {
+                "BACKEND":
+                "django.core.cache.backends.memcached.PyMemcacheCache",
+                "LOCATION": "127.0.0.1:11211",
+            }
+        }
+    )
+    def test_network_backends_shared(self):
+        self.assertTrue(is_shared())
@@ -0,0 +1,74 @@
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from model_bakery import baker
+
+from somaafrica.persons.models import Group, User
+
+
+class TestPermissionSet(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group, name="teachers")
+        cls.group.permissions.add(
+            *Permission.objects.filter(codename__in=["add_group", "add_user"])
+        )
+
+    def setUp(self):
+        self.user = User.objects.get(guid=baker.make(User).guid)
+        self.user.groups.add(self.group)
+
+    def test_permission_set_is_frozenset(self):
+        self.assertIsInstance(self.user.permission_set, frozenset)
+        self.assertEqual(
+            self.user.permission_set,
+            frozenset(["add_group", "add_user"])
+        )
+        self.assertCountEqual(
+            self.user.user_permissions,
+            ["add_group", "add_user"]
+        )
+
+    def test_permission_checks_are_memoized(self):
+        self.assertTrue(self.user.has_perm("add_group"))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.has_perm("add_group"))
+            self.assertTrue(self.user.has_perms(["add_group", "add_user"]))
+            self.assertFalse(self.user.has_perm("delete_group"))
+            self.assertFalse(self.user.has_perms(["add_group", "fake"]))
+
+    def test_unsaved_user_has_no_permissions(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(User().permission_set, frozenset())
+
+    def test_superuser_has_all_perms(self):
+        user = baker.make(User, is_superuser=True)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("anything"))
+            self.assertTrue(user.has_perms(["anything", "at_all"]))
+
+    def test_invalidated_on_group_membership_change(self):
+        self.assertTrue(self.user.has_perm("add_group"))
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.user.has_perm("add_group"))
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(self.user.has_perm("add_group"))
+
+    def test_invalidated_on_group_permissions_change(self):
+        self.assertFalse(self.user.has_perm("delete_group"))
+
+        self.group.add_permissions_to_group(["delete_group"])
+        self.assertTrue(self.user.has_perm("delete_group"))
+
+        self.group.remove_permissions_from_group(["delete_group"])
+        self.assertFalse(self.user.has_perm("delete_group"))
+
+    def test_invalidated_on_refresh_from_db(self):
+        self.assertTrue(self.user.has_perm("add_group"))
+
+        self.user.refresh_from_db()
+        self.assertNotIn("_permissions", self.user.__dict__)
+        self.assertTrue(self.user.has_perm("add_group"))
@@ -1,6 +1,20 @@
-from django.test import TestCase
+import hashlib
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from model_bakery import baker
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.commons import metrics
+from somaafrica.persons.models import User
+from somaafrica.persons.serializers import (
+    ROTATION_KEY,
+    ROTATION_LOCK_KEY,
+    TokenRefreshSerializer
+)
 
 
 class TestRefreshToken(TestCase):
@@ -98,3 +112,75 @@ class TestRefreshToken(TestCase):
             "field may not be blank",
             status_code=400
         )
+
+
+@override_settings(REFRESH_TOKEN_GRACE_PERIOD=10)
+class TestRefreshGracePeriod(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User)
+
+    def setUp(self):
+        metrics.reset("token_refresh")
+        self.token_data = {"refresh": str(RefreshToken.for_user(self.user))}
+
+    def refresh(self):
+        return self.client.post(reverse("token_refresh"), self.token_data)
+
+    def test_concurrent_refresh_gets_same_pair(self):
+        first = self.refresh()
+        outstanding = OutstandingToken.objects.count()
+
+        with self.assertNumQueries(0):
+            second = self.refresh()
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(OutstandingToken.objects.count(), outstanding)
+        self.assertEqual(metrics.snapshot("token_refresh"), {
+            "token_refresh.rotations": 1,
+            "token_refresh.grace_hits": 1
+        })
+
+    def test_waits_for_concurrent_rotation(self):
+        serializer = TokenRefreshSerializer()
+        with mock.patch("somaafrica.persons.serializers.cache") as shared:
+            shared.get.side_effect = [None, None, {"access": "rotated"}]
+            shared.add.return_value = False
+
+            with mock.patch("somaafrica.persons.serializers.time.sleep"):
+                data = serializer.validate(self.token_data)
+
+        self.assertEqual(data, {"access": "rotated"})
+
+    @mock.patch.object(TokenRefreshSerializer, "wait_timeout", 0)
+    def test_rotates_when_concurrent_rotation_times_out(self):
+        digest = hashlib.sha256(self.token_data["refresh"].encode())
+        lock_key = ROTATION_LOCK_KEY.format(digest=digest.hexdigest())
+        cache.add(lock_key, "concurrent")
+
+        response = self.refresh()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(metrics.snapshot("token_refresh.rotations"), {
+            "token_refresh.rotations": 1
+        })
+        # Still held by the concurrent refresh
+        self.assertEqual(cache.get(lock_key), "concurrent")
+
+    def test_failed_refresh_releases_lock(self):
+        self.token_data = {"refresh": "not-a-token"}
+
+        self.assertEqual(self.refresh().status_code, 401)
+
+        digest = hashlib.sha256(b"not-a-token").hexdigest()
+        self.assertIsNone(cache.get(ROTATION_LOCK_KEY.format(digest=digest)))
+        self.assertIsNone(cache.get(ROTATION_KEY.format(digest=digest)))
+
+    @override_settings(REFRESH_TOKEN_GRACE_PERIOD=0)
+    def test_disabled(self):
+        self.refresh()
+
+        self.assertContains(
+            self.refresh(), "Token is blacklisted", status_code=401
+        )
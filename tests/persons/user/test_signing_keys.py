@@ -0,0 +1,229 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from somaafrica.commons.authentication import SomaAfricaJWTAuthentication
+from somaafrica.persons import signing_keys
+from somaafrica.persons.models import User
+
+
+class TestSigningKeys(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User, username="signer")
+        cls.user.set_password("signer")
+        cls.user.save()
+
+    def setUp(self):
+        key_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(key_dir.cleanup)
+        self.key_dir = key_dir.name
+        self.addCleanup(setattr, state, "token_backend", state.token_backend)
+
+    def create_key(self, kid, algorithm="EdDSA"):
+        call_command(
+            "create_signing_key",
+            "--key-dir", self.key_dir,
+            "--algorithm", algorithm,
+            "--kid", kid,
+            stdout=StringIO()
+        )
+
+    def install(self, current):
+        with override_settings(JWT_SIGNING_KEYS={
+            "KEY_DIR": self.key_dir,
+            "CURRENT": current
+        }):
+            signing_keys.install()
+
+    def test_login_tokens_signed_with_current_key(self):
+        self.create_key("ed-1")
+        self.install("ed-1")
+
+        response = self.client.post(
+            reverse("login"),
+            {"username": "signer", "password": "signer"}
+        )
+        access = response.json()["access"]
+        request = APIRequestFactory().get(
+            "/",
+            HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+        self.assertEqual(
+            jwt.get_unverified_header(access),
+            {"alg": "EdDSA", "kid": "ed-1", "typ": "JWT"}
+        )
+        self.assertEqual(
+            SomaAfricaJWTAuthentication().authenticate(request)[0].guid,
+            str(self.user.guid)
+        )
+
+    def test_verified_with_jwks_outside_django(self):
+        self.create_key("rsa-1", "RS256")
+        self.install("rsa-1")
+        access = str(AccessToken.for_user(self.user))
+
+        response = self.client.get(reverse("jwks"))
+        jwk, = response.json()["keys"]
+        payload = jwt.decode(
+            access,
+            jwt.PyJWK(jwk).key,
+            algorithms=[jwk["alg"]]
+        )
+
+        self.assertEqual(payload["user_id"], str(self.user.guid))
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+        self.assertNotIn("d", jwk)
+
+    def test_rotation_keeps_old_tokens_valid(self):
+        self.create_key("old", "RS256")
+        self.install("old")
+        refresh = RefreshToken.for_user(self.user)
+
+        self.create_key("new")
+        self.install("new")
+
+        self.assertEqual(
+            jwt.get_unverified_header(str(refresh.access_token))["kid"],
+            "new"
+        )
+        self.assertEqual(
+            RefreshToken(str(refresh))["user_id"],
+            str(self.user.guid)
+        )
+
+    def test_retired_public_key_verifies_only(self):
+        self.create_key("retired")
+        self.install("retired")
+        access = str(AccessToken.for_user(self.user))
+
+        key = signing_keys.load_keys(self.key_dir)["retired"]
+        public_pem = key.public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        with open(os.path.join(self.key_dir, "retired.pem"), "wb") as pem:
+            pem.write(public_pem)
+        self.create_key("current")
+        self.install("current")
+
+        self.assertEqual(AccessToken(access)["user_id"], str(self.user.guid))
+        with self.assertRaises(ImproperlyConfigured):
+            self.install("retired")
+
+    def test_rejects_unknown_kid_and_algorithm_confusion(self):
+        self.create_key("rsa-1", "RS256")
+        self.install("rsa-1")
+        secret = "s" * 32
+        forged = [
+            jwt.encode({"user_id": "x"}, secret, headers={"kid": "other"}),
+            jwt.encode({"user_id": "x"}, secret, headers={"kid": "rsa-1"}),
+            "not-a-token",
+        ]
+
+        for token in forged:
+            with self.subTest(token=token):
+                response = self.client.get(
+                    reverse("user-list"),
+                    HTTP_AUTHORIZATION=f"Bearer {token}"
+                )
+
+                self.assertEqual(response.status_code, 401)
+
+    def test_audience_and_issuer(self):
+        self.create_key("ed-1")
+        with open(os.path.join(self.key_dir, "README"), "w") as readme:
+            readme.write("Not a key")
+
+        with mock.patch.multiple(
+            signing_keys.api_settings,
+            AUDIENCE="somaafrica-api",
+            ISSUER="somaafrica"
+        ):
+            self.install("ed-1")
+
+        token = AccessToken(str(AccessToken.for_user(self.user)))
+
+        self.assertEqual(token["aud"], "somaafrica-api")
+        self.assertEqual(token["iss"], "somaafrica")
+
+    def test_expired_token(self):
+        self.create_key("ed-1")
+        self.install("ed-1")
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=-token.lifetime)
+
+        response = self.client.get(
+            reverse("user-list"),
+            HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        self.assertContains(response, "expired", status_code=401)
+
+    @override_settings(JWT_SIGNING_KEYS={"KEY_DIR": "", "CURRENT": ""})
+    def test_hs256_without_key_dir(self):
+        signing_keys.install()
+
+        self.assertEqual(self.client.get(reverse("jwks")).json(), {"keys": []})
+        self.assertEqual(
+            jwt.get_unverified_header(str(AccessToken.for_user(self.user))),
+            {"alg": "HS256", "typ": "JWT"}
+        )
+
+    def test_hs256_until_current_key_created(self):
+        for key_dir, current in (
+            (self.key_dir, ""),
+            (self.key_dir, "ed-1"),
+            (os.path.join(self.key_dir, "missing"), "ed-1"),
+        ):
+            with self.subTest(key_dir=key_dir, current=current):
+                with override_settings(JWT_SIGNING_KEYS={
+                    "KEY_DIR": key_dir,
+                    "CURRENT": current
+                }), self.assertLogs("somaafrica.persons.signing_keys"):
+                    signing_keys.install()
+
+                self.assertNotIsInstance(
+                    state.token_backend, signing_keys.KeyRingTokenBackend
+                )
+
+        self.create_key("ed-1")
+        self.install("ed-1")
+
+        self.assertEqual(
+            jwt.get_unverified_header(str(AccessToken.for_user(self.user))),
+            {"alg": "EdDSA", "kid": "ed-1", "typ": "JWT"}
+        )
+
+    def test_unsupported_key_type(self):
+        with self.assertRaises(ImproperlyConfigured):
+            signing_keys.SigningKey("ec", object())
+
+    def test_create_signing_key_errors(self):
+        self.create_key("taken")
+
+        with self.assertRaises(CommandError):
+            self.create_key("taken")
+        with self.assertRaises(CommandError):
+            call_command("create_signing_key", "--key-dir", "")
+
+    def test_bench_jwt_command(self):
+        out = StringIO()
+        call_command("bench_jwt", "--iterations", "2", stdout=out)
+
+        rows = [line.split()[0] for line in out.getvalue().splitlines()]
+        self.assertEqual(rows, ["algorithm", "HS256", "RS256", "EdDSA"])
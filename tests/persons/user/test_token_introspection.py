@@ -0,0 +1,106 @@
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from somaafrica.persons import permission_bits
+from somaafrica.persons.models import Group, User
+
+
+class TestTokenIntrospection(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = baker.make(Group, name="teachers")
+        cls.group.permissions.add(
+            *Permission.objects.filter(codename__in=["add_group", "add_user"])
+        )
+        cls.teachers = baker.make(User, _quantity=3)
+        for teacher in cls.teachers:
+            teacher.groups.add(cls.group)
+
+        cls.inactive = baker.make(User)
+        cls.inactive_token = str(AccessToken.for_user(cls.inactive))
+        User.objects.filter(pk=cls.inactive.pk).update(is_active=False)
+
+        cls.sidecar = baker.make(User, is_staff=True)
+
+    def setUp(self):
+        self.headers = {
+            "HTTP_AUTHORIZATION":
+            f"Bearer {RefreshToken.for_user(self.sidecar).access_token}"
+        }
+
+    def introspect(self, tokens, headers=None):
+        return self.client.post(
+            reverse("token_introspect"),
+            {"tokens": tokens},
+            content_type="application/json",
+            **(self.headers if headers is None else headers)
+        )
+
+    def test_batch_in_one_user_query(self):
+        tokens = [str(AccessToken.for_user(user)) for user in self.teachers]
+        tokens += [self.inactive_token, tokens[0]]
+        permission_bits.get_index()
+        self.introspect(tokens[:1])
+
+        # the sidecar's auth snapshot is cached, then one user query
+        with self.assertNumQueries(1):
+            response = self.introspect(tokens)
+
+        results = response.json()["results"]
+        self.assertEqual(len(results), 5)
+        self.assertEqual(
+            [result["guid"] for result in results],
+            [
+                str(user.guid)
+                for user in self.teachers + [self.inactive, self.teachers[0]]
+            ]
+        )
+        self.assertEqual(results[0]["permissions"], ["add_group", "add_user"])
+        self.assertEqual(results[4]["permissions"], ["add_group", "add_user"])
+        self.assertTrue(results[0]["valid"])
+        self.assertTrue(results[0]["is_active"])
+        self.assertFalse(results[3]["is_active"])
+        self.assertEqual(results[3]["permissions"], [])
+
+    def test_invalid_tokens(self):
+        deleted = baker.make(User)
+        deleted_token = str(AccessToken.for_user(deleted))
+        deleted.delete()
+
+        refresh = RefreshToken.for_user(self.teachers[0])
+        no_user = AccessToken()
+
+        response = self.introspect([
+            "not-a-token",
+            str(refresh),
+            deleted_token,
+            str(no_user),
+        ])
+
+        self.assertEqual(
+            [result["valid"] for result in response.json()["results"]],
+            [False, False, False, False]
+        )
+        self.assertEqual(
+            response.json()["results"][2]["detail"], "User not found"
+        )
+
+    @override_settings(TOKEN_INTROSPECTION_MAX_TOKENS=2)
+    def test_batch_size_limited(self):
+        response = self.introspect(["a", "b", "c"])
+
+        self.assertContains(
+            response, "At most 2 tokens per request", status_code=400
+        )
+
+    def test_requires_admin(self):
+        headers = {
+            "HTTP_AUTHORIZATION":
+            f"Bearer {RefreshToken.for_user(self.teachers[0]).access_token}"
+        }
+
+        self.assertEqual(self.introspect(["a"], headers).status_code, 403)
+        self.assertEqual(self.introspect(["a"], {}).status_code, 401)
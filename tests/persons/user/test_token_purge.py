@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.commons import metrics
+from somaafrica.persons import token_purge
+from somaafrica.persons.models import User
+
+
+class StopPurging(Exception):
+    pass
+
+
+@override_settings(TOKEN_PURGE={"BATCH_SIZE": 2, "PAUSE": 0})
+class TestTokenPurge(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = baker.make(User)
+
+        for number in range(7):
+            token = RefreshToken.for_user(user)
+            if number % 2:
+                token.blacklist()
+
+        cls.live = RefreshToken.for_user(user)
+        cls.live.blacklist()
+        OutstandingToken.objects.exclude(jti=cls.live["jti"]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def setUp(self):
+        metrics.reset("token_purge")
+
+    def test_purges_expired_rows_in_batches(self):
+        with mock.patch("somaafrica.persons.token_purge.time.sleep") as sleep:
+            deleted = token_purge.purge_expired()
+
+        self.assertEqual(deleted, {"outstanding": 7, "blacklisted": 3})
+        self.assertEqual(sleep.call_count, 3)
+        self.assertQuerySetEqual(
+            OutstandingToken.objects.values_list("jti", flat=True),
+            [self.live["jti"]]
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertEqual(
+            metrics.snapshot("token_purge"),
+            {"token_purge.outstanding_deleted": 7,
+             "token_purge.blacklisted_deleted": 3}
+        )
+
+    def test_stops_after_max_batches(self):
+        first = token_purge.purge_expired(max_batches=2)
+
+        self.assertEqual(first["outstanding"], 4)
+
+        # Rows expired since are deleted along with the rest
+        OutstandingToken.objects.filter(jti=self.live["jti"]).update(
+            expires_at=timezone.now()
+        )
+        second = token_purge.purge_expired()
+
+        self.assertEqual(second, {"outstanding": 4, "blacklisted": 2})
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertEqual(
+            token_purge.purge_expired(),
+            {"outstanding": 0, "blacklisted": 0}
+        )
+
+    def test_command_reports_table_sizes(self):
+        out = StringIO()
+        call_command("purge_tokens", "--batch-size", "5", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1].split(), ["outstanding", "8", "7", "1"])
+        self.assertEqual(lines[2].split(), ["blacklisted", "4", "3", "1"])
+        self.assertEqual(
+            metrics.snapshot("token_purge.outstanding_rows"),
+            {"token_purge.outstanding_rows": 1}
+        )
+
+    @mock.patch.object(token_purge, "estimated_rows", return_value=500000)
+    def test_sizes_from_estimates(self, estimated_rows):
+        with self.assertNumQueries(0):
+            sizes = token_purge.table_sizes()
+
+        self.assertEqual(
+            sizes, {"outstanding": 500000, "blacklisted": 500000}
+        )
+        deleted = {"outstanding": 7, "blacklisted": 0}
+        self.assertEqual(
+            token_purge.sizes_after(sizes, deleted),
+            {"outstanding": 499993, "blacklisted": 500000}
+        )
+
+    @mock.patch(
+        "somaafrica.persons.management.commands.purge_tokens.time.sleep",
+        side_effect=StopPurging
+    )
+    def test_command_runs_periodically(self, sleep):
+        with self.assertRaises(StopPurging):
+            call_command(
+                "purge_tokens",
+                "--every", "60",
+                "--batch-size", "10",
+                stdout=StringIO()
+            )
+
+        sleep.assert_called_once_with(60)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
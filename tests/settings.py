@@ -3,6 +3,10 @@ import os
 from somaafrica.configs.settings import *
 
 
+# Tests run in a single process, whose memory cache every reader shares
+SHARED_CACHES = ["default"]
+
+
 # if os.getenv('GITHUB_WORKFLOW'):
 #     DATABASES = {
 #         'default': {
@@ -0,0 +1,28 @@
+from django.test import TestCase
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from somaafrica.persons.models import User
+
+
+class AdminAPITestCase(TestCase):
+    """
+    Requests made as a superuser with a Bearer token. The warm_up_url
+    list is fetched once in setUp, so caches filled on first use don't
+    show in query counts
+    """
+    warm_up_url = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = baker.make(User, is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        self.headers = {
+            "HTTP_AUTHORIZATION":
+            f"Bearer {RefreshToken.for_user(self.admin).access_token}"
+        }
+
+        if self.warm_up_url:
+            self.client.get(reverse(self.warm_up_url), **self.headers)